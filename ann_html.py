@@ -0,0 +1,110 @@
+from collections import deque
+from html.parser import HTMLParser
+
+# Markers left behind when ann.html is served without its Angular data bound
+TEMPLATE_MARKERS = ("{{", "}}", "CorpannData", "cann.")
+
+
+class AnnouncementTableParser(HTMLParser):
+    """Incremental (SAX-style) row extractor for the first <table> of the announcements page.
+
+    Rows are appended to `rows` as soon as they are complete, as
+    {"cells": [td text], "links": [first <a> href per td, "" if none], "text": raw row text,
+    "templated": bool}. Nested tables count as part of the first table, matching a
+    recursive `find_all("tr")` on it. Once that table closes, `done` is set and the rest
+    of the document is ignored. `templated` is set as soon as a template placeholder is
+    seen inside the table.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = deque()
+        self.saw_table = False
+        self.templated = False
+        self.done = False
+        self._depth = 0
+        self._row = None
+        self._cell = None
+        self._cell_kind = None
+
+    def _close_cell(self):
+        if self._cell is not None and self._row is not None:
+            row = self._row
+            if self._cell_kind == "td":
+                row["cells"].append(" ".join(p for p in (s.strip() for s in self._cell["text"]) if p))
+                row["links"].append(self._cell["link"] or "")
+        self._cell = None
+        self._cell_kind = None
+
+    def _close_row(self):
+        self._close_cell()
+        if self._row is not None:
+            row, self._row = self._row, None
+            row["text"] = "".join(row["text"])
+            self.rows.append(row)
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "table":
+            self.saw_table = True
+            self._depth += 1
+            return
+        if not self._depth:
+            return
+        if tag == "tr":
+            self._close_row()
+            self._row = {"cells": [], "links": [], "text": [], "templated": False}
+        elif tag in ("td", "th") and self._row is not None:
+            self._close_cell()
+            self._cell = {"text": [], "link": None}
+            self._cell_kind = tag
+        elif tag == "a" and self._cell is not None and self._cell["link"] is None:
+            self._cell["link"] = dict(attrs).get("href") or ""
+
+    def handle_endtag(self, tag):
+        if self.done or not self._depth:
+            return
+        if tag == "table":
+            self._close_row()
+            self._depth -= 1
+            if not self._depth:
+                self.done = True
+        elif tag == "tr":
+            self._close_row()
+        elif tag in ("td", "th"):
+            self._close_cell()
+
+    def handle_data(self, data):
+        if self.done or not self._depth or self._row is None:
+            return
+        row = self._row
+        row["text"].append(data)
+        if self._cell is not None:
+            self._cell["text"].append(data)
+        if any(m in data for m in TEMPLATE_MARKERS):
+            row["templated"] = True
+            self.templated = True
+
+    def close(self):
+        super().close()
+        self._close_row()
+
+
+def iter_table_rows(html, parser=None, chunk_size=16384):
+    """Yield rows of the first table in `html` while it is being parsed.
+
+    The document is fed in `chunk_size` pieces and parsing stops when the table closes,
+    so a caller that only needs the first few rows stops the work early by breaking out.
+    Pass a `parser` to inspect `saw_table` / `templated` afterwards.
+    """
+    parser = parser or AnnouncementTableParser()
+    for start in range(0, len(html or ""), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+        while parser.rows:
+            yield parser.rows.popleft()
+        if parser.done:
+            return
+    parser.close()
+    while parser.rows:
+        yield parser.rows.popleft()
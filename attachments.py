@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class AttachmentTooLarge(Exception):
+    """Raised when an attachment is (or turns out to be, while streaming) above the size cap."""
+
+
+class AttachmentStore:
+    """Content-addressed on-disk store of announcement attachments.
+
+    Files live in `<root>/objects/<sha256[:2]>/<sha256><ext>`, so the same PDF published
+    under several URLs is stored once. `<root>/index.json` maps every downloaded URL to
+    {sha256, size, path, fetched_at}. Downloads are streamed through `put_stream()` into a
+    temporary file and hashed on the way, so a file is never held in memory whole. Text
+    extracted from a file is kept by the same digest in `<root>/text/`.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+        self._index_path = os.path.join(root, "index.json")
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        except FileNotFoundError:
+            self.index = {}
+        except Exception as exc:
+            print(f"⚠️ Ignoring unreadable attachment index {self._index_path}: {exc}")
+            self.index = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def object_path(self, digest, ext=""):
+        return os.path.join(self.root, "objects", digest[:2], digest + ext)
+
+    def lookup(self, url):
+        """The index entry for `url` when its file is still on disk, else None."""
+        entry = self.index.get(url)
+        if entry and os.path.exists(os.path.join(self.root, entry["path"])):
+            return entry
+        return None
+
+    def put_stream(self, url, chunks, max_bytes=None):
+        """Store the bytes yielded by `chunks` as the content of `url`.
+
+        Returns (entry, duplicate): duplicate is True when identical content was already
+        stored (from any URL). Raises AttachmentTooLarge once more than `max_bytes` arrive,
+        leaving nothing behind.
+        """
+        ext = os.path.splitext(urlsplit(url).path)[1].lower()[:8]
+        tmp = os.path.join(self.root, "tmp", f"{os.getpid()}.{threading.get_ident()}.part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp, "wb") as f:
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise AttachmentTooLarge(f"{url} is larger than {max_bytes} bytes")
+                    digest.update(chunk)
+                    f.write(chunk)
+            path = self.object_path(digest.hexdigest(), ext)
+            duplicate = os.path.exists(path)
+            if duplicate:
+                os.remove(tmp)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        entry = {"sha256": digest.hexdigest(), "size": size, "path": os.path.relpath(path, self.root),
+                 "fetched_at": time.time()}
+        with self.lock:
+            self.index[url] = entry
+            self._save_index()
+        return entry, duplicate
+
+    def text_path(self, digest):
+        return os.path.join(self.root, "text", digest[:2], digest + ".txt")
+
+    def get_text(self, digest):
+        """Text extracted earlier from the file with SHA-256 `digest`, or None."""
+        try:
+            with open(self.text_path(digest), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_text(self, digest, text):
+        path = self.text_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def _save_index(self):
+        tmp = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp, self._index_path)
@@ -0,0 +1,233 @@
+"""Historical announcements backfill.
+
+    python backfill.py --from 2026-01-01 --to 2026-02-08 [--out backfill.jsonl] [--xbrl]
+
+Every day in the range is scanned with the bot's matcher (TRACKED_SCRIP /
+subscribers.json) and classifier. Several days are scanned concurrently, and so are
+the pages within each day. All requests share one global rate limit. Matches are
+appended to a JSONL file as soon as their day is complete, and finished days are
+recorded in a checkpoint. Re-running the same command resumes where it stopped.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import time
+
+import bot
+from telegram_dispatcher import TokenBucket
+
+
+
+# Registered with bot, so bot.configure() in main() re-reads them from .env as well
+@bot.settings_loader
+def _load_settings():
+    global BACKFILL_RATE, BACKFILL_DAYS_IN_FLIGHT
+    try:
+        BACKFILL_RATE = float(os.getenv("BACKFILL_RATE", "5"))
+    except ValueError:
+        BACKFILL_RATE = 5.0
+    try:
+        BACKFILL_DAYS_IN_FLIGHT = int(os.getenv("BACKFILL_DAYS_IN_FLIGHT", "4"))
+    except ValueError:
+        BACKFILL_DAYS_IN_FLIGHT = 4
+
+
+# Busy days (results season) run well past the live poller's API_MAX_PAGES
+BACKFILL_MAX_PAGES = 1000
+
+
+class RateLimitedFetch:
+    """Wraps an async fetch so that all calls share one token bucket (`rate` requests/s)."""
+
+    def __init__(self, rate, burst=None, fetch=None, sleep=asyncio.sleep):
+        self.bucket = TokenBucket(rate, burst or max(1, int(rate)))
+        self.fetch = fetch or bot.async_fetch_with_retries
+        self.sleep = sleep
+        self.requests = 0
+
+    async def __call__(self, url, **kwargs):
+        while True:
+            wait = self.bucket.delay()
+            if wait <= 0:
+                break
+            await self.sleep(wait)
+        self.bucket.consume()
+        self.requests += 1
+        return await self.fetch(url, **kwargs)
+
+
+class Checkpoint:
+    """Finished days and the JSONL byte offset they were flushed up to."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        self.offset = 0
+        self.xbrl_done = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.done = data.get("done", {})
+            self.offset = int(data.get("offset", 0))
+            self.xbrl_done = bool(data.get("xbrl_done"))
+        except FileNotFoundError:
+            pass
+
+    def save(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"done": self.done, "offset": self.offset, "xbrl_done": self.xbrl_done}, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+def parse_day(value):
+    value = value.strip()
+    fmt = "%Y%m%d" if value.isdigit() else "%Y-%m-%d"
+    return datetime.datetime.strptime(value, fmt).date()
+
+
+def daterange(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += datetime.timedelta(days=1)
+
+
+def _classified(rec, source, day):
+    emoji, tag = bot.classify(rec["title"])
+    return dict(rec, emoji=emoji, tag=tag, source=source, day=day)
+
+
+async def scan_day(day, matcher, fetch, max_pages=None):
+    """Return (matching records, rows read) for one day, or None if the day could not be
+    read completely (so it is retried by the next run)."""
+    ds = day.strftime("%Y%m%d")
+    params = bot.announcement_params(ds)
+    headers = bot.api_request_headers()
+    try:
+        r = await fetch(bot.NEWAPI_DOMAIN + bot.API_ANN_ENDPOINT, headers=headers, timeout=15, max_attempts=3, params=params)
+        data = r.json()
+    except Exception as exc:
+        print(f"❌ {day}: first page failed: {exc}")
+        return None
+    total = bot._api_total_rows(data)
+    records = []
+    keys = set()
+    rows = 0
+    try:
+        async for row in bot.aiter_announcement_rows(data, params, headers, max_pages=max_pages or BACKFILL_MAX_PAGES, fetch=fetch):
+            rows += 1
+            if matcher and not matcher.match_row(row):
+                continue
+            rec = bot._api_row_to_record(row)
+            key = bot.announcement_key(rec)
+            if key in keys:
+                continue
+            keys.add(key)
+            records.append(_classified(rec, "api", day.isoformat()))
+    except Exception as exc:
+        # only a walk that ends on a short or empty page has read the whole day
+        print(f"❌ {day}: a later page failed after {rows} rows: {exc}; will retry this day on the next run")
+        return None
+    if total is not None and rows < total:
+        print(f"⚠️ {day}: read {rows} of {total} rows; will retry this day on the next run")
+        return None
+    return records, rows
+
+
+async def backfill(start, end, out, checkpoint_path=None, days_in_flight=None, rate=None,
+                   fetch=None, matcher=None, xbrl=False, fresh=False):
+    """Scan [start, end] and append matches to `out` (JSONL). Returns a summary dict."""
+    checkpoint_path = checkpoint_path or f"{out}.checkpoint.json"
+    if fresh and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    ckpt = Checkpoint(checkpoint_path)
+    # Drop anything written after the last checkpoint (a day cut short by a crash)
+    if os.path.exists(out):
+        os.truncate(out, min(ckpt.offset, os.path.getsize(out)))
+    matcher = bot.get_tracked_matcher() if matcher is None else matcher
+    limited = RateLimitedFetch(rate or BACKFILL_RATE, fetch=fetch)
+    sem = asyncio.Semaphore(max(1, days_in_flight or BACKFILL_DAYS_IN_FLIGHT))
+    days = [d for d in daterange(start, end) if d.isoformat() not in ckpt.done]
+    summary = {"days": len(days), "done": 0, "failed": [], "matches": 0, "rows": 0}
+    started = time.monotonic()
+    print(f"🔍 Backfilling {len(days)} day(s) from {start} to {end} into {out}")
+
+    async def _day(day):
+        async with sem:
+            return day, await scan_day(day, matcher, limited)
+
+    with open(out, "a", encoding="utf-8") as f:
+        for next_done in asyncio.as_completed([_day(d) for d in days]):
+            day, result = await next_done
+            if result is None:
+                summary["failed"].append(day.isoformat())
+                continue
+            records, rows = result
+            for rec in records:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            ckpt.done[day.isoformat()] = {"rows": rows, "matches": len(records)}
+            ckpt.offset = f.tell()
+            ckpt.save()
+            summary["done"] += 1
+            summary["rows"] += rows
+            summary["matches"] += len(records)
+            print(f"✅ {day}: {rows} rows, {len(records)} match(es)")
+
+        if xbrl and matcher and not ckpt.xbrl_done:
+            # CorpXbrlGen only serves each scrip's latest filing, so it is queried once per
+            # run (not per day) and kept when its date falls inside the range
+            docs = await bot.async_fetch_xbrl_for_scrips(matcher.xbrl_codes(), bot.api_request_headers(), fetch=limited)
+            for doc in docs:
+                try:
+                    day = parse_day(doc["date"][:10]) if doc else None
+                except ValueError:
+                    day = None
+                if day is None or not start <= day <= end:
+                    continue
+                f.write(json.dumps(_classified(doc, "xbrl", day.isoformat()), ensure_ascii=False) + "\n")
+                summary["matches"] += 1
+            f.flush()
+            ckpt.xbrl_done = True
+            ckpt.offset = f.tell()
+            ckpt.save()
+
+    summary["requests"] = limited.requests
+    summary["elapsed"] = round(time.monotonic() - started, 2)
+    print(f"💾 Backfill finished: {summary['done']}/{summary['days']} day(s), {summary['matches']} match(es), "
+          f"{summary['requests']} request(s) in {summary['elapsed']}s")
+    if summary["failed"]:
+        print(f"⚠️ {len(summary['failed'])} day(s) incomplete; re-run the same command to retry: {', '.join(summary['failed'])}")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill BSE announcements for a date range into JSONL.")
+    parser.add_argument("--from", dest="start", required=True, help="first day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", required=True, help="last day (YYYY-MM-DD)")
+    parser.add_argument("--out", help="output JSONL file (default: backfill_<from>_<to>.jsonl)")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <out>.checkpoint.json)")
+    parser.add_argument("--days-in-flight", type=int, help="days scanned concurrently")
+    parser.add_argument("--rate", type=float, help="requests per second across all days")
+    parser.add_argument("--xbrl", action="store_true", help="also look up each tracked scrip's latest XBRL filing")
+    parser.add_argument("--fresh", action="store_true", help="ignore an existing checkpoint and start over")
+    args = parser.parse_args(argv)
+    bot.configure()
+    start, end = parse_day(args.start), parse_day(args.end)
+    if end < start:
+        parser.error("--to must not be before --from")
+    out = args.out or f"backfill_{start}_{end}.jsonl"
+    try:
+        summary = asyncio.run(backfill(start, end, out, args.checkpoint, args.days_in_flight, args.rate,
+                                       xbrl=args.xbrl, fresh=args.fresh))
+    finally:
+        bot.close_http_session()
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
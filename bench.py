@@ -0,0 +1,536 @@
+"""Benchmark harness for the poll pipeline.
+
+    python bench.py [--iterations 20] [--rows 1500] [--latency 0.02] [--jitter 0.01]
+                    [--fail-rate 0.02] [--fixtures response_cache/] [--out bench.json]
+                    [--baseline previous.json] [--tolerance 0.25]
+
+A local HTTP server stands in for api.bseindia.com and www.bseindia.com. It serves a
+full day of AnnSubCategoryGetData pages, a large ann.html, CorpXbrlGen documents and a
+scrip master. These are generated from a fixed seed, or taken from captures recorded
+with RESPONSE_CACHE=record (`--fixtures`). Every response can be delayed
+(`--latency` plus up to `--jitter` seconds) and a share of them fail with 503
+(`--fail-rate`).
+
+Each stage runs `--iterations` times against fresh state. The JSON report gives, per
+stage, latency percentiles, requests per run by endpoint and peak Python memory
+(tracemalloc, measured in one extra untimed run). With `--baseline` the run fails
+(exit 1) when a stage's p50/p95 or request count grows by more than `--tolerance`.
+Telegram is never contacted: sends are counted instead.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import bot
+from response_cache import ResponseCache
+
+REPORT_VERSION = 1
+PERCENTILES = (50, 90, 95, 99)
+
+_TITLES = (
+    "Board Meeting Intimation for Financial Results for the quarter ended {q}",
+    "Outcome of Board Meeting held on {d}",
+    "Order received from {c} worth Rs. {n} Crore",
+    "Resignation of Independent Director",
+    "Closure of Trading Window",
+    "Credit Rating reaffirmed by {c}",
+    "Acquisition of {c}",
+    "Allotment of Equity Shares under ESOP",
+    "Compliances-Certificate under Reg. 74 (5) of SEBI (DP) Regulations, 2018",
+    "Announcement under Regulation 30 (LODR)-Newspaper Publication",
+    "Scheme of Amalgamation and Demerger - Update",
+    "Investor Presentation",
+    "Intimation of Record Date for Dividend",
+    "Change in Management",
+)
+_COMPANIES = ("Alpha Infra", "Bharat Gears", "Coastal Power", "Deccan Foods", "Eastern Rail",
+              "Futura Chem", "Ganga Steel", "Himalaya Pharma", "Indus Cables", "Jupiter Wagons")
+
+
+def percentile(values, q):
+    """Linear-interpolated q-th percentile of a non-empty list."""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    pos = (len(ordered) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def summarize(samples):
+    """min/mean/max and PERCENTILES of `samples` (seconds), in milliseconds."""
+    if not samples:
+        return {}
+    ms = [s * 1000.0 for s in samples]
+    out = {"min": min(ms), "mean": sum(ms) / len(ms), "max": max(ms)}
+    out.update({f"p{q}": percentile(ms, q) for q in PERCENTILES})
+    return {k: round(v, 3) for k, v in out.items()}
+
+
+class SyntheticFixtures:
+    """Deterministic stand-ins for the BSE responses the bot reads.
+
+    `rows` announcements for today, of which about `hit_rate` belong to the tracked
+    symbols (mapped to codes 540000+ through the served scrip master). Half the rows link
+    a PDF, the rest a quote page, so matched rows also exercise the XBRL lookup.
+    """
+
+    def __init__(self, symbols, rows=1500, html_rows=2000, hit_rate=0.02, xbrl_kb=32, seed=1):
+        rnd = random.Random(seed)
+        self.symbols = [s for s in symbols if not s.isdigit()] or ["ALPHA"]
+        self.codes = {sym: 540000 + i for i, sym in enumerate(self.symbols)}
+        today = time.strftime("%Y-%m-%d")
+        self.rows = []
+        for i in range(rows):
+            if rnd.random() < hit_rate:
+                sym = rnd.choice(self.symbols)
+                code, name = self.codes[sym], f"{sym} Ltd"
+            else:
+                code, name = 500000 + rnd.randrange(40000), f"{rnd.choice(_COMPANIES)} Ltd"
+            title = rnd.choice(_TITLES).format(q="31-12-2025", d=today, c=rnd.choice(_COMPANIES), n=rnd.randrange(5, 900))
+            secs = max(0, 17 * 3600 - i * 20)
+            link = (f"https://www.bseindia.com/xml-data/corpfiling/AttachLive/{rnd.getrandbits(64):016x}.pdf"
+                    if i % 2 else f"https://www.bseindia.com/stock-share-price/x/y/{code}/")
+            self.rows.append({
+                "NEWSID": f"{rnd.getrandbits(64):016x}",
+                "SCRIP_CD": code,
+                "SLONGNAME": name,
+                "NEWSSUB": f"{name} - {code} - {title}",
+                "HEADLINE": title,
+                "NEWS_DT": f"{today}T{secs // 3600:02d}:{secs // 60 % 60:02d}:{secs % 60:02d}",
+                "NSURL": link,
+                "CATEGORYNAME": "Company Update",
+            })
+        self.titles = [r["NEWSSUB"] for r in self.rows]
+        self.html = self._html(rnd, html_rows)
+        self._xbrl_pad = "<!-- " + "x" * max(0, xbrl_kb * 1024 - 600) + " -->"
+
+    def _html(self, rnd, n):
+        day = time.strftime("%d-%m-%Y")
+        parts = ["<html><head><title>Corporate Announcements</title></head><body>",
+                 "<table><tr><th>Company</th><th>Code</th><th>Subject</th><th>Attachment</th></tr>"]
+        for i, row in enumerate(self.rows[:n] or [{}]):
+            parts.append(
+                f"<tr><td>{row.get('SLONGNAME', '')}</td><td>{row.get('SCRIP_CD', '')}</td>"
+                f"<td>{row.get('HEADLINE', '')}</td><td><a href=\"{row.get('NSURL', '')}\">view</a></td></tr>"
+                f"<tr><td colspan=\"4\">Exchange Received Time {day} 10:{i % 60:02d}:00</td></tr>"
+            )
+        parts.append("</table><div class=\"footer\">" + "&nbsp;" * 2000 + "</div></body></html>")
+        return "".join(parts)
+
+    def xbrl(self, code):
+        title = next((r["HEADLINE"] for r in self.rows if str(r["SCRIP_CD"]) == str(code)), "Investor Presentation")
+        return (
+            '<?xml version="1.0"?><xbrli:xbrl xmlns:in-bse-co="x">'
+            f'<xbrli:context id="c1"><xbrli:period><xbrli:instant>{time.strftime("%Y-%m-%d")}</xbrli:instant></xbrli:period></xbrli:context>'
+            f'{self._xbrl_pad}'
+            f'<in-bse-co:ScripCode contextRef="c1">{code}</in-bse-co:ScripCode>'
+            f'<in-bse-co:SubjectOfAnnouncement contextRef="c1">{title}</in-bse-co:SubjectOfAnnouncement>'
+            f'<in-bse-co:AttachmentURL contextRef="c1">https://www.bseindia.com/xml-data/corpfiling/AttachLive/{code}.pdf</in-bse-co:AttachmentURL>'
+            '</xbrli:xbrl>'
+        )
+
+    def api_page(self, rows, params):
+        """One AnnSubCategoryGetData page of `rows`, honouring strScrip."""
+        if params.get("strScrip"):
+            rows = [r for r in rows if str(r.get("SCRIP_CD")) == str(params["strScrip"])]
+        size = bot.API_PAGE_SIZE
+        page = int(params.get("pageno") or 1)
+        data = {"Table": rows[(page - 1) * size: page * size], "Table1": [{"ROWCNT": len(rows)}]}
+        return 200, "application/json", json.dumps(data).encode("utf-8")
+
+    def respond(self, endpoint, params):
+        """Return (status, content type, body bytes) for one request."""
+        if endpoint == "api":
+            return self.api_page(self.rows, params)
+        if endpoint == "scrip_master":
+            data = {"Table": [{"SCRIP_CD": code, "scrip_id": sym, "Scrip_Name": f"{sym} Ltd"} for sym, code in self.codes.items()]}
+            return 200, "application/json", json.dumps(data).encode("utf-8")
+        if endpoint == "html":
+            return 200, "text/html; charset=utf-8", self.html.encode("utf-8")
+        if endpoint == "xbrl":
+            return 200, "text/xml; charset=utf-8", self.xbrl(params.get("Scripcode", "")).encode("utf-8")
+        return 404, "text/plain", b"not found"
+
+
+class RecordedFixtures(SyntheticFixtures):
+    """Serves captures from a RESPONSE_CACHE store, falling back to synthetic responses.
+
+    API pages come from the most recently captured day whatever date the bot asks for,
+    so a capture from any trading day can be replayed today.
+    """
+
+    def __init__(self, cache_dir, symbols, **kwargs):
+        super().__init__(symbols, **kwargs)
+        cache = ResponseCache(cache_dir)
+        self.pages, self.xbrl_docs, self.html_page = {}, {}, None
+        day = None
+        titles = []
+        for resp in cache.iter_captures():
+            if bot.API_ANN_ENDPOINT in resp.url:
+                captured_day = resp.params.get("strPrevDate")
+                if captured_day != day:
+                    day, self.pages, titles = captured_day, {}, []
+                self.pages[str(resp.params.get("pageno", 1))] = resp
+                try:
+                    titles.extend(r.get("NEWSSUB") or "" for r in (resp.json() or {}).get("Table") or [])
+                except Exception:
+                    pass
+            elif "CorpXbrlGen" in resp.url:
+                self.xbrl_docs[str(resp.params.get("Scripcode"))] = resp
+            elif "ann.html" in resp.url:
+                self.html_page = resp
+        cache.close()
+        if titles:
+            self.titles = titles
+        if self.html_page is not None:
+            self.html = self.html_page.text
+
+    def respond(self, endpoint, params):
+        resp = None
+        if endpoint == "api" and params.get("strScrip") and self.pages:
+            # captures are whole-exchange pages: serve a per-scrip query from their rows
+            rows = []
+            for _, page in sorted(self.pages.items(), key=lambda item: int(item[0])):
+                try:
+                    rows.extend((page.json() or {}).get("Table") or [])
+                except Exception:
+                    pass
+            return self.api_page(rows, params)
+        if endpoint == "api":
+            resp = self.pages.get(str(params.get("pageno") or 1))
+        elif endpoint == "xbrl":
+            resp = self.xbrl_docs.get(str(params.get("Scripcode")))
+        elif endpoint == "html":
+            resp = self.html_page
+        if resp is None:
+            return super().respond(endpoint, params)
+        return resp.status_code, resp.headers.get("Content-Type", "application/octet-stream"), resp.content
+
+
+def _endpoint(path):
+    if path.endswith("/" + bot.API_ANN_ENDPOINT):
+        return "api"
+    if path.endswith("/" + bot.SCRIP_MASTER_ENDPOINT):
+        return "scrip_master"
+    if path.endswith("/ann.html"):
+        return "html"
+    if path.endswith("/CorpXbrlGen.aspx"):
+        return "xbrl"
+    return "other"
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Local HTTP server answering bot requests from `fixtures` with injected latency/failures.
+
+    `api_blocked` makes the JSON API answer with an HTML page, as BSE does when it
+    rejects a client, which sends the bot down the ann.html fallback.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, fixtures, latency=0.0, jitter=0.0, fail_rate=0.0, seed=1):
+        super().__init__(("127.0.0.1", 0), _FixtureHandler)
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.api_blocked = False
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {}
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def draw(self):
+        """Return (delay seconds, fail?) for the next response."""
+        with self._lock:
+            delay = self.latency + (self._rnd.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+            return delay, self._rnd.random() < self.fail_rate
+
+    def count(self, endpoint):
+        with self._lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+
+    def take_counts(self):
+        with self._lock:
+            counts, self.counts = self.counts, {}
+        return counts
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="bench-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        endpoint = _endpoint(parts.path)
+        server.count(endpoint)
+        delay, fail = server.draw()
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            status, ctype, body = 503, "text/plain", b"injected failure"
+        elif endpoint == "api" and server.api_blocked:
+            status, ctype, body = 200, "text/html", b"<html><body>Access denied</body></html>"
+        else:
+            status, ctype, body = server.fixtures.respond(endpoint, dict(parse_qsl(parts.query)))
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def patched_bot(server, workdir):
+    """Point the bot's endpoints at `server`, keep its state under `workdir` and count
+    Telegram sends instead of making them. Everything is restored on exit."""
+    names = ("NEWAPI_DOMAIN", "BSE_URL", "XBRL_URL", "STATE_FILE", "SCRIP_MASTER_FILE", "SUBSCRIBERS_FILE",
+             "RESPONSE_CACHE_MODE", "send_telegram", "async_telegram_post", "FORCE_SEND")
+    saved = {name: getattr(bot, name) for name in names}
+    saved_env = {k: os.environ.get(k) for k in ("NO_PROXY", "no_proxy")}
+    sent = []
+
+    def fake_send(msg, chat_id=None):
+        sent.append((chat_id, msg))
+
+    async def fake_post(chat_id, text):
+        sent.append((chat_id, text))
+        return 200, None
+
+    bot.close_http_session()
+    bot.NEWAPI_DOMAIN = f"{server.url}/BseIndiaAPI/api/"
+    bot.BSE_URL = f"{server.url}/corporates/ann.html"
+    bot.XBRL_URL = f"{server.url}/Msource/90D/CorpXbrlGen.aspx"
+    bot.STATE_FILE = os.path.join(workdir, "last_seen.json")
+    bot.SCRIP_MASTER_FILE = os.path.join(workdir, "scrip_master.json")
+    bot.SUBSCRIBERS_FILE = os.path.join(workdir, "subscribers.json")
+    bot.RESPONSE_CACHE_MODE = "off"
+    bot.FORCE_SEND = False
+    bot.send_telegram = fake_send
+    bot.async_telegram_post = fake_post
+    for key in saved_env:
+        os.environ[key] = ",".join(p for p in (saved_env[key], "127.0.0.1") if p)
+    try:
+        yield sent
+    finally:
+        bot.close_http_session()
+        for name, value in saved.items():
+            setattr(bot, name, value)
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def _fresh_state(root, n):
+    """Give the next iteration empty poll state (seen-index, last_seen, XBRL cache)."""
+    state_dir = os.path.join(root, f"run{n:04d}")
+    os.makedirs(state_dir, exist_ok=True)
+    bot.STATE_FILE = os.path.join(state_dir, "last_seen.json")
+    bot.XBRL_CACHE.clear()
+
+
+def _stages(server, fixtures):
+    """(name, setup, run) for every benchmarked stage."""
+    def api_up():
+        server.api_blocked = False
+
+    def api_blocked():
+        server.api_blocked = True
+
+    def classify_all():
+        for title in fixtures.titles:
+            bot.classify(title)
+
+    return [
+        ("classify", None, classify_all),
+        ("parse_html_announcement", None, lambda: bot.parse_html_announcement(fixtures.html)),
+        ("get_latest_announcement_from_api", api_up, bot.get_latest_announcement_from_api),
+        ("check_bse", api_up, bot.check_bse),
+        ("check_bse_html_fallback", api_blocked, bot.check_bse),
+    ]
+
+
+def run_benchmarks(fixtures, iterations=20, latency=0.0, jitter=0.0, fail_rate=0.0, seed=1,
+                   stages=None, quiet=True):
+    """Run every stage `iterations` times and return the report dict."""
+    server = FixtureServer(fixtures, latency=latency, jitter=jitter, fail_rate=fail_rate, seed=seed).start()
+    report = {
+        "version": REPORT_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {"iterations": iterations, "rows": len(fixtures.rows), "latency": latency, "jitter": jitter,
+                   "fail_rate": fail_rate, "seed": seed, "fixtures": type(fixtures).__name__,
+                   "api_page_size": bot.API_PAGE_SIZE, "api_query_plan": bot.API_QUERY_PLAN},
+        "stages": {},
+    }
+    sink = io.StringIO() if quiet else sys.stdout
+    run_ids = itertools.count()
+    try:
+        with tempfile.TemporaryDirectory(prefix="bsebench-") as workdir, patched_bot(server, workdir) as sent:
+            for name, setup, run in _stages(server, fixtures):
+                if stages and name not in stages:
+                    continue
+                samples, requests_per_run, errors = [], [], 0
+                by_endpoint = {}
+                sends = 0
+                for n in range(iterations + 1):
+                    _fresh_state(workdir, next(run_ids))
+                    if setup:
+                        setup()
+                    server.take_counts()
+                    sent.clear()
+                    # The first pass is an untimed warm-up that also measures peak memory
+                    measure_memory = n == 0
+                    if measure_memory:
+                        tracemalloc.start()
+                    started = time.perf_counter()
+                    try:
+                        with contextlib.redirect_stdout(sink):
+                            run()
+                    except Exception as exc:
+                        errors += 1
+                        print(f"⚠️ {name}: {exc}", file=sys.stderr)
+                    elapsed = time.perf_counter() - started
+                    if measure_memory:
+                        peak = tracemalloc.get_traced_memory()[1]
+                        tracemalloc.stop()
+                    counts = server.take_counts()
+                    if quiet:
+                        sink.seek(0)
+                        sink.truncate()
+                    if measure_memory:
+                        continue
+                    samples.append(elapsed)
+                    requests_per_run.append(sum(counts.values()))
+                    for endpoint, c in counts.items():
+                        by_endpoint[endpoint] = by_endpoint.get(endpoint, 0) + c
+                    sends += len(sent)
+                report["stages"][name] = {
+                    "iterations": len(samples),
+                    "errors": errors,
+                    "latency_ms": summarize(samples),
+                    "requests": {
+                        "mean": round(sum(requests_per_run) / max(len(requests_per_run), 1), 2),
+                        "max": max(requests_per_run or [0]),
+                        "by_endpoint": {k: round(v / max(len(samples), 1), 2) for k, v in sorted(by_endpoint.items())},
+                    },
+                    "telegram_sends": round(sends / max(len(samples), 1), 2),
+                    "peak_kb": round(peak / 1024, 1),
+                }
+    finally:
+        server.stop()
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report["max_rss_kb"] = rss // 1024 if sys.platform == "darwin" else rss
+    return report
+
+
+def compare(report, baseline, tolerance=0.25):
+    """Return human-readable regressions of `report` against `baseline`.
+
+    A stage regresses when its p50 or p95 latency, or its mean requests per run, is more
+    than `tolerance` (a fraction) above the baseline's.
+    """
+    regressions = []
+    for name, stage in report.get("stages", {}).items():
+        old = baseline.get("stages", {}).get(name)
+        if not old:
+            continue
+        checks = [(f"latency {q}", stage["latency_ms"].get(q), old.get("latency_ms", {}).get(q)) for q in ("p50", "p95")]
+        checks.append(("requests/run", stage["requests"]["mean"], old.get("requests", {}).get("mean")))
+        for label, new_value, old_value in checks:
+            if new_value is None or not old_value:
+                continue
+            if new_value > old_value * (1 + tolerance):
+                regressions.append(f"{name}: {label} {old_value} -> {new_value} (+{(new_value / old_value - 1) * 100:.0f}%)")
+    return regressions
+
+
+def format_report(report):
+    lines = [f"{'stage':<34} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/run':>8} {'peak KiB':>9} {'errors':>6}"]
+    for name, stage in report["stages"].items():
+        lat = stage["latency_ms"]
+        lines.append(f"{name:<34} {lat.get('p50', 0):>9.2f} {lat.get('p95', 0):>9.2f} {lat.get('p99', 0):>9.2f} "
+                     f"{stage['requests']['mean']:>8} {stage['peak_kb']:>9} {stage['errors']:>6}")
+    lines.append(f"max RSS: {report['max_rss_kb']} KiB")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the BSE poll pipeline against a local stand-in server.")
+    parser.add_argument("--iterations", type=int, default=20, help="timed runs per stage (default 20)")
+    parser.add_argument("--rows", type=int, default=1500, help="announcement rows in the synthetic day (default 1500)")
+    parser.add_argument("--html-rows", type=int, default=2000, help="rows in the synthetic ann.html (default 2000)")
+    parser.add_argument("--xbrl-kb", type=int, default=32, help="size of each synthetic XBRL document (default 32)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds per response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of responses that fail with 503")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--fixtures", help="RESPONSE_CACHE directory to serve recorded responses from")
+    parser.add_argument("--stage", action="append", dest="stages", help="only run this stage (repeatable)")
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs the baseline (default 0.25)")
+    parser.add_argument("--verbose", action="store_true", help="show the bot's own logging")
+    args = parser.parse_args(argv)
+    bot.configure()
+
+    symbols = bot.TRACKED_SCRIP_LIST or ["ALPHA"]
+    kwargs = dict(rows=args.rows, html_rows=args.html_rows, xbrl_kb=args.xbrl_kb, seed=args.seed)
+    fixtures = RecordedFixtures(args.fixtures, symbols, **kwargs) if args.fixtures else SyntheticFixtures(symbols, **kwargs)
+    report = run_benchmarks(fixtures, args.iterations, args.latency, args.jitter, args.fail_rate, args.seed,
+                            stages=args.stages, quiet=not args.verbose)
+    print(format_report(report), file=sys.stderr)
+    status = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+        for line in regressions:
+            print(f"❌ Regression: {line}", file=sys.stderr)
+        status = 1 if regressions else 0
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,47 +1,78 @@
-import requests
 import json
 import os
 import time
 import re
-from requests.exceptions import RequestException
-from bs4 import BeautifulSoup
+import socket
+import hashlib
+import asyncio
+import functools
+import datetime
+import random
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import config
+from metrics import Metrics
+from retry_policy import CircuitBreakers, CircuitOpenError, DeadlineExceeded, full_jitter_delay, parse_retry_after
+from scrip_resolver import ScripResolver, master_rows
+from telegram_dispatcher import TelegramDispatcher
+from xbrl import XbrlCache
+
+# Importing bot has no side effects: it reads settings from os.environ but never loads
+# .env and prints nothing. Heavy modules load on the code paths that need them:
+# requests/urllib3 on the first HTTP call, sqlite3 with the seen-index or response cache,
+# html.parser on the ann.html fallback. Entry points apply .env explicitly: `python bot.py`
+# right here, before any setting is read, and other tools through configure().
+if __name__ == "__main__":
+    config.load_dotenv()
+
 
-# Load variables from .env and override environment variables (sandbox/testing mode)
 def load_dotenv_override(dotenv_path=".env"):
-    try:
-        with open(dotenv_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-                if "=" not in line:
-                    continue
-                key, val = line.split("=", 1)
-                key = key.strip()
-                val = val.strip().strip('"').strip("'")
-                os.environ[key] = val
-        print(f"ℹ️ Loaded environment variables from {dotenv_path}")
-    except FileNotFoundError:
-        pass
+    """Load `dotenv_path` into os.environ, overriding existing values (always re-read)."""
+    config.load_dotenv(dotenv_path, force=True)
+
 
-# Force-load .env values and override any existing environment variables (permanent for sandbox/testing)
-load_dotenv_override()
+# Settings are read from os.environ by one loader per section of this module, registered
+# with @settings_loader, which runs each at import. configure() re-runs them after
+# applying .env, so only the settings change: caches, pools, METRICS and anything other
+# modules imported from bot stay the same objects.
+_SETTINGS_LOADERS = []
 
-BOT_TOKEN = os.getenv("BOT_TOKEN")
-CHAT_ID_STR = os.getenv("CHAT_ID")
-try:
-    CHAT_ID = int(CHAT_ID_STR) if CHAT_ID_STR else None
-except ValueError:
-    # If CHAT_ID isn't an int for some reason, keep the raw string
-    CHAT_ID = CHAT_ID_STR
 
-FORCE_SEND = os.getenv("FORCE_SEND", "0").lower() in ("1", "true", "yes")
+def settings_loader(fn):
+    """Register `fn` (reads settings from os.environ into module globals) and run it now."""
+    _SETTINGS_LOADERS.append(fn)
+    fn()
+    return fn
+
+
+def configure(dotenv_path=".env"):
+    """Apply `dotenv_path` (cached; see config.load_dotenv) and, if it changed the
+    environment, re-run every settings loader. For tools that import bot."""
+    if config.load_dotenv(dotenv_path):
+        for load in _SETTINGS_LOADERS:
+            load()
+
 
 # In-memory secrets storage (useful for tests/sandbox)
-SECRETS = {
-    "BOT_TOKEN": BOT_TOKEN,
-    "CHAT_ID": str(CHAT_ID) if CHAT_ID is not None else None,
-}
+SECRETS = {}
+
+
+@settings_loader
+def _load_secret_settings():
+    global BOT_TOKEN, CHAT_ID_STR, CHAT_ID, FORCE_SEND
+    BOT_TOKEN = os.getenv("BOT_TOKEN")
+    CHAT_ID_STR = os.getenv("CHAT_ID")
+    try:
+        CHAT_ID = int(CHAT_ID_STR) if CHAT_ID_STR else None
+    except ValueError:
+        # If CHAT_ID isn't an int for some reason, keep the raw string
+        CHAT_ID = CHAT_ID_STR
+    FORCE_SEND = os.getenv("FORCE_SEND", "0").lower() in ("1", "true", "yes")
+    SECRETS.update({"BOT_TOKEN": BOT_TOKEN, "CHAT_ID": str(CHAT_ID) if CHAT_ID is not None else None})
 
 
 def set_secrets(bot_token=None, chat_id=None):
@@ -70,6 +101,7 @@ def reload_secrets_from_dotenv(dotenv_path=".env"):
     load_dotenv_override(dotenv_path)
     set_secrets(os.getenv("BOT_TOKEN"), os.getenv("CHAT_ID"))
 
+
 STATE_FILE = "last_seen.json"
 BSE_URL = "https://www.bseindia.com/corporates/ann.html"
 
@@ -83,11 +115,16 @@ API_ANN_ENDPOINT = "AnnSubCategoryGetData/w"
 # Default list requested by user
 # Example: TRACKED_SCRIP="539594,VPRPL,OLECTRA,TITAGARH,ASTRAL,AGI,JIOFIN,BLS"
 _default_tracked = "539594,VPRPL,OLECTRA,TITAGARH,ASTRAL,AGI,JIOFIN,BLS,CDSL,UNOMINDA,HSCL,MAZDOCK,COCHINSHIP,TDPOWERSYS,PIXTRANS,ASTRAMICRO,CAMS,IOC,AIAENG,TRITRUBINE,AWHCL,SONACOMS,ZAGGLE,OFSS,IRFC,SAMMANCAP"
-_env_tracked = os.getenv("TRACKED_SCRIP")
-# Treat empty string as "not set" so an empty env var does NOT override the default list
-TRACKED_SCRIP = _env_tracked if _env_tracked is not None and _env_tracked.strip() else _default_tracked
-# Normalize to a list of uppercase symbols (ignore empty entries)
-TRACKED_SCRIP_LIST = [s.strip().upper() for s in TRACKED_SCRIP.split(",") if s.strip()]
+
+
+@settings_loader
+def _load_tracked_settings():
+    global _env_tracked, TRACKED_SCRIP, TRACKED_SCRIP_LIST
+    _env_tracked = os.getenv("TRACKED_SCRIP")
+    # Treat empty string as "not set" so an empty env var does NOT override the default list
+    TRACKED_SCRIP = _env_tracked if _env_tracked is not None and _env_tracked.strip() else _default_tracked
+    # Normalize to a list of uppercase symbols (ignore empty entries)
+    TRACKED_SCRIP_LIST = [s.strip().upper() for s in TRACKED_SCRIP.split(",") if s.strip()]
 
 
 def get_tracked_display():
@@ -97,6 +134,307 @@ def get_tracked_display():
     return ", ".join(TRACKED_SCRIP_LIST) if TRACKED_SCRIP_LIST else TRACKED_SCRIP
 
 
+# Instrumentation: spans around fetch, parse, match, classify, state I/O and send, and
+# counters for retries, cache hits, matches and suppressed no-hits. Enabled by METRICS=1,
+# or implicitly by either output below; when disabled every hook is a no-op.
+# METRICS_FILE is rewritten after every poll: Prometheus text format when the name ends in
+# .prom (e.g. for node_exporter's textfile collector), JSON otherwise.
+# METRICS_LOG=json also writes one JSON line per finished span to stderr.
+METRICS = Metrics()
+
+
+@settings_loader
+def _load_metrics_settings():
+    global METRICS_FILE, METRICS_LOG
+    METRICS_FILE = os.getenv("METRICS_FILE")
+    METRICS_LOG = os.getenv("METRICS_LOG", "").strip().lower()
+    METRICS.enabled = os.getenv("METRICS", "0").strip().lower() in ("1", "true", "yes") or bool(METRICS_FILE) or METRICS_LOG == "json"
+    METRICS.log_stream = sys.stderr if METRICS_LOG == "json" else None
+
+
+def _endpoint_label(url):
+    """Short metrics label for the service behind `url`."""
+    for label, marker in (("api", API_ANN_ENDPOINT), ("scrip_master", "ListofScripData"), ("xbrl", "CorpXbrlGen"),
+                          ("ann_html", "ann.html"), ("telegram", "api.telegram.org")):
+        if marker in url:
+            return label
+    return "other"
+
+
+def write_metrics(path=None):
+    """Write METRICS to `path` (default METRICS_FILE); a no-op when disabled or unset."""
+    path = path or METRICS_FILE
+    if not METRICS.enabled or not path:
+        return
+    try:
+        METRICS.write(path)
+    except Exception as exc:
+        print(f"⚠️ Failed to write metrics to {path}: {exc}")
+
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class TrackedMatcher:
+    """Precomputed index of tracked symbols for matching announcement rows.
+
+    `symbols` is a frozenset of normalized (uppercase) tracked names and `codes` maps
+    BSE scrip codes to the tuple of tracked entries naming them (numeric entries directly,
+    symbols through the optional ScripResolver), so "539594" and "VPRPL" on one watchlist
+    stand for the same company. A row matches when its SCRIP_CD
+    is a tracked code, or when any word token of its scrip/company field or title is a
+    tracked name: one tokenization per row and a set intersection, independent of the
+    size of the watchlist.
+    """
+
+    def __init__(self, symbols, resolver=None):
+        self.source = tuple(symbols)
+        ordered = [s.strip().upper() for s in symbols if s and s.strip()]
+        self.symbols = frozenset(ordered)
+        self.codes = {}
+        self.unresolved = []
+        self._code_of = {}
+        for s in dict.fromkeys(ordered):
+            code = int(s) if s.isdigit() else (resolver.code_for(s) if resolver is not None else None)
+            if code is None:
+                self.unresolved.append(s)
+            else:
+                self.codes[code] = self.codes.get(code, ()) + (s,)
+                self._code_of[s] = code
+
+    def xbrl_codes(self):
+        """Numeric scrip codes (as strings, watchlist order) usable as XBRL `Scripcode`."""
+        return [str(code) for code in self.codes]
+
+    def __bool__(self):
+        return bool(self.symbols)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def tokens(self, *texts):
+        return set(_WORD_RE.findall(" ".join(t for t in texts if t).upper()))
+
+    def matched_symbols(self, scrip, title=""):
+        """Return the tracked entries found in `scrip` / `title` (empty set if none).
+
+        Entries are matched through their scrip code: a record whose scrip is 539594, or
+        that names VPRPL, matches every tracked entry for that company ("539594" and
+        "VPRPL" alike)."""
+        tokens = self.tokens(str(scrip or ""), title)
+        found = set(self.symbols.intersection(tokens))
+        if self.codes:
+            codes = {self._code_of[s] for s in found if s in self._code_of}
+            codes.update(int(t) for t in tokens if t.isdigit() and int(t) in self.codes)
+            for code in codes:
+                found.update(self.codes[code])
+        return found
+
+    def matches(self, scrip, title=""):
+        tokens = self.tokens(str(scrip or ""), title)
+        if not self.symbols.isdisjoint(tokens):
+            return True
+        return bool(self.codes) and any(t.isdigit() and int(t) in self.codes for t in tokens)
+
+    def match_row(self, row):
+        """Match a raw API row (SCRIP_CD / SLONGNAME / NEWSSUB / HEADLINE)."""
+        code = row.get("SCRIP_CD")
+        if code is not None and self.codes:
+            try:
+                if int(code) in self.codes:
+                    return True
+            except (TypeError, ValueError):
+                pass
+        scrip_val = str(row.get("SCRIP_CD") or row.get("SLONGNAME") or "").strip()
+        title_val = (row.get("NEWSSUB") or row.get("HEADLINE") or "").strip()
+        return self.matches(scrip_val, title_val)
+
+    def match_record(self, rec):
+        """Match a {scrip, title, ...} record as produced by the bot."""
+        return self.matches(rec.get("scrip"), rec.get("title"))
+
+
+# Scrip master (symbol <-> BSE code <-> company name), cached on disk in SCRIP_MASTER_FILE
+# (default: scrip_master.json next to the state file). It can be seeded from BSE's bulk
+# ListofScrips file (`python scrip_resolver.py ListofScrips.csv`) and is refreshed lazily
+# from the ListofScripData API once it is older than SCRIP_MASTER_TTL_DAYS (default 7).
+@settings_loader
+def _load_scrip_master_settings():
+    global SCRIP_MASTER_FILE, SCRIP_MASTER_TTL_DAYS
+    SCRIP_MASTER_FILE = os.getenv("SCRIP_MASTER_FILE")
+    try:
+        SCRIP_MASTER_TTL_DAYS = float(os.getenv("SCRIP_MASTER_TTL_DAYS", "7"))
+    except ValueError:
+        SCRIP_MASTER_TTL_DAYS = 7.0
+
+
+SCRIP_MASTER_ENDPOINT = "ListofScripData/w"
+# Don't retry a failed refresh more often than this (seconds)
+SCRIP_MASTER_RETRY_AFTER = 3600
+
+_SCRIP_RESOLVERS = {}
+_SCRIP_MASTER_LAST_ATTEMPT = {}
+_SUBSCRIBER_INDEX = None
+
+
+def _scrip_master_path():
+    if SCRIP_MASTER_FILE:
+        return SCRIP_MASTER_FILE
+    return os.path.join(os.path.dirname(os.path.abspath(STATE_FILE)), "scrip_master.json")
+
+
+def get_scrip_resolver():
+    """Return the ScripResolver backed by the scrip master cache (loaded on first use)."""
+    path = _scrip_master_path()
+    resolver = _SCRIP_RESOLVERS.get(path)
+    if resolver is None:
+        resolver = ScripResolver(path, ttl_seconds=SCRIP_MASTER_TTL_DAYS * 86400)
+        _SCRIP_RESOLVERS[path] = resolver
+    return resolver
+
+
+async def async_refresh_scrip_master(fetch=None, api_headers=None):
+    """Refresh the scrip master from the BSE API when the cache is missing or stale.
+
+    Returns True when new data was loaded. Failures are remembered so a broken
+    endpoint is retried at most every SCRIP_MASTER_RETRY_AFTER seconds.
+    """
+    resolver = get_scrip_resolver()
+    now = time.time()
+    if not resolver.is_stale(now):
+        return False
+    if now - _SCRIP_MASTER_LAST_ATTEMPT.get(resolver.cache_path, 0) < SCRIP_MASTER_RETRY_AFTER:
+        return False
+    _SCRIP_MASTER_LAST_ATTEMPT[resolver.cache_path] = now
+    fetch = fetch or async_fetch_with_retries
+    params = {"Group": "", "Scripcode": "", "industry": "", "segment": "Equity", "status": "Active"}
+    try:
+        r = await fetch(NEWAPI_DOMAIN + SCRIP_MASTER_ENDPOINT, headers=api_headers or HEADERS, timeout=20, max_attempts=1, params=params)
+        data = r.json()
+        rows = data.get("Table", []) if isinstance(data, dict) else data
+        count = resolver.load_rows(master_rows(rows))
+    except Exception as exc:
+        print(f"⚠️ Scrip master refresh failed: {exc}")
+        return False
+    if not count:
+        print("⚠️ Scrip master refresh returned no scrips; keeping cached mapping")
+        return False
+    resolver.save()
+    print(f"💾 Refreshed scrip master: {count} scrips")
+    return True
+
+
+# Subscribers: each chat gets its own watchlist and minimum severity. They are read from
+# SUBSCRIBERS_FILE (default: subscribers.json next to the state file), e.g.
+#   {"subscribers": [{"name": "desk-a", "chat_id": -1001, "symbols": ["VPRPL", "539594"],
+#                     "min_severity": "IMPORTANT"}]}
+# Without that file, CHAT_ID with TRACKED_SCRIP_LIST is the only subscriber.
+@settings_loader
+def _load_subscriber_settings():
+    global SUBSCRIBERS_FILE
+    SUBSCRIBERS_FILE = os.getenv("SUBSCRIBERS_FILE")
+
+
+SEVERITY_LEVELS = {"INFO": 0, "IMPORTANT": 1, "CRITICAL": 2}
+# classify() emoji -> severity (combination rules are reported as critical)
+_SEVERITY_BY_EMOJI = {"ℹ️": "INFO", "⚠️": "IMPORTANT", "🚨": "CRITICAL"}
+
+
+class SubscriberIndex:
+    """Routes announcements to subscribers through an inverted symbol -> subscribers index.
+
+    `matcher` is a TrackedMatcher over the union of all watchlists, so the poll fetches
+    and matches each row once however many subscribers there are. `route()` then looks up
+    the matched symbols in `by_symbol` and keeps the subscribers whose minimum severity
+    the announcement reaches.
+    """
+
+    def __init__(self, subscribers, resolver=None):
+        self.subscribers = []
+        self.by_symbol = {}
+        for sub in subscribers:
+            symbols = sub.get("symbols") or []
+            if isinstance(symbols, str):
+                symbols = symbols.split(",")
+            symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+            severity = str(sub.get("min_severity") or "INFO").strip().upper()
+            entry = {
+                "name": sub.get("name") or str(sub.get("chat_id")),
+                "chat_id": sub.get("chat_id"),
+                "symbols": symbols,
+                "min_severity": SEVERITY_LEVELS.get(severity, 0),
+            }
+            pos = len(self.subscribers)
+            self.subscribers.append(entry)
+            for sym in symbols:
+                self.by_symbol.setdefault(sym, []).append(pos)
+        self.symbols = list(self.by_symbol)
+        self.matcher = TrackedMatcher(self.symbols, resolver=resolver)
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    def route(self, rec, severity="INFO"):
+        """Return the subscriber entries that should receive `rec` at `severity`, in
+        subscriber order."""
+        level = SEVERITY_LEVELS.get(severity, 0)
+        hits = set()
+        for sym in self.matcher.matched_symbols(rec.get("scrip"), rec.get("title")):
+            hits.update(self.by_symbol.get(sym, ()))
+        return [self.subscribers[i] for i in sorted(hits) if self.subscribers[i]["min_severity"] <= level]
+
+
+def _subscribers_path():
+    if SUBSCRIBERS_FILE:
+        return SUBSCRIBERS_FILE
+    return os.path.join(os.path.dirname(os.path.abspath(STATE_FILE)), "subscribers.json")
+
+
+def load_subscribers(path=None):
+    """Read subscriber entries from `path` (a list, or {"subscribers": [...]}); [] if absent."""
+    path = path or _subscribers_path()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return []
+    except Exception as exc:
+        print(f"⚠️ Could not read subscribers from {path}: {exc}")
+        return []
+    subs = data.get("subscribers", []) if isinstance(data, dict) else data
+    return [sub for sub in subs if isinstance(sub, dict)]
+
+
+def _subscribers_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def get_subscriber_index():
+    """Return the SubscriberIndex for the subscribers file, or for CHAT_ID/TRACKED_SCRIP_LIST
+    when there is none (rebuilt when either, or the scrip master, changes)."""
+    global _SUBSCRIBER_INDEX
+    resolver = get_scrip_resolver()
+    path = _subscribers_path()
+    key = (path, _subscribers_mtime(path), tuple(TRACKED_SCRIP_LIST), CHAT_ID, id(resolver), resolver.version)
+    if _SUBSCRIBER_INDEX is None or _SUBSCRIBER_INDEX[0] != key:
+        subs = load_subscribers(path) if key[1] is not None else []
+        if subs:
+            print(f"ℹ️ Loaded {len(subs)} subscriber(s) from {path}")
+        else:
+            subs = [{"name": "default", "chat_id": CHAT_ID, "symbols": TRACKED_SCRIP_LIST}]
+        _SUBSCRIBER_INDEX = (key, SubscriberIndex(subs, resolver=resolver))
+    return _SUBSCRIBER_INDEX[1]
+
+
+def get_tracked_matcher():
+    """Return the TrackedMatcher over every subscriber's watchlist (TRACKED_SCRIP_LIST when
+    there is no subscribers file)."""
+    return get_subscriber_index().matcher
+
+
 def _looks_like_attachment(url):
     if not url:
         return False
@@ -110,144 +448,753 @@ def _looks_like_attachment(url):
     return False
 
 
-def _fetch_xbrl_attachment_for_scrip(s, api_headers=None):
+XBRL_URL = "https://www.bseindia.com/Msource/90D/CorpXbrlGen.aspx"
+
+# XBRL fallback fan-out: at most XBRL_MAX_IN_FLIGHT lookups run at once and the whole
+# fallback is abandoned after XBRL_FANOUT_DEADLINE seconds (stragglers are discarded).
+@settings_loader
+def _load_xbrl_fanout_settings():
+    global XBRL_MAX_IN_FLIGHT, XBRL_FANOUT_DEADLINE
     try:
-        xbrl_url = "https://www.bseindia.com/Msource/90D/CorpXbrlGen.aspx"
-        params_x = {"Scripcode": s}
-        rx = fetch_with_retries(xbrl_url, headers=api_headers or HEADERS, timeout=10, max_attempts=1, params=params_x)
-        body = rx.text
-        if not body or '<xbrli:xbrl' not in body:
-            return ""
-        m_attach = re.search(r'<in-bse-co:AttachmentURL[^>]*>(.*?)</', body, re.S)
-        return m_attach.group(1).strip() if m_attach else ""
+        XBRL_MAX_IN_FLIGHT = int(os.getenv("XBRL_MAX_IN_FLIGHT", "8"))
+    except ValueError:
+        XBRL_MAX_IN_FLIGHT = 8
+    try:
+        XBRL_FANOUT_DEADLINE = float(os.getenv("XBRL_FANOUT_DEADLINE", "15"))
+    except ValueError:
+        XBRL_FANOUT_DEADLINE = 15.0
+
+
+# Parsed XBRL documents are cached per scrip for XBRL_CACHE_TTL seconds (default 300,
+# 0 disables) in an LRU of XBRL_CACHE_SIZE scrips (default 512). Attachment lookups and
+# the fallback fan-out in one poll, and later daemon ticks, reuse it instead of
+# downloading CorpXbrlGen again.
+XBRL_CACHE = XbrlCache()
+
+
+@settings_loader
+def _load_xbrl_cache_settings():
+    global XBRL_CACHE_TTL, XBRL_CACHE_SIZE
+    try:
+        XBRL_CACHE_TTL = float(os.getenv("XBRL_CACHE_TTL", "300"))
+    except ValueError:
+        XBRL_CACHE_TTL = 300.0
+    try:
+        XBRL_CACHE_SIZE = int(os.getenv("XBRL_CACHE_SIZE", "512"))
+    except ValueError:
+        XBRL_CACHE_SIZE = 512
+    XBRL_CACHE.ttl_seconds = XBRL_CACHE_TTL
+    XBRL_CACHE.max_entries = max(1, XBRL_CACHE_SIZE)
+
+
+_XBRL_INFLIGHT = {}
+
+
+async def async_fetch_xbrl_document(s, api_headers=None, fetch=None):
+    """Return the parsed XBRL document ({scrip, date, title, pdf}) for scrip `s`, or None.
+
+    Served from XBRL_CACHE when fresh. Concurrent lookups of the same scrip share one
+    request. Failed downloads are not cached.
+    """
+    fetch = fetch or async_fetch_with_retries
+    s = str(s)
+    hit, doc = XBRL_CACHE.get(s)
+    METRICS.inc("xbrl_cache", result="hit" if hit else "miss")
+    if hit:
+        return doc
+    loop = asyncio.get_running_loop()
+    task = _XBRL_INFLIGHT.get((id(loop), s))
+    if task is None:
+        async def _download():
+            rx = await fetch(XBRL_URL, headers=api_headers or HEADERS, timeout=10, max_attempts=1, params={"Scripcode": s})
+            with METRICS.span("parse", kind="xbrl"):
+                return XBRL_CACHE.put(s, rx.text)
+
+        task = asyncio.ensure_future(_download())
+        _XBRL_INFLIGHT[(id(loop), s)] = task
+        task.add_done_callback(lambda _t, key=(id(loop), s): _XBRL_INFLIGHT.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def async_fetch_xbrl_attachment_for_scrip(s, api_headers=None, fetch=None):
+    try:
+        doc = await async_fetch_xbrl_document(s, api_headers, fetch=fetch)
+        return doc["pdf"] if doc else ""
     except Exception:
         return ""
 
 
-def get_latest_announcement_from_api():
-    """Return a dict with keys date, scrip, title, pdf when API returns results.
-    Returns None on failure or if no announcements.
+def _fetch_xbrl_attachment_for_scrip(s, api_headers=None):
+    return _run_sync(async_fetch_xbrl_attachment_for_scrip(s, api_headers, fetch=_fetch_via_sync))
+
+
+async def async_fetch_xbrl_record_for_scrip(s, api_headers=None, fetch=None):
+    """Return {date, scrip, title, pdf} from the XBRL document for scrip `s`, or None."""
+    try:
+        doc = await async_fetch_xbrl_document(s, api_headers, fetch=fetch)
+    except Exception:
+        return None
+    if not doc or not doc["scrip"] or doc["scrip"] != str(s):
+        return None
+    return {"date": doc["date"], "scrip": doc["scrip"], "title": doc["title"], "pdf": doc["pdf"]}
+
+
+def _xbrl_in_window(rec, days):
+    """True when the XBRL record's xbrli:instant date falls within `days` (YYYYMMDD, newest first)."""
+    day = str(rec.get("date") or "")[:10].replace("-", "")
+    return len(day) == 8 and day.isdigit() and days[-1] <= day <= days[0]
+
+
+async def async_fetch_xbrl_for_scrips(scrips, api_headers=None, max_in_flight=None, deadline=None, fetch=None):
+    """Look up XBRL records for many scrips concurrently.
+
+    Returns a list aligned with `scrips` (None where there was no record, the lookup
+    failed or it did not finish before the deadline), so the result does not depend
+    on which request completes first.
     """
+    scrips = list(scrips)
+    if not scrips:
+        return []
+    max_in_flight = max_in_flight or XBRL_MAX_IN_FLIGHT
+    deadline = XBRL_FANOUT_DEADLINE if deadline is None else deadline
+    sem = asyncio.Semaphore(max(1, max_in_flight))
+
+    async def _one(s):
+        async with sem:
+            return await async_fetch_xbrl_record_for_scrip(s, api_headers, fetch=fetch)
+
+    tasks = [asyncio.ensure_future(_one(s)) for s in scrips]
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for t in pending:
+        t.cancel()
+    if pending:
+        print(f"⏳ XBRL fan-out deadline ({deadline}s) hit; dropping {len(pending)} pending lookups")
+    results = []
+    for t in tasks:
+        results.append(t.result() if t in done and not t.exception() else None)
+    return results
+
+
+def fetch_xbrl_for_scrips(scrips, api_headers=None, max_in_flight=None, deadline=None):
+    return _run_sync(async_fetch_xbrl_for_scrips(scrips, api_headers, max_in_flight, deadline, fetch=_fetch_via_sync))
+
+
+# AnnSubCategoryGetData is paginated. Page 1 is fetched first; when the response carries
+# the total row count (Table1[0].ROWCNT) the remaining pages are prefetched concurrently,
+# otherwise pages are walked one by one until a short/empty page comes back.
+@settings_loader
+def _load_api_page_settings():
+    global API_PAGE_SIZE, API_MAX_PAGES, API_PAGE_MAX_IN_FLIGHT, API_MAX_WINDOW_DAYS, API_WINDOW_DAYS_IN_FLIGHT
     try:
-        today = time.strftime("%Y%m%d")
-        # Request all announcements and filter locally for our tracked scrips
-        params = {
-            "pageno": 1,
-            "strScrip": "",
-            "strCat": "",
-            "strPrevDate": today,
-            "strToDate": today,
-            "strSearch": "P",
-            "strType": "C",
-            "subcategory": "",
-        }
-        url = NEWAPI_DOMAIN + API_ANN_ENDPOINT
-        # Use stronger headers (Accept + Referer + Origin) to prompt JSON response
-        api_headers = HEADERS.copy()
-        api_headers.update({
-            "Accept": "application/json",
-            "Referer": BSE_URL,
-            "Origin": "https://www.bseindia.com",
-        })
-        # Use fetch_with_retries to get same retry behavior
-        r = fetch_with_retries(url, headers=api_headers, timeout=10, max_attempts=2, params=params)
+        API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "50"))
+    except ValueError:
+        API_PAGE_SIZE = 50
+    try:
+        API_MAX_PAGES = int(os.getenv("API_MAX_PAGES", "40"))
+    except ValueError:
+        API_MAX_PAGES = 40
+    try:
+        API_PAGE_MAX_IN_FLIGHT = int(os.getenv("API_PAGE_MAX_IN_FLIGHT", "4"))
+    except ValueError:
+        API_PAGE_MAX_IN_FLIGHT = 4
+    # Poll window: every day from the high-water mark's day through today (IST), so filings
+    # made just before midnight or while cron runs were skipped are still picked up. The first
+    # pages of all days are requested together; later pages of older days are read
+    # API_WINDOW_DAYS_IN_FLIGHT days at a time. The window is capped at API_MAX_WINDOW_DAYS;
+    # longer gaps are for backfill.py.
+    try:
+        API_MAX_WINDOW_DAYS = int(os.getenv("API_MAX_WINDOW_DAYS", "7"))
+    except ValueError:
+        API_MAX_WINDOW_DAYS = 7
+    try:
+        API_WINDOW_DAYS_IN_FLIGHT = int(os.getenv("API_WINDOW_DAYS_IN_FLIGHT", "2"))
+    except ValueError:
+        API_WINDOW_DAYS_IN_FLIGHT = 2
+
+
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30), "IST")
+
+
+def _bse_today():
+    """Today's date on BSE's calendar (IST), whatever the host's timezone."""
+    return datetime.datetime.now(IST).date()
+
+
+def poll_window(since=None, today=None, max_days=None):
+    """YYYYMMDD days to query, newest first: today back to the day of `since` (the date of
+    the last complete poll, or NEWS_DT of the high-water mark for older poll state), at
+    most `max_days` (API_MAX_WINDOW_DAYS) days."""
+    today = today or _bse_today()
+    max_days = max(1, max_days or API_MAX_WINDOW_DAYS)
+    start = today
+    try:
+        start = min(today, datetime.date.fromisoformat(str(since)[:10]))
+    except ValueError:
+        pass
+    span = (today - start).days + 1
+    if span > max_days:
+        skipped_to = today - datetime.timedelta(days=max_days)
+        print(f"⚠️ Last poll was {span - 1} day(s) ago; only the last {max_days} day(s) are polled. "
+              f"Run backfill.py --from {start.isoformat()} --to {skipped_to.isoformat()} for the rest")
+        span = max_days
+    return [(today - datetime.timedelta(days=d)).strftime("%Y%m%d") for d in range(span)]
+
+
+def announcement_params(from_date, to_date=None, pageno=1, scrip=""):
+    """Query parameters for AnnSubCategoryGetData over [from_date, to_date] (YYYYMMDD),
+    for every company or only for BSE scrip code `scrip`."""
+    return {
+        "pageno": pageno,
+        "strScrip": str(scrip or ""),
+        "strCat": "",
+        "strPrevDate": from_date,
+        "strToDate": to_date or from_date,
+        "strSearch": "P",
+        "strType": "C",
+        "subcategory": "",
+    }
+
+
+def api_request_headers():
+    # Use stronger headers (Accept + Referer + Origin) to prompt JSON response
+    api_headers = HEADERS.copy()
+    api_headers.update({
+        "Accept": "application/json",
+        "Referer": BSE_URL,
+        "Origin": "https://www.bseindia.com",
+    })
+    return api_headers
+
+
+def _api_total_rows(data):
+    """Return the total row count reported by the API (Table1[0].ROWCNT) or None."""
+    try:
+        return int(data["Table1"][0]["ROWCNT"])
+    except Exception:
+        return None
+
+
+async def _async_fetch_announcement_page(params, api_headers, pageno, fetch):
+    """Fetch one page of AnnSubCategoryGetData and return its rows (possibly empty)."""
+    page_params = dict(params, pageno=pageno)
+    r = await fetch(NEWAPI_DOMAIN + API_ANN_ENDPOINT, headers=api_headers, timeout=10, max_attempts=2, params=page_params)
+    data = r.json()
+    return (data or {}).get("Table") or []
+
+
+async def aiter_announcement_rows(first_page, params, api_headers, max_pages=None, max_in_flight=None, fetch=None):
+    """Yield announcement rows from page 1 (`first_page`, already decoded) and all later pages.
+
+    Rows are yielded in page order as soon as each page is available, so a caller that
+    stops early never waits for (or keeps downloading) the remaining pages. A page that
+    fails raises once the rows before it are yielded, so the caller knows the day is short.
+    """
+    fetch = fetch or async_fetch_with_retries
+    max_pages = max_pages or API_MAX_PAGES
+    rows = (first_page or {}).get("Table") or []
+    for row in rows:
+        yield row
+    if not rows:
+        return
+    total = _api_total_rows(first_page)
+    if total is not None:
+        per_page = max(len(rows), 1)
+        last_page = min(-(-total // per_page), max_pages)
+        if last_page <= 1:
+            return
+        sem = asyncio.Semaphore(max(1, max_in_flight or API_PAGE_MAX_IN_FLIGHT))
+
+        async def _page(p):
+            async with sem:
+                return await _async_fetch_announcement_page(params, api_headers, p, fetch)
+
+        print(f"ℹ️ API reports {total} rows; prefetching pages 2..{last_page}")
+        tasks = [(p, asyncio.ensure_future(_page(p))) for p in range(2, last_page + 1)]
+        try:
+            for p, task in tasks:
+                try:
+                    page_rows = await task
+                except Exception as exc:
+                    print(f"🔁 API page {p} failed: {exc}")
+                    raise
+                for row in page_rows:
+                    yield row
+        finally:
+            for _, task in tasks:
+                task.cancel()
+        return
+    # Unknown total: walk sequentially until a short, empty or repeated page
+    prev = rows
+    for p in range(2, max_pages + 1):
+        if len(prev) < API_PAGE_SIZE:
+            return
         try:
-            data = r.json()
+            page_rows = await _async_fetch_announcement_page(params, api_headers, p, fetch)
         except Exception as exc:
-            print(f"🔁 API parse failed (not JSON): {exc}")
-            return None
-
-        if not data or "Table" not in data or not data["Table"]:
-            print("🔁 API returned no table data; falling back to HTML")
-            return None
-
-        # Helper to tokenize text for robust matching (same logic as check_bse)
-        def _tokens(text):
-            return re.findall(r"\w+", (text or "").upper())
-
-        # If no tracked names configured, return the first row as before
-        def _looks_like_attachment(url):
-            if not url:
-                return False
-            u = url.lower()
-            # common direct attachment indicators
-            if u.endswith('.pdf') or '/xml-data/' in u or 'attachdownload' in u or 'attachmenturl' in u or 'xbrl' in u:
-                return True
-            # heuristic: explicit file extension in url
-            if '.' in u and (u.split('.')[-1] in ('pdf', 'xml')):
-                return True
-            return False
-
-        def _fetch_xbrl_attachment_for_scrip(s):
+            print(f"🔁 API page {p} failed: {exc}")
+            raise
+        if not page_rows or page_rows == prev:
+            return
+        for row in page_rows:
+            yield row
+        prev = page_rows
+
+
+def iter_announcement_rows(first_page, params, api_headers, max_pages=None, max_in_flight=None):
+    """Synchronous wrapper around aiter_announcement_rows (uses fetch_with_retries)."""
+    agen = aiter_announcement_rows(first_page, params, api_headers, max_pages, max_in_flight, fetch=_fetch_via_sync)
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
             try:
-                xbrl_url = "https://www.bseindia.com/Msource/90D/CorpXbrlGen.aspx"
-                params_x = {"Scripcode": s}
-                rx = fetch_with_retries(xbrl_url, headers=api_headers, timeout=10, max_attempts=1, params=params_x)
-                body = rx.text
-                if not body or '<xbrli:xbrl' not in body:
-                    return ""
-                m_attach = re.search(r'<in-bse-co:AttachmentURL[^>]*>(.*?)</', body, re.S)
-                return m_attach.group(1).strip() if m_attach else ""
-            except Exception:
-                return ""
-
-        if not TRACKED_SCRIP_LIST:
-            first = data["Table"][0]
-            date = first.get("NEWS_DT", "")
-            scrip = str(first.get("SCRIP_CD") or first.get("SLONGNAME") or "").strip()
-            title = (first.get("NEWSSUB") or first.get("HEADLINE") or "").strip()
-            pdf = first.get("NSURL") or ""
-            return {"date": date, "scrip": scrip, "title": title, "pdf": pdf}
-
-        # Otherwise, scan the returned table for the first row that matches our tracked list
-        for row in data["Table"]:
-            scrip_val = str(row.get("SCRIP_CD") or row.get("SLONGNAME") or "").strip()
-            title_val = (row.get("NEWSSUB") or row.get("HEADLINE") or "").strip()
-            s_tokens = _tokens(scrip_val)
-            t_tokens = _tokens(title_val)
-            is_for_tracked = any((t in s_tokens) or (t in t_tokens) for t in TRACKED_SCRIP_LIST)
-            if is_for_tracked:
-                date = row.get("NEWS_DT", "")
-                scrip = scrip_val
-                title = title_val
-                pdf = row.get("NSURL") or ""
-                # If NSURL doesn't look like a direct attachment, try XBRL AttachmentURL for this scrip
-                if not _looks_like_attachment(pdf):
-                    try:
-                        import re as _re
-                        pdf_x = _fetch_xbrl_attachment_for_scrip(scrip)
-                        if pdf_x:
-                            pdf = pdf_x
-                    except Exception:
-                        pass
-                return {"date": date, "scrip": scrip, "title": title, "pdf": pdf}
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(agen.aclose())
+        loop.close()
+
+
+async def aiter_window_rows(day_pages, api_headers, max_in_flight=None, fetch=None):
+    """Yield the rows of several days, newest day first, from [(params, first_page), ...]
+    (newest first). The first day is streamed page by page; the older days are collected
+    concurrently in the background (`max_in_flight` days at a time, default
+    API_WINDOW_DAYS_IN_FLIGHT) and are cancelled if the caller stops early. A failed page or
+    day raises once the rows before it are yielded.
+    """
+    fetch = fetch or async_fetch_with_retries
+    if not day_pages:
+        return
+    sem = asyncio.Semaphore(max(1, max_in_flight or API_WINDOW_DAYS_IN_FLIGHT))
 
-        # If none of the JSON rows matched tracked scrips, try XBRL endpoint per tracked scrip
-        try:
-            for s in TRACKED_SCRIP_LIST:
+    async def _collect(params, first_page):
+        async with sem:
+            return [row async for row in aiter_announcement_rows(first_page, params, api_headers, fetch=fetch)]
+
+    (params, first_page), older = day_pages[0], day_pages[1:]
+    tasks = [(p["strPrevDate"], asyncio.ensure_future(_collect(p, page))) for p, page in older]
+    rows = aiter_announcement_rows(first_page, params, api_headers, fetch=fetch)
+    try:
+        async for row in rows:
+            yield row
+        for day, task in tasks:
+            try:
+                day_rows = await task
+            except Exception as exc:
+                print(f"🔁 API rows for {day} failed: {exc}")
+                raise
+            for row in day_rows:
+                yield row
+    finally:
+        await rows.aclose()
+        for _, task in tasks:
+            task.cancel()
+
+
+# Query planning. A poll either asks for every announcement of each day in the window
+# ("broad") and matches locally, or asks once per tracked scrip code (strScrip) over the
+# whole window ("scrip"). The planner estimates both from what earlier polls observed
+# (bytes per row, rows in a full day, rows per scrip per day; kept in the poll state) and
+# picks the cheaper, counting each request as API_REQUEST_COST_BYTES. Watchlists with
+# symbols the scrip master cannot resolve always use "broad", since only the title can
+# match them. API_QUERY_PLAN=broad|scrip forces a plan.
+@settings_loader
+def _load_query_plan_settings():
+    global API_QUERY_PLAN, API_REQUEST_COST_BYTES, API_SCRIP_QUERIES_IN_FLIGHT
+    API_QUERY_PLAN = os.getenv("API_QUERY_PLAN", "auto").strip().lower()
+    try:
+        API_REQUEST_COST_BYTES = int(os.getenv("API_REQUEST_COST_BYTES", "4096"))
+    except ValueError:
+        API_REQUEST_COST_BYTES = 4096
+    try:
+        API_SCRIP_QUERIES_IN_FLIGHT = int(os.getenv("API_SCRIP_QUERIES_IN_FLIGHT", "4"))
+    except ValueError:
+        API_SCRIP_QUERIES_IN_FLIGHT = 4
+
+
+# Used until a poll has observed the real values
+_PLAN_PRIORS = {"bytes_per_row": 1000.0, "day_rows": 1500.0, "scrip_rows_per_day": 0.5}
+_PLAN_EWMA_ALPHA = 0.3
+
+
+def _observe(stats, key, value):
+    old = stats.get(key)
+    stats[key] = value if old is None else old + _PLAN_EWMA_ALPHA * (value - old)
+
+
+def _observe_page(stats, r, data, complete_day=False):
+    """Learn bytes per row (and, for a finished day, its row count) from a first page."""
+    rows = (data or {}).get("Table") or []
+    body = getattr(r, "content", None)
+    if rows and isinstance(body, bytes):
+        _observe(stats, "bytes_per_row", len(body) / len(rows))
+    total = _api_total_rows(data)
+    if complete_day and total is not None:
+        _observe(stats, "day_rows", float(total))
+
+
+def estimate_query_costs(days, n_codes, stats=None, incremental=False):
+    """{"broad": (requests, bytes), "scrip": (requests, bytes)} for polling `days`.
+
+    An incremental poll usually stops after one page of the high-water mark's day; every
+    other day in the window costs a full day of rows.
+    """
+    stats = dict(_PLAN_PRIORS, **(stats or {}))
+    per_row, day_rows = stats["bytes_per_row"], max(stats["day_rows"], 1.0)
+    page = max(API_PAGE_SIZE, 1)
+    full_days = len(days) - 1 if incremental else len(days)
+    broad_requests = full_days * -(-int(day_rows) // page) + (1 if incremental else 0)
+    broad_rows = full_days * day_rows + (min(day_rows, page) if incremental else 0)
+    scrip_rows = n_codes * len(days) * stats["scrip_rows_per_day"]
+    scrip_requests = n_codes * max(1, -(-int(len(days) * stats["scrip_rows_per_day"]) // page))
+    return {"broad": (broad_requests, broad_rows * per_row), "scrip": (scrip_requests, scrip_rows * per_row)}
+
+
+def choose_query_plan(matcher, days, stats=None, incremental=False):
+    """Return "broad" or "scrip" for polling `days` with `matcher` (see API_QUERY_PLAN)."""
+    if not matcher or not matcher.codes or matcher.unresolved or API_QUERY_PLAN == "broad":
+        return "broad"
+    if API_QUERY_PLAN == "scrip":
+        return "scrip"
+    costs = estimate_query_costs(days, len(matcher.codes), stats, incremental)
+    broad, scrip = (requests * API_REQUEST_COST_BYTES + size for requests, size in (costs["broad"], costs["scrip"]))
+    return "scrip" if scrip < broad else "broad"
+
+
+async def async_fetch_scrip_rows(codes, from_date, to_date, api_headers, max_in_flight=None, fetch=None, stats=None):
+    """Rows for scrip codes `codes` over [from_date, to_date] (one strScrip query each, all
+    pages, API_SCRIP_QUERIES_IN_FLIGHT at a time), merged newest first. Raises if any query
+    fails, so the caller never advances its high-water mark past rows it did not see.
+    Observations for the query planner are folded into `stats`.
+    """
+    fetch = fetch or async_fetch_with_retries
+    sem = asyncio.Semaphore(max(1, max_in_flight or API_SCRIP_QUERIES_IN_FLIGHT))
+
+    async def _one(code):
+        params = announcement_params(from_date, to_date, scrip=code)
+        async with sem:
+            r = await fetch(NEWAPI_DOMAIN + API_ANN_ENDPOINT, headers=api_headers, timeout=10, max_attempts=2, params=params)
+            with METRICS.span("parse", kind="api_json"):
+                data = r.json()
+            if stats is not None:
+                _observe_page(stats, r, data)
+            return [row async for row in aiter_announcement_rows(data, params, api_headers, fetch=fetch)]
+
+    per_code = await asyncio.gather(*(_one(code) for code in codes))
+    rows = [row for code_rows in per_code for row in code_rows]
+    if stats is not None and codes:
+        days = (datetime.date.fromisoformat(f"{to_date[:4]}-{to_date[4:6]}-{to_date[6:]}")
+                - datetime.date.fromisoformat(f"{from_date[:4]}-{from_date[4:6]}-{from_date[6:]}")).days + 1
+        _observe(stats, "scrip_rows_per_day", len(rows) / (len(codes) * max(days, 1)))
+    rows.sort(key=lambda row: str(row.get("NEWS_DT") or ""), reverse=True)
+    return rows
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+# Conditional polling. Each polled day's first-page validators (ETag / Last-Modified when
+# BSE sends them, and a SHA-1 of the raw body) and a high-water mark (newest NEWS_DT plus
+# the NEWSIDs seen at that timestamp) are kept in API_POLL_STATE_FILE (default:
+# api_poll_state.json next to the state file). A day whose first page is unchanged is not
+# decoded or matched. Changed days only match rows above the high-water mark, and paging
+# stops after a full page's worth of older rows. The mark also sets the poll window (see
+# API_MAX_WINDOW_DAYS). The state only moves after a poll read every page it needed and
+# dispatched its alerts (commit_api_poll_state()); a failed page or a crash before then
+# leaves the old state, so the next poll re-reads those rows and the seen-index drops
+# repeats. API_CONDITIONAL_POLL=0 disables this.
+@settings_loader
+def _load_poll_state_settings():
+    global API_POLL_STATE_FILE, API_CONDITIONAL_POLL
+    API_POLL_STATE_FILE = os.getenv("API_POLL_STATE_FILE")
+    API_CONDITIONAL_POLL = os.getenv("API_CONDITIONAL_POLL", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+# State recorded by the last incremental fetch, written once its alerts are out
+_PENDING_API_POLL_STATE = None
+
+
+def _api_poll_state_path():
+    if API_POLL_STATE_FILE:
+        return API_POLL_STATE_FILE
+    return os.path.join(os.path.dirname(os.path.abspath(STATE_FILE)), "api_poll_state.json")
+
+
+def load_api_poll_state():
+    try:
+        with open(_api_poll_state_path(), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except Exception:
+        return {}
+    if "day" in state:
+        # single-day state from before multi-day windows: validators were for that day only
+        state["validators"] = {state.pop("day"): state.get("validators") or {}}
+    return state
+
+
+def save_api_poll_state(state):
+    path = _api_poll_state_path()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def commit_api_poll_state():
+    """Save the poll state recorded by the last incremental fetch (if any)."""
+    global _PENDING_API_POLL_STATE
+    state, _PENDING_API_POLL_STATE = _PENDING_API_POLL_STATE, None
+    if state is None:
+        return
+    try:
+        save_api_poll_state(state)
+    except Exception as exc:
+        print(f"⚠️ Failed to save API poll state: {exc}")
+
+
+def _response_validators(r):
+    """ETag / Last-Modified headers and a SHA-1 of the raw body (when available)."""
+    validators = {}
+    headers = getattr(r, "headers", None) or {}
+    if headers.get("ETag"):
+        validators["etag"] = headers.get("ETag")
+    if headers.get("Last-Modified"):
+        validators["last_modified"] = headers.get("Last-Modified")
+    body = getattr(r, "content", None)
+    if isinstance(body, bytes) and body:
+        validators["sha1"] = hashlib.sha1(body).hexdigest()
+    return validators
+
+
+def _row_is_new(row, hwm):
+    """True when `row` is above the high-water mark {"date", "newsids"}."""
+    date = str(row.get("NEWS_DT") or "")
+    if not date or not hwm.get("date"):
+        return True
+    if date != hwm["date"]:
+        return date > hwm["date"]
+    return str(row.get("NEWSID") or "") not in hwm.get("newsids", [])
+
+
+def _advance_hwm(hwm, row):
+    date = str(row.get("NEWS_DT") or "")
+    if not date:
+        return
+    newsid = str(row.get("NEWSID") or "")
+    if date > hwm.get("date", ""):
+        hwm["date"], hwm["newsids"] = date, [newsid]
+    elif date == hwm["date"] and newsid not in hwm["newsids"]:
+        hwm["newsids"].append(newsid)
+
+
+def _api_row_to_record(row):
+    return {
+        "date": row.get("NEWS_DT", ""),
+        "scrip": str(row.get("SCRIP_CD") or row.get("SLONGNAME") or "").strip(),
+        "title": (row.get("NEWSSUB") or row.get("HEADLINE") or "").strip(),
+        "pdf": row.get("NSURL") or "",
+        "newsid": str(row.get("NEWSID") or "").strip(),
+        "attachsize": _int_or_none(row.get("Fld_Attachsize")),
+    }
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def async_get_announcements_from_api(fetch=None, incremental=False):
+    """Return a list of dicts (date, scrip, title, pdf, newsid) for every API row that
+    matches a tracked scrip, newest first, in a single pass over all pages.
+    Returns None on failure or if no announcements matched. With `incremental=True` (the
+    poll loop) it returns [] when nothing changed since the previous poll; see
+    API_CONDITIONAL_POLL; the poll state it advances is saved by commit_api_poll_state().
+
+    XBRL attachment lookups for matched rows start as soon as a row matches, so they
+    overlap with the download of the remaining pages.
+    """
+    global _PENDING_API_POLL_STATE
+    _PENDING_API_POLL_STATE = None
+    fetch = fetch or async_fetch_with_retries
+    try:
+        url = NEWAPI_DOMAIN + API_ANN_ENDPOINT
+        api_headers = api_request_headers()
+        # Poll state only applies to the watchlist it was recorded for
+        watch = hashlib.sha1(",".join(sorted(get_tracked_matcher().symbols)).encode("utf-8")).hexdigest()
+        incremental = incremental and API_CONDITIONAL_POLL
+        poll_state = load_api_poll_state() if incremental else {}
+        if poll_state.get("watch") != watch:
+            poll_state = {}
+        hwm = poll_state.get("hwm") or {}
+        # the window runs from the last complete poll; the high-water mark only de-duplicates
+        # rows, and under the per-scrip plan it stands still while tracked scrips are quiet
+        today = _bse_today()
+        days = poll_window(poll_state.get("polled") or hwm.get("date"), today)
+        old_validators = poll_state.get("validators") or {}
+        matcher = get_tracked_matcher()
+        stats = dict(poll_state.get("plan_stats") or {})
+        plan = choose_query_plan(matcher, days, stats, incremental=bool(hwm))
+        METRICS.inc("api_plan", plan=plan)
+        validators = dict(old_validators)
+        if plan == "scrip":
+            # One strScrip query per tracked code over the whole window
+            scrip_rows, _ = await asyncio.gather(
+                async_fetch_scrip_rows(matcher.xbrl_codes(), days[-1], days[0], api_headers, fetch=fetch, stats=stats),
+                async_refresh_scrip_master(fetch, api_headers),
+            )
+            rows = _aiter(scrip_rows)
+        else:
+            # Request all announcements for each day in the window and filter locally for
+            # our tracked scrips
+            def _page1(day):
+                headers = dict(api_headers)
+                seen = old_validators.get(day) or {}
+                if seen.get("etag"):
+                    headers["If-None-Match"] = seen["etag"]
+                if seen.get("last_modified"):
+                    headers["If-Modified-Since"] = seen["last_modified"]
+                return fetch(url, headers=headers, timeout=10, max_attempts=2, params=announcement_params(day))
+
+            # Use fetch_with_retries to get same retry behavior; a stale scrip master is
+            # refreshed alongside the first pages so code-based matching stays current
+            *responses, _ = await asyncio.gather(*(_page1(day) for day in days),
+                                                 async_refresh_scrip_master(fetch, api_headers))
+            validators = {}
+            changed = []
+            for day, r in zip(days, responses):
+                day_validators = _response_validators(r)
+                unchanged = getattr(r, "status_code", 200) == 304 or (
+                    day_validators.get("sha1") and day_validators.get("sha1") == (old_validators.get(day) or {}).get("sha1"))
+                validators[day] = old_validators.get(day, {}) if unchanged else day_validators
+                if not unchanged:
+                    changed.append((day, r))
+            if not changed:
+                print("✅ Announcements unchanged since last poll; skipping decode and matching")
+                METRICS.inc("api_unchanged")
+                if incremental:
+                    _PENDING_API_POLL_STATE = dict(poll_state, watch=watch, validators=validators,
+                                                   polled=today.isoformat())
+                return []
+            if len(days) > 1:
+                print(f"ℹ️ Polling {len(days)} day(s) since the last poll ({days[-1]}..{days[0]}); {len(changed)} changed")
+            day_pages = []
+            for day, r in changed:
                 try:
-                    xbrl_url = "https://www.bseindia.com/Msource/90D/CorpXbrlGen.aspx"
-                    params_x = {"Scripcode": s}
-                    rx = fetch_with_retries(xbrl_url, headers=api_headers, timeout=10, max_attempts=1, params=params_x)
-                    body = rx.text
-                    if not body or '<xbrli:xbrl' not in body:
-                        continue
-                    # extract ScripCode and other fields via regex (robust to namespaces)
-                    m_s = re.search(r'<[^>]*ScripCode[^>]*>(.*?)</', body)
-                    if not m_s:
-                        continue
-                    scrip_code = m_s.group(1).strip()
-                    if scrip_code != s:
-                        continue
-                    m_date = re.search(r'<xbrli:instant>(.*?)</xbrli:instant>', body)
-                    m_subj = re.search(r'<in-bse-co:SubjectOfAnnouncement[^>]*>(.*?)</', body, re.S)
-                    m_attach = re.search(r'<in-bse-co:AttachmentURL[^>]*>(.*?)</', body, re.S)
-                    date = m_date.group(1).strip() if m_date else ""
-                    title = (m_subj.group(1).strip() if m_subj else "").replace('\n', ' ')
-                    pdf = m_attach.group(1).strip() if m_attach else ""
-                    return {"date": date, "scrip": scrip_code, "title": title, "pdf": pdf}
-                except Exception:
+                    with METRICS.span("parse", kind="api_json"):
+                        data = r.json()
+                except Exception as exc:
+                    print(f"🔁 API parse failed (not JSON): {exc}")
+                    return None
+                if data and data.get("Table"):
+                    day_pages.append((announcement_params(day), data))
+                    _observe_page(stats, r, data, complete_day=day != days[0])
+
+            if not day_pages:
+                print("🔁 API returned no table data; falling back to HTML")
+                return None
+
+            # If no tracked names configured, return the first row as before
+            matcher = get_tracked_matcher()
+            if not matcher:
+                return [_api_row_to_record(day_pages[0][1]["Table"][0])]
+            rows = aiter_window_rows(day_pages, api_headers, fetch=fetch)
+
+        # Otherwise, scan every page of the table once and keep every row that matches our
+        # tracked list. Rows are streamed page by page while later pages are still downloading.
+        matches = []
+        attach_tasks = []
+        seen_keys = set()
+        sem = asyncio.Semaphore(max(1, XBRL_MAX_IN_FLIGHT))
+
+        async def _resolve_attachment(rec):
+            # If NSURL doesn't look like a direct attachment, try XBRL AttachmentURL for this scrip
+            async with sem:
+                pdf_x = await async_fetch_xbrl_attachment_for_scrip(rec["scrip"], api_headers, fetch=fetch)
+            if pdf_x:
+                rec["pdf"] = pdf_x
+
+        new_hwm = {"date": hwm.get("date", ""), "newsids": list(hwm.get("newsids", []))}
+        fresh_rows = 0
+        old_streak = 0
+        scanned = 0
+        match_seconds = 0.0
+        timed = METRICS.enabled
+        complete = True
+        try:
+            async for row in rows:
+                scanned += 1
+                if hwm and not _row_is_new(row, hwm):
+                    # Rows come newest first: a full page of already-processed rows means
+                    # everything after it was handled by an earlier poll
+                    old_streak += 1
+                    if old_streak >= API_PAGE_SIZE:
+                        print("ℹ️ Reached rows processed by an earlier poll; not reading further pages")
+                        break
+                    continue
+                old_streak = 0
+                fresh_rows += 1
+                _advance_hwm(new_hwm, row)
+                # matching interleaves with page downloads, so its time is summed per row
+                if timed:
+                    started = time.perf_counter()
+                    hit = matcher.match_row(row)
+                    match_seconds += time.perf_counter() - started
+                else:
+                    hit = matcher.match_row(row)
+                if not hit:
+                    continue
+                rec = _api_row_to_record(row)
+                # pages can shift while we read them; drop rows we already collected
+                key = announcement_key(rec)
+                if key in seen_keys:
                     continue
+                seen_keys.add(key)
+                matches.append(rec)
+                if not _looks_like_attachment(rec["pdf"]):
+                    attach_tasks.append(asyncio.ensure_future(_resolve_attachment(rec)))
+        except Exception as exc:
+            # alert on what was read, but keep the old state so the next poll reads it all again
+            print(f"⚠️ API rows incomplete ({exc}); not advancing the poll state")
+            complete = False
+        finally:
+            await rows.aclose()
+            METRICS.observe("match", match_seconds)
+            METRICS.inc("rows_scanned", scanned)
+            METRICS.inc("matches", len(matches), source="api")
+
+        if incremental and complete:
+            _PENDING_API_POLL_STATE = {"watch": watch, "validators": validators, "hwm": new_hwm, "plan_stats": stats,
+                                       "polled": today.isoformat()}
+
+        if matches:
+            if attach_tasks:
+                await asyncio.gather(*attach_tasks, return_exceptions=True)
+            print(f"ℹ️ API matched {len(matches)} announcement(s) for tracked scrips")
+            return matches
+        if hwm and not fresh_rows and complete:
+            print("✅ No announcements newer than the last poll")
+            return []
+
+        # If none of the JSON rows matched tracked scrips, try XBRL endpoint per tracked scrip
+        # (looked up concurrently; hits are kept in watchlist order). XBRL only
+        # accepts numeric scrip codes, so symbols the scrip master can't resolve are skipped.
+        try:
+            if matcher.unresolved:
+                print(f"ℹ️ Skipping XBRL lookup for symbols without a known BSE code: {', '.join(matcher.unresolved)}")
+            xbrl_hits = [rec for rec in await async_fetch_xbrl_for_scrips(matcher.xbrl_codes(), api_headers=api_headers, fetch=fetch) if rec]
+            # CorpXbrlGen returns a scrip's latest filing whatever its age; only filings
+            # dated inside the poll window are news
+            stale = [rec for rec in xbrl_hits if not _xbrl_in_window(rec, days)]
+            if stale:
+                print(f"ℹ️ Ignoring {len(stale)} XBRL filing(s) dated outside {days[-1]}..{days[0]}")
+                xbrl_hits = [rec for rec in xbrl_hits if rec not in stale]
+            if xbrl_hits:
+                METRICS.inc("matches", len(xbrl_hits), source="xbrl")
+                return xbrl_hits
         except Exception:
             pass
 
@@ -257,35 +1204,507 @@ def get_latest_announcement_from_api():
         print(f"🔁 API fetch failed: {exc}")
         return None
 
-def fetch_with_retries(url, headers=None, timeout=20, max_attempts=5, backoff_factor=1, params=None):
+
+def get_announcements_from_api():
+    """Synchronous wrapper around async_get_announcements_from_api (uses fetch_with_retries)."""
+    return _run_sync(async_get_announcements_from_api(fetch=_fetch_via_sync))
+
+
+def get_latest_announcement_from_api():
+    """Return a dict with keys date, scrip, title, pdf when API returns results.
+    Returns None on failure or if no announcements.
     """
-    Fetch a URL with exponential backoff retries for transient failures.
-    Returns a requests.Response on success or raises Exception after retries.
+    rows = get_announcements_from_api()
+    return rows[0] if rows else None
+
+
+# Shared HTTP transport: one requests.Session with a keep-alive connection pool per host,
+# so repeated BSE / XBRL / Telegram calls in a run reuse TCP+TLS connections.
+# Pool sizes can be overridden via env var HTTP_POOL_SIZES, e.g.
+#   HTTP_POOL_SIZES="api.bseindia.com=8,www.bseindia.com=16,api.telegram.org=2"
+# Hosts not listed use HTTP_POOL_DEFAULT_SIZE (default 4).
+# Keep-alive: HTTP_KEEPALIVE (default "1") and HTTP_KEEPALIVE_IDLE seconds (default 30).
+def _parse_pool_sizes(raw):
+    sizes = {}
+    for part in (raw or "").split(","):
+        if "=" not in part:
+            continue
+        host, size = part.split("=", 1)
+        host = host.strip().lower()
+        try:
+            size = int(size.strip())
+        except ValueError:
+            continue
+        if host and size > 0:
+            sizes[host] = size
+    return sizes
+
+
+@settings_loader
+def _load_http_settings():
+    global HTTP_POOL_DEFAULT_SIZE, HTTP_POOL_SIZES, HTTP_KEEPALIVE, HTTP_KEEPALIVE_IDLE
+    try:
+        HTTP_POOL_DEFAULT_SIZE = int(os.getenv("HTTP_POOL_DEFAULT_SIZE", "4"))
+    except ValueError:
+        HTTP_POOL_DEFAULT_SIZE = 4
+    HTTP_POOL_SIZES = {
+        "api.bseindia.com": 8,
+        "www.bseindia.com": 8,
+        "api.telegram.org": 2,
+    }
+    HTTP_POOL_SIZES.update(_parse_pool_sizes(os.getenv("HTTP_POOL_SIZES", "")))
+    HTTP_KEEPALIVE = os.getenv("HTTP_KEEPALIVE", "1").lower() in ("1", "true", "yes")
+    try:
+        HTTP_KEEPALIVE_IDLE = int(os.getenv("HTTP_KEEPALIVE_IDLE", "30"))
+    except ValueError:
+        HTTP_KEEPALIVE_IDLE = 30
+
+
+_HTTP_SESSION = None
+
+
+_KEEPALIVE_ADAPTER = None
+
+
+def _keepalive_adapter_class():
+    """The HTTPAdapter subclass used by the pooled session (defined on first use so that
+    requests is only imported once the bot makes an HTTP call)."""
+    global _KEEPALIVE_ADAPTER
+    if _KEEPALIVE_ADAPTER is None:
+        from requests.adapters import HTTPAdapter
+        from urllib3.connection import HTTPConnection
+
+        class _KeepAliveAdapter(HTTPAdapter):
+            """HTTPAdapter that turns on TCP keep-alive probes for pooled sockets."""
+
+            def init_poolmanager(self, *args, **kwargs):
+                if HTTP_KEEPALIVE:
+                    opts = list(HTTPConnection.default_socket_options)
+                    opts.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+                    if hasattr(socket, "TCP_KEEPIDLE"):
+                        opts.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, HTTP_KEEPALIVE_IDLE))
+                    if hasattr(socket, "TCP_KEEPINTVL"):
+                        opts.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, HTTP_KEEPALIVE_IDLE // 3)))
+                    kwargs["socket_options"] = opts
+                super().init_poolmanager(*args, **kwargs)
+
+        _KEEPALIVE_ADAPTER = _KeepAliveAdapter
+    return _KEEPALIVE_ADAPTER
+
+
+def get_http_session():
+    """Return the process-wide pooled requests.Session, creating it on first use."""
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        import requests
+
+        adapter = _keepalive_adapter_class()
+        session = requests.Session()
+        default = adapter(pool_connections=len(HTTP_POOL_SIZES) + 1, pool_maxsize=HTTP_POOL_DEFAULT_SIZE)
+        session.mount("https://", default)
+        session.mount("http://", default)
+        for host, size in HTTP_POOL_SIZES.items():
+            session.mount(f"https://{host}/", adapter(pool_connections=1, pool_maxsize=size))
+        if not HTTP_KEEPALIVE:
+            session.headers["Connection"] = "close"
+        _HTTP_SESSION = session
+    return _HTTP_SESSION
+
+
+def close_http_session():
+    """Close pooled connections (e.g. at shutdown or after changing pool settings)."""
+    global _HTTP_SESSION
+    if _HTTP_SESSION is not None:
+        _HTTP_SESSION.close()
+        _HTTP_SESSION = None
+
+
+def get_http_stats():
+    """Return connection-reuse counters per host for the pooled session.
+
+    Example: {"api.bseindia.com": {"requests": 3, "connections": 1, "reused": 2}}
     """
+    stats = {}
+    if _HTTP_SESSION is None:
+        return stats
+    seen = set()
+    for adapter in _HTTP_SESSION.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            entry = stats.setdefault(pool.host, {"requests": 0, "connections": 0, "reused": 0})
+            entry["requests"] += pool.num_requests
+            entry["connections"] += pool.num_connections
+            entry["reused"] = max(0, entry["requests"] - entry["connections"])
+    return stats
+
+
+# Raw response cache for the BSE endpoints (AnnSubCategoryGetData, ann.html, CorpXbrlGen).
+# RESPONSE_CACHE=record stores every successful response, compressed and content-addressed,
+# under RESPONSE_CACHE_DIR (default: response_cache/ next to the state file).
+# RESPONSE_CACHE=replay serves every fetch from that store only: no network, a miss
+# raises, and Telegram messages are printed instead of sent. Captures are evicted after
+# RESPONSE_CACHE_MAX_AGE_DAYS (default 60) or when bodies exceed RESPONSE_CACHE_MAX_MB
+# (default 256).
+@settings_loader
+def _load_response_cache_settings():
+    global RESPONSE_CACHE_MODE, RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_MB, RESPONSE_CACHE_MAX_AGE_DAYS
+    RESPONSE_CACHE_MODE = os.getenv("RESPONSE_CACHE", "off").strip().lower()
+    RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR")
+    try:
+        RESPONSE_CACHE_MAX_MB = float(os.getenv("RESPONSE_CACHE_MAX_MB", "256"))
+    except ValueError:
+        RESPONSE_CACHE_MAX_MB = 256.0
+    try:
+        RESPONSE_CACHE_MAX_AGE_DAYS = float(os.getenv("RESPONSE_CACHE_MAX_AGE_DAYS", "60"))
+    except ValueError:
+        RESPONSE_CACHE_MAX_AGE_DAYS = 60.0
+
+
+RESPONSE_CACHE_ENDPOINTS = (API_ANN_ENDPOINT, "ann.html", "CorpXbrlGen")
+
+_RESPONSE_CACHES = {}
+
+
+def _response_cache_dir():
+    if RESPONSE_CACHE_DIR:
+        return RESPONSE_CACHE_DIR
+    return os.path.join(os.path.dirname(os.path.abspath(STATE_FILE)), "response_cache")
+
+
+def get_response_cache():
+    """Return the ResponseCache for RESPONSE_CACHE_DIR (opened on first use)."""
+    path = _response_cache_dir()
+    cache = _RESPONSE_CACHES.get(path)
+    if cache is None:
+        from response_cache import ResponseCache
+
+        cache = ResponseCache(path, max_bytes=int(RESPONSE_CACHE_MAX_MB * 1024 * 1024),
+                              max_age_seconds=RESPONSE_CACHE_MAX_AGE_DAYS * 86400)
+        _RESPONSE_CACHES[path] = cache
+    return cache
+
+
+def _record_response(url, params, r):
+    if RESPONSE_CACHE_MODE != "record" or not any(e in url for e in RESPONSE_CACHE_ENDPOINTS):
+        return
+    try:
+        get_response_cache().store(url, params, r.status_code, r.headers, r.content)
+    except Exception as exc:
+        print(f"⚠️ Failed to record response for {url}: {exc}")
+
+
+def _replay_response(url, params):
+    r = get_response_cache().lookup(url, params)
+    METRICS.inc("response_cache_replay", result="hit" if r is not None else "miss")
+    if r is None:
+        raise Exception(f"Replay miss for {url} {params or ''}")
+    print(f"📼 Replayed {url} (captured {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(r.fetched_at))})")
+    return r
+
+
+# Retry policy shared by fetch_with_retries and async_fetch_with_retries:
+# - backoff uses "full jitter": a random delay in
+#   [0, min(FETCH_BACKOFF_CAP, backoff_factor * 2**(attempt-1))] (default cap 8s)
+# - each call has a FETCH_DEADLINE budget (default 45s) and each poll a RUN_DEADLINE budget
+#   (default 240s, inside the 5 minute cron slot); attempt timeouts and sleeps are clipped
+#   to whatever is left, and a retry that cannot fit is given up
+# - Retry-After on 429/503 defers that host for the given time: every later attempt to it,
+#   in this call or another, first waits it out (or gives up if it overruns the deadline)
+# - per-host circuit breakers open after CIRCUIT_FAILURE_THRESHOLD consecutive failures
+#   (5xx or network errors, default 5). While open, fetches to the host fail at once.
+#   After CIRCUIT_RESET_SECONDS (default 120) a single probe is let through. Open breakers
+#   are kept in CIRCUIT_STATE_FILE (default: circuit_state.json next to the state file),
+#   so the next cron run fails fast as well.
+@settings_loader
+def _load_fetch_settings():
+    global FETCH_BACKOFF_CAP, FETCH_DEADLINE, RUN_DEADLINE, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS, CIRCUIT_STATE_FILE
+    try:
+        FETCH_BACKOFF_CAP = float(os.getenv("FETCH_BACKOFF_CAP", "8"))
+    except ValueError:
+        FETCH_BACKOFF_CAP = 8.0
+    try:
+        FETCH_DEADLINE = float(os.getenv("FETCH_DEADLINE", "45"))
+    except ValueError:
+        FETCH_DEADLINE = 45.0
+    try:
+        RUN_DEADLINE = float(os.getenv("RUN_DEADLINE", "240"))
+    except ValueError:
+        RUN_DEADLINE = 240.0
+    try:
+        CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    except ValueError:
+        CIRCUIT_FAILURE_THRESHOLD = 5
+    try:
+        CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "120"))
+    except ValueError:
+        CIRCUIT_RESET_SECONDS = 120.0
+    CIRCUIT_STATE_FILE = os.getenv("CIRCUIT_STATE_FILE")
+
+
+_CIRCUIT_BREAKERS = {}
+# monotonic time at which the current poll's RUN_DEADLINE runs out (None outside a poll)
+_RUN_DEADLINE_AT = None
+
+
+def _circuit_state_path():
+    if CIRCUIT_STATE_FILE:
+        return CIRCUIT_STATE_FILE
+    return os.path.join(os.path.dirname(os.path.abspath(STATE_FILE)), "circuit_state.json")
+
+
+def get_circuit_breakers():
+    """Return the per-host CircuitBreakers for CIRCUIT_STATE_FILE (loaded on first use)."""
+    path = _circuit_state_path()
+    breakers = _CIRCUIT_BREAKERS.get(path)
+    if breakers is None:
+        breakers = CircuitBreakers(path, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+        _CIRCUIT_BREAKERS[path] = breakers
+    return breakers
+
+
+def _host(url):
+    return urlsplit(url).hostname or url
+
+
+def _deadline_at(deadline):
+    """Monotonic time by which a call must be done: its own budget (`deadline` seconds,
+    default FETCH_DEADLINE; <= 0 for none) capped by the current poll's RUN_DEADLINE."""
+    budget = FETCH_DEADLINE if deadline is None else deadline
+    at = time.monotonic() + budget if budget and budget > 0 else None
+    if _RUN_DEADLINE_AT is not None:
+        at = _RUN_DEADLINE_AT if at is None else min(at, _RUN_DEADLINE_AT)
+    return at
+
+
+def _remaining(deadline_at):
+    return None if deadline_at is None else deadline_at - time.monotonic()
+
+
+def _before_attempt(url, timeout, deadline_at):
+    """Return (timeout, wait) for the next attempt: its timeout and the seconds left of the
+    host's Retry-After, to sleep before sending. Raises when it must not go out."""
+    remaining = _remaining(deadline_at)
+    if remaining is not None and remaining <= 0:
+        METRICS.inc("fetch_deadline_exceeded", endpoint=_endpoint_label(url))
+        raise DeadlineExceeded(f"Deadline exceeded before fetching {url}")
+    breakers = get_circuit_breakers()
+    host = _host(url)
+    with breakers.lock:
+        breaker = breakers.get(host)
+        wait = breaker.wait_time()
+        # checked before allow() so a deferred host never holds the half-open probe slot
+        if remaining is not None and wait >= remaining:
+            METRICS.inc("fetch_deadline_exceeded", endpoint=_endpoint_label(url))
+            raise DeadlineExceeded(f"Deadline exceeded before fetching {url}: {host} asked to wait {wait:.1f}s")
+        allowed = breaker.allow()
+    if not allowed:
+        METRICS.inc("circuit_rejected", host=host)
+        raise CircuitOpenError(f"Circuit open for {host}; not fetching {url}")
+    if remaining is not None:
+        remaining -= wait
+    return (timeout if remaining is None else max(0.1, min(timeout, remaining))), wait
+
+
+def _retry_delay(url, attempt, backoff_factor, deadline_at):
+    """Seconds to sleep before retrying `url`; raises when the host's breaker has opened
+    or the wait (backoff or Retry-After) would overrun the deadline."""
+    host = _host(url)
+    breakers = get_circuit_breakers()
+    with breakers.lock:
+        breaker = breakers.get(host)
+        if breaker.state == "open":
+            METRICS.inc("circuit_rejected", host=host)
+            raise CircuitOpenError(f"Circuit opened for {host} while fetching {url}")
+        delay = max(full_jitter_delay(attempt, backoff_factor, FETCH_BACKOFF_CAP), breaker.wait_time())
+    remaining = _remaining(deadline_at)
+    if remaining is not None and delay >= remaining:
+        METRICS.inc("fetch_deadline_exceeded", endpoint=_endpoint_label(url))
+        raise DeadlineExceeded(f"Deadline exceeded fetching {url}: {remaining:.1f}s left, next retry in {delay:.1f}s")
+    return delay
+
+
+def _record_outcome(url, ok, retry_after=None):
+    """Feed one attempt's result to the host's breaker: ok=True (host answered), False
+    (5xx / network error) or None (429: neither). Persists state when a breaker flips."""
+    host = _host(url)
+    breakers = get_circuit_breakers()
+    with breakers.lock:
+        breaker = breakers.get(host)
+        changed = False
+        if ok is None:
+            if breaker.record_rate_limited(retry_after):
+                print(f"🔌 Circuit for {host} re-opened: the probe was rate limited")
+                METRICS.inc("circuit_opened", host=host)
+            changed = True
+        elif retry_after is not None:
+            breaker.defer(retry_after)
+            changed = True
+        if ok is True:
+            if breaker.record_success():
+                print(f"✅ Circuit for {host} closed again")
+                changed = True
+        elif ok is False and breaker.record_failure():
+            print(f"🔌 Circuit for {host} opened after {breaker.failures} consecutive failure(s); "
+                  f"failing fast for {breaker.reset_timeout:.0f}s")
+            METRICS.inc("circuit_opened", host=host)
+            changed = True
+        if changed:
+            try:
+                breakers.save()
+            except Exception as exc:
+                print(f"⚠️ Failed to save circuit breaker state: {exc}")
+
+
+def _fetch_attempt(url, headers, timeout, params, attempt, stream=False):
+    """One GET through the pooled session. Returns the response on HTTP 200, None when
+    the attempt should be retried (5xx, 429, other non-200, network errors). With
+    `stream`, the body is left unread for the caller (and not recorded)."""
+    from requests.exceptions import RequestException
+
+    endpoint = _endpoint_label(url)
+    try:
+        print(f"⏳ API attempt {attempt} for {url}")
+        with METRICS.span("fetch", endpoint=endpoint) as span:
+            r = get_http_session().get(url, headers=headers, timeout=timeout, params=params, stream=stream)
+            span.set(status=r.status_code)
+        METRICS.inc("http_requests", endpoint=endpoint, status=r.status_code)
+        print(f"🔁 Fetch status: {r.status_code}")
+        # 304 only comes back for conditional requests (If-None-Match / If-Modified-Since)
+        if r.status_code in (200, 304):
+            _record_outcome(url, True)
+            if r.status_code == 200 and not stream:
+                _record_response(url, params, r)
+            return r
+        retry_after = None
+        if r.status_code in (429, 503):
+            retry_after = parse_retry_after((getattr(r, "headers", None) or {}).get("Retry-After"))
+        # Retry on server errors and rate limiting
+        if 500 <= r.status_code < 600:
+            _record_outcome(url, False, retry_after)
+            print(f"⏳ Server error {r.status_code}, will retry")
+        elif r.status_code == 429:
+            _record_outcome(url, None, retry_after)
+            print(f"⏳ Rate limited (429){f', Retry-After {retry_after:.0f}s' if retry_after is not None else ''}")
+        else:
+            _record_outcome(url, True)
+            print(f"⏳ API attempt {attempt} failed: HTTP {r.status_code}")
+        if stream:
+            r.close()
+    except RequestException as exc:
+        METRICS.inc("http_requests", endpoint=endpoint, status="error")
+        _record_outcome(url, False)
+        print(f"⏳ API attempt {attempt} failed: {exc}")
+    return None
+
+
+def fetch_with_retries(url, headers=None, timeout=20, max_attempts=5, backoff_factor=1, params=None, deadline=None,
+                       stream=False):
+    """
+    Fetch a URL, retrying transient failures with jittered backoff (see the retry policy
+    above). Returns a requests.Response on success or raises Exception after retries;
+    CircuitOpenError / DeadlineExceeded when the host is failing fast or the time budget
+    (`deadline` seconds, default FETCH_DEADLINE) is spent. With `stream=True` the body is
+    read by the caller (iter_content), who must close() the response.
+    """
+    if RESPONSE_CACHE_MODE == "replay":
+        return _replay_response(url, params)
+    deadline_at = _deadline_at(deadline)
     attempt = 1
     while attempt <= max_attempts:
-        try:
-            print(f"⏳ API attempt {attempt} for {url}")
-            r = requests.get(url, headers=headers, timeout=timeout, params=params)
-            print(f"🔁 Fetch status: {r.status_code}")
-            if r.status_code == 200:
-                return r
-            # Retry on server errors
-            if 500 <= r.status_code < 600:
-                print(f"⏳ Server error {r.status_code}, will retry")
-            else:
-                r.raise_for_status()
-        except RequestException as exc:
-            print(f"⏳ API attempt {attempt} failed: {exc}")
+        attempt_timeout, wait = _before_attempt(url, timeout, deadline_at)
+        if wait > 0:
+            print(f"⏳ Waiting {wait:.2f}s for the host's Retry-After")
+            time.sleep(wait)
+        r = _fetch_attempt(url, headers, attempt_timeout, params, attempt, stream=stream)
+        if r is not None:
+            return r
         if attempt == max_attempts:
             break
-        sleep_time = backoff_factor * (2 ** (attempt - 1))
-        print(f"⏳ Sleeping {sleep_time}s before retry")
+        sleep_time = _retry_delay(url, attempt, backoff_factor, deadline_at)
+        METRICS.inc("fetch_retries", endpoint=_endpoint_label(url))
+        print(f"⏳ Sleeping {sleep_time:.2f}s before retry")
         time.sleep(sleep_time)
         attempt += 1
     raise Exception(f"Failed to fetch {url} after {max_attempts} attempts")
 
 
+# asyncio pipeline. Each HTTP attempt runs on the shared pooled session inside a dedicated
+# I/O thread pool (IO_MAX_WORKERS, default 32) while backoff sleeps are awaited, so one slow
+# endpoint never blocks the event loop or the other requests of a run.
+@settings_loader
+def _load_io_settings():
+    global IO_MAX_WORKERS
+    try:
+        IO_MAX_WORKERS = int(os.getenv("IO_MAX_WORKERS", "32"))
+    except ValueError:
+        IO_MAX_WORKERS = 32
+
+
+_IO_EXECUTOR = None
+
+
+def _io_executor():
+    global _IO_EXECUTOR
+    if _IO_EXECUTOR is None:
+        _IO_EXECUTOR = ThreadPoolExecutor(max_workers=max(1, IO_MAX_WORKERS), thread_name_prefix="io")
+    return _IO_EXECUTOR
+
+
+async def _in_io_pool(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def async_fetch_with_retries(url, headers=None, timeout=20, max_attempts=5, backoff_factor=1, params=None, deadline=None):
+    """Async variant of fetch_with_retries: same retry rules, non-blocking backoff."""
+    if RESPONSE_CACHE_MODE == "replay":
+        return _replay_response(url, params)
+    deadline_at = _deadline_at(deadline)
+    attempt = 1
+    while attempt <= max_attempts:
+        attempt_timeout, wait = _before_attempt(url, timeout, deadline_at)
+        if wait > 0:
+            print(f"⏳ Waiting {wait:.2f}s for the host's Retry-After")
+            await asyncio.sleep(wait)
+        r = await _in_io_pool(_fetch_attempt, url, headers, attempt_timeout, params, attempt)
+        if r is not None:
+            return r
+        if attempt == max_attempts:
+            break
+        sleep_time = _retry_delay(url, attempt, backoff_factor, deadline_at)
+        METRICS.inc("fetch_retries", endpoint=_endpoint_label(url))
+        print(f"⏳ Sleeping {sleep_time:.2f}s before retry")
+        await asyncio.sleep(sleep_time)
+        attempt += 1
+    raise Exception(f"Failed to fetch {url} after {max_attempts} attempts")
+
+
+async def _fetch_via_sync(url, **kwargs):
+    """Async adapter over the module-level (sync) fetch_with_retries.
+
+    The synchronous wrappers pass this as `fetch` so they keep their exact blocking
+    behaviour, and so code that replaces bot.fetch_with_retries still sees every call.
+    """
+    return await _in_io_pool(fetch_with_retries, url, **kwargs)
+
+
+def _run_sync(coro):
+    """Run `coro` to completion from synchronous code and return its result."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Called from inside a running loop: run on a private loop in a helper thread
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, coro).result()
+
+
 # Temporary helper: inject an emoji into the message when the announcement title mentions LODR.
 # This is intended for short-term verification and controlled via env vars:
 # - TEMP_LODR_TEST (default: "1") enables the injection
@@ -331,32 +1750,353 @@ COMBINATION_RULES = [
     (["pledge", "invocation"], "🚨 PLEDGE INVOCATION"),
 ]
 
-def send_telegram(msg):
-    if not BOT_TOKEN or not CHAT_ID:
-        print("⚠️ send_telegram: missing BOT_TOKEN or CHAT_ID; message not sent")
-        return
+# Outbound Telegram queue used by the poll pipeline. Alerts for one chat are coalesced
+# into messages of up to 4096 characters (TELEGRAM_COALESCE=0 sends one per alert) and
+# rate limited per chat (TELEGRAM_CHAT_RATE msgs/s, burst TELEGRAM_CHAT_BURST) and
+# globally (TELEGRAM_GLOBAL_RATE msgs/s). A 429 is retried after `retry_after` when that
+# is at most TELEGRAM_MAX_RETRY_AFTER seconds. Undelivered messages go to
+# TELEGRAM_OUTBOX_FILE (default: telegram_outbox.json next to the state file) and are
+# retried on the next poll.
+@settings_loader
+def _load_telegram_settings():
+    global TELEGRAM_OUTBOX_FILE, TELEGRAM_CHAT_RATE, TELEGRAM_CHAT_BURST, TELEGRAM_GLOBAL_RATE, TELEGRAM_MAX_RETRY_AFTER, TELEGRAM_COALESCE
+    TELEGRAM_OUTBOX_FILE = os.getenv("TELEGRAM_OUTBOX_FILE")
+    try:
+        TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+    except ValueError:
+        TELEGRAM_CHAT_RATE = 1.0
+    try:
+        TELEGRAM_CHAT_BURST = int(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+    except ValueError:
+        TELEGRAM_CHAT_BURST = 3
+    try:
+        TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))
+    except ValueError:
+        TELEGRAM_GLOBAL_RATE = 25.0
+    try:
+        TELEGRAM_MAX_RETRY_AFTER = float(os.getenv("TELEGRAM_MAX_RETRY_AFTER", "30"))
+    except ValueError:
+        TELEGRAM_MAX_RETRY_AFTER = 30.0
+    TELEGRAM_COALESCE = os.getenv("TELEGRAM_COALESCE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+_TELEGRAM_DISPATCHERS = {}
+
+
+async def async_telegram_post(chat_id, text):
+    """POST one sendMessage. Returns (status_code, retry_after); status_code is None on
+    network errors and retry_after is only set for 429 responses."""
+    if RESPONSE_CACHE_MODE == "replay":
+        print(f"📼 Replay mode: not sending to {chat_id}:\n{text}")
+        return 200, None
     url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
     try:
-        resp = requests.post(url, json={"chat_id": CHAT_ID, "text": msg}, timeout=10)
-        print(f"📤 Telegram send status: {resp.status_code}")
+        with METRICS.span("send"):
+            resp = await _in_io_pool(get_http_session().post, url, json={"chat_id": chat_id, "text": text}, timeout=10)
+    except Exception as exc:
+        METRICS.inc("telegram_messages", status="error")
+        print(f"❌ Telegram send failed: {exc}")
+        return None, None
+    METRICS.inc("telegram_messages", status=resp.status_code)
+    print(f"📤 Telegram send status: {resp.status_code}")
+    try:
+        print(f"📥 Telegram response: {resp.text}")
+    except Exception:
+        pass
+    retry_after = None
+    if resp.status_code == 429:
         try:
-            print(f"📥 Telegram response: {resp.text}")
+            retry_after = float(resp.json()["parameters"]["retry_after"])
         except Exception:
-            pass
+            try:
+                retry_after = float(resp.headers.get("Retry-After"))
+            except Exception:
+                retry_after = None
+    return resp.status_code, retry_after
+
+
+async def async_send_telegram(msg, chat_id=None):
+    chat_id = chat_id if chat_id is not None else CHAT_ID
+    if not BOT_TOKEN or not chat_id:
+        print("⚠️ send_telegram: missing BOT_TOKEN or CHAT_ID; message not sent")
+        return
+    status, retry_after = await async_telegram_post(chat_id, msg)
+    if status == 429 and retry_after is not None and retry_after <= TELEGRAM_MAX_RETRY_AFTER:
+        print(f"⏳ Telegram rate limited; retrying in {retry_after}s")
+        await asyncio.sleep(retry_after)
+        await async_telegram_post(chat_id, msg)
+
+
+def send_telegram(msg, chat_id=None):
+    return _run_sync(async_send_telegram(msg, chat_id=chat_id))
+
+
+def _telegram_outbox_path():
+    if TELEGRAM_OUTBOX_FILE:
+        return TELEGRAM_OUTBOX_FILE
+    return os.path.join(os.path.dirname(os.path.abspath(STATE_FILE)), "telegram_outbox.json")
+
+
+def get_telegram_dispatcher():
+    """Return the TelegramDispatcher for the current outbox file (kept across daemon ticks
+    so rate-limit buckets carry over between polls)."""
+    path = _telegram_outbox_path()
+    dispatcher = _TELEGRAM_DISPATCHERS.get(path)
+    if dispatcher is None:
+        dispatcher = TelegramDispatcher(
+            lambda chat_id, text: async_telegram_post(chat_id, text),
+            path=path,
+            chat_rate=TELEGRAM_CHAT_RATE,
+            chat_burst=TELEGRAM_CHAT_BURST,
+            global_rate=TELEGRAM_GLOBAL_RATE,
+            global_burst=max(1, int(TELEGRAM_GLOBAL_RATE)),
+            coalesce=TELEGRAM_COALESCE,
+            max_retry_after=TELEGRAM_MAX_RETRY_AFTER,
+        )
+        _TELEGRAM_DISPATCHERS[path] = dispatcher
+    return dispatcher
+
+# Attachment prefetch, off by default. With ATTACHMENT_DIR set, the PDF behind every alert
+# that went out is streamed into a content-addressed AttachmentStore there (see
+# attachments.py), so a local copy exists before BSE's attachment server gets busy.
+# Downloads start only after the poll's Telegram sends, on their own ATTACHMENT_WORKERS
+# threads (default 2), in ATTACHMENT_CHUNK_KB chunks (default 64). Files above
+# ATTACHMENT_MAX_MB (default 20) are skipped. The size comes from the API's Fld_Attachsize
+# when known, then Content-Length, and is otherwise enforced while streaming.
+@settings_loader
+def _load_attachment_settings():
+    global ATTACHMENT_DIR, ATTACHMENT_MAX_MB, ATTACHMENT_WORKERS, ATTACHMENT_CHUNK_KB, ATTACHMENT_TIMEOUT
+    ATTACHMENT_DIR = os.getenv("ATTACHMENT_DIR", "").strip()
+    try:
+        ATTACHMENT_MAX_MB = float(os.getenv("ATTACHMENT_MAX_MB", "20"))
+    except ValueError:
+        ATTACHMENT_MAX_MB = 20.0
+    try:
+        ATTACHMENT_WORKERS = int(os.getenv("ATTACHMENT_WORKERS", "2"))
+    except ValueError:
+        ATTACHMENT_WORKERS = 2
+    try:
+        ATTACHMENT_CHUNK_KB = int(os.getenv("ATTACHMENT_CHUNK_KB", "64"))
+    except ValueError:
+        ATTACHMENT_CHUNK_KB = 64
+    # Per-request timeout; a one-shot run also waits at most this long for downloads at exit
+    try:
+        ATTACHMENT_TIMEOUT = float(os.getenv("ATTACHMENT_TIMEOUT", "60"))
+    except ValueError:
+        ATTACHMENT_TIMEOUT = 60.0
+
+
+# PDF_RECLASSIFY=1 (needs ATTACHMENT_DIR) also prefetches tracked announcements that
+# were ignored or below every subscriber's threshold. It extracts each PDF's text in a
+# process pool of PDF_WORKERS (default 2), caching the text by file hash, and runs the
+# classify() keywords on it with body rules (see classify_body()). When the body rates
+# higher than the title, an upgrade alert goes to the subscribers at the new severity.
+# PDF_BODY_IGNORE_KEYWORDS are not counted on their own in bodies: filing boilerplate
+# ("SEBI (LODR) Regulations", "Limited Review Report of the Statutory Auditor", "no
+# default or delay in payment", "Board Meeting held on") carries them in nearly every PDF.
+_PDF_BODY_IGNORE_DEFAULT = ("sebi,auditor,default,delay,overdue,liquidity,credit rating,nclt,debarred,"
+                            "board meeting,contract,project,expansion,capex")
+# Combination rules only fire on a body when their words occur within this many characters
+# of each other; a long PDF mentions "delay" and "project" somewhere anyway
+PDF_RULE_WINDOW = 200
+# A body keyword right after one of these ("no default", "without any delay") is not counted
+_NEGATED_RE = re.compile(r"\b(?:no|not|nil|without|never|neither|nor)\b(?:\W+\w+){0,2}\W*$")
+
+
+@settings_loader
+def _load_pdf_settings():
+    global PDF_RECLASSIFY, PDF_WORKERS, PDF_BODY_IGNORE_KEYWORDS
+    PDF_RECLASSIFY = os.getenv("PDF_RECLASSIFY", "0").strip().lower() in ("1", "true", "yes", "on")
+    try:
+        PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+    except ValueError:
+        PDF_WORKERS = 2
+    PDF_BODY_IGNORE_KEYWORDS = [k.strip().lower() for k in os.getenv("PDF_BODY_IGNORE_KEYWORDS", _PDF_BODY_IGNORE_DEFAULT).split(",")
+                                if k.strip()]
+
+
+_ATTACHMENT_STORES = {}
+_ATTACHMENT_EXECUTOR = None
+_ATTACHMENT_PENDING = set()
+_PDF_EXECUTOR = None
+
+
+def get_attachment_store():
+    """Return the AttachmentStore for ATTACHMENT_DIR, or None when prefetching is off."""
+    if not ATTACHMENT_DIR:
+        return None
+    store = _ATTACHMENT_STORES.get(ATTACHMENT_DIR)
+    if store is None:
+        from attachments import AttachmentStore
+
+        store = AttachmentStore(ATTACHMENT_DIR)
+        _ATTACHMENT_STORES[ATTACHMENT_DIR] = store
+    return store
+
+
+def download_attachment(rec, store=None, dispatcher=None):
+    """Stream the attachment of `rec` into the attachment store. With PDF_RECLASSIFY an
+    upgrade alert goes through `dispatcher` (the poll's Telegram queue) when given.
+
+    Returns the outcome: "stored", "duplicate" (same content already stored under another
+    URL), "cached" (URL already downloaded), "too_large", "failed" or "skipped".
+    """
+    from attachments import AttachmentTooLarge
+
+    store = store or get_attachment_store()
+    url = rec.get("pdf") or ""
+    if store is None or not _looks_like_attachment(url):
+        return "skipped"
+    cap = int(ATTACHMENT_MAX_MB * 1024 * 1024)
+    if store.lookup(url):
+        outcome = "cached"
+    elif (rec.get("attachsize") or 0) > cap:
+        outcome = "too_large"
+    else:
+        try:
+            with METRICS.span("attachment"):
+                # the shared fetch path: retries, the host's circuit breaker, and in replay
+                # mode the response cache instead of the network
+                r = fetch_with_retries(url, headers=HEADERS, timeout=ATTACHMENT_TIMEOUT, max_attempts=2,
+                                       deadline=ATTACHMENT_TIMEOUT, stream=True)
+                try:
+                    length = str(r.headers.get("Content-Length") or "")
+                    if r.status_code != 200:
+                        raise Exception(f"HTTP {r.status_code}")
+                    if length.isdigit() and int(length) > cap:
+                        raise AttachmentTooLarge(f"Content-Length {length}")
+                    entry, duplicate = store.put_stream(
+                        url, r.iter_content(chunk_size=max(1, ATTACHMENT_CHUNK_KB) * 1024), max_bytes=cap)
+                finally:
+                    r.close()
+            outcome = "duplicate" if duplicate else "stored"
+            print(f"📎 Prefetched {rec.get('scrip')} attachment ({entry['size']} bytes, {outcome}): {entry['path']}")
+        except AttachmentTooLarge:
+            outcome = "too_large"
+        except Exception as exc:
+            print(f"⚠️ Attachment prefetch failed for {url}: {exc}")
+            outcome = "failed"
+    if outcome == "too_large":
+        print(f"ℹ️ Not prefetching {url}: larger than {ATTACHMENT_MAX_MB:g} MB")
+    METRICS.inc("attachments", outcome=outcome)
+    if PDF_RECLASSIFY and outcome in ("stored", "duplicate", "cached"):
+        try:
+            reclassify_from_attachment(rec, store.lookup(url), store, dispatcher=dispatcher)
+        except Exception as exc:
+            print(f"⚠️ Attachment re-classification failed for {url}: {exc}")
+    return outcome
+
+
+def attachment_text(entry, store):
+    """Text of a stored attachment, extracted in the PDF process pool once per file hash."""
+    text = store.get_text(entry["sha256"])
+    if text is not None:
+        METRICS.inc("pdf_text", outcome="cached")
+        return text
+    global _PDF_EXECUTOR
+    import pdf_text
+
+    if _PDF_EXECUTOR is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # spawn: the parent has threads running, which fork does not mix well with
+        _PDF_EXECUTOR = ProcessPoolExecutor(max_workers=max(1, PDF_WORKERS), mp_context=multiprocessing.get_context("spawn"))
+    try:
+        with METRICS.span("extract"):
+            text = _PDF_EXECUTOR.submit(pdf_text.extract_text, os.path.join(store.root, entry["path"])).result(timeout=ATTACHMENT_TIMEOUT)
+        METRICS.inc("pdf_text", outcome="extracted")
     except Exception as exc:
-        print(f"❌ Telegram send failed: {exc}")
+        # cache the failure too: the same file would fail the same way next time
+        print(f"⚠️ Text extraction failed for {entry['path']}: {exc}")
+        METRICS.inc("pdf_text", outcome="failed")
+        text = ""
+    store.put_text(entry["sha256"], text)
+    return text
+
+
+def reclassify_from_attachment(rec, entry, store, dispatcher=None):
+    """Classify the attachment text of `rec`; send an upgrade alert when it rates higher
+    than the title did. Returns the (emoji, tag) of the upgrade, or None.
+
+    Each announcement is upgraded at most once: an "<announcement key>#upgraded" entry in
+    the seen index is claimed before sending, so a later "cached" or "duplicate" download
+    of the same filing does not alert again. With a `dispatcher` the alert is queued and
+    flushed like the poll's own alerts; otherwise it goes out through send_telegram."""
+    if not entry or not entry["path"].lower().endswith(".pdf"):
+        return None
+    text = attachment_text(entry, store)
+    if not text:
+        return None
+    title_emoji, _ = classify(rec["title"])
+    emoji, tag = classify_body(text)
+    if _severity_rank(emoji) <= _severity_rank(title_emoji):
+        return None
+    if not get_seen_index().add(announcement_key(rec) + "#upgraded", rec["scrip"], tag):
+        return None
+    severity = _SEVERITY_BY_EMOJI[emoji]
+    targets = get_subscriber_index().route(rec, severity)
+    print(f"⬆️ {rec['scrip']}: attachment text raises {title_emoji or 'ignored'} -> {tag}; alerting {len(targets)} chat(s)")
+    METRICS.inc("upgrades", tag=tag)
+    message = f"⬆️ Upgraded to {tag} from the attachment text\n" + format_announcement_message(rec, emoji)
+    if dispatcher is not None:
+        for target in targets:
+            if target["chat_id"] is None:
+                print("⚠️ send_telegram: missing BOT_TOKEN or CHAT_ID; message not sent")
+                continue
+            dispatcher.enqueue(target["chat_id"], message)
+        _run_sync(dispatcher.flush())
+        return emoji, tag
+    for target in targets:
+        send_telegram(message, chat_id=target["chat_id"])
+    return emoji, tag
+
+
+def prefetch_attachments(records, dispatcher=None):
+    """Queue background downloads of the records' attachments; returns the futures.
+    `dispatcher` is the Telegram queue any upgrade alerts go through (see download_attachment)."""
+    global _ATTACHMENT_EXECUTOR
+    if get_attachment_store() is None:
+        return []
+    if _ATTACHMENT_EXECUTOR is None:
+        _ATTACHMENT_EXECUTOR = ThreadPoolExecutor(max_workers=max(1, ATTACHMENT_WORKERS), thread_name_prefix="attach")
+    futures = []
+    for rec in records:
+        if _looks_like_attachment(rec.get("pdf")):
+            future = _ATTACHMENT_EXECUTOR.submit(download_attachment, dict(rec), dispatcher=dispatcher)
+            _ATTACHMENT_PENDING.add(future)
+            future.add_done_callback(_ATTACHMENT_PENDING.discard)
+            futures.append(future)
+    return futures
+
+
+def wait_for_attachments(timeout=None):
+    """Wait up to `timeout` seconds for queued attachment downloads; True if all finished."""
+    import concurrent.futures
+
+    pending = list(_ATTACHMENT_PENDING)
+    if not pending:
+        return True
+    print(f"📎 Waiting for {len(pending)} attachment download(s)")
+    _, not_done = concurrent.futures.wait(pending, timeout=timeout)
+    return not not_done
+
 
 def load_last_seen():
     try:
-        with open(STATE_FILE, "r", encoding="utf-8") as f:
+        with METRICS.span("state_io", op="load"), open(STATE_FILE, "r", encoding="utf-8") as f:
             return json.load(f)
     except Exception:
         return {}
 
 def save_last_seen(data):
-    # write JSON using UTF-8 and preserve unicode characters (emojis)
-    with open(STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # write JSON using UTF-8 and preserve unicode characters (emojis);
+    # write to a temp file and rename so a crash never leaves a half-written state file
+    tmp = f"{STATE_FILE}.{os.getpid()}.tmp"
+    with METRICS.span("state_io", op="save"):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, STATE_FILE)
 
 
 def _today_date_str():
@@ -413,6 +2153,7 @@ def send_nohit_notification(message):
     # If running under pytest or FORCE_SEND is enabled, always send immediately
     if os.getenv("PYTEST_CURRENT_TEST") or FORCE_SEND:
         print("ℹ️ Test/force mode detected — sending no-hit message immediately")
+        METRICS.inc("nohit", outcome="sent")
         send_telegram(message)
         # record both slots as today's notification to avoid duplicates
         nohit["morning"] = today
@@ -427,14 +2168,17 @@ def send_nohit_notification(message):
     if not slot:
         # not a notify time — do nothing
         print(f"ℹ️ No-hit detected but not notify hour (hour={hour}); suppressed message")
+        METRICS.inc("nohit", outcome="suppressed_hour")
         return
 
     nohit = state.get("nohit_notified", {})
     if nohit.get(slot) == today:
         print(f"ℹ️ No-hit {slot} already notified today ({today}); suppressed duplicate")
+        METRICS.inc("nohit", outcome="suppressed_duplicate")
         return
 
     # Send and record
+    METRICS.inc("nohit", outcome="sent")
     send_telegram(message)
     nohit[slot] = today
     state["nohit_notified"] = nohit
@@ -443,182 +2187,235 @@ def send_nohit_notification(message):
     except Exception:
         print("⚠️ Failed to persist no-hit notification state")
 
+# Keyword matching is compiled once into a single trie-shaped regex (shared prefixes are
+# merged, so the regex engine branches on one character at a time instead of trying every
+# keyword). The scan restarts one character after each match start, so overlapping keywords
+# are all found in one pass; at each position the longest keyword wins and every keyword
+# contained in it is implied (e.g. "demerger" also implies "merger"). Matching stays
+# substring-based, exactly like the original `k in text` checks.
+_KEYWORD_MATCHER = None
+
+
+def _trie_regex(words):
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def _build(node):
+        branches = [re.escape(ch) + _build(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # a keyword ends here: the longer continuation is optional (and tried first)
+        return f"(?:{body})?" if "" in node else body
+
+    return _build(trie)
+
+
+def _build_keyword_matcher():
+    vocab = set(CRITICAL_KEYWORDS) | set(IMPORTANT_KEYWORDS) | set(IGNORE_KEYWORDS)
+    for words, _ in COMBINATION_RULES:
+        vocab.update(words)
+    vocab = sorted(w for w in vocab if w)
+    implied = {w: frozenset(v for v in vocab if v in w) for w in vocab}
+    pattern = re.compile(_trie_regex(vocab)) if vocab else None
+    return {
+        "signature": _keyword_signature(),
+        "pattern": pattern,
+        "word_pattern": re.compile(r"\b(?:" + _trie_regex(vocab) + r")\b") if vocab else None,
+        "implied": implied,
+        "critical": frozenset(CRITICAL_KEYWORDS),
+        "important": frozenset(IMPORTANT_KEYWORDS),
+        "ignore": frozenset(IGNORE_KEYWORDS),
+        "rules": [(frozenset(words), words, label) for words, label in COMBINATION_RULES],
+    }
+
+
+def _keyword_signature():
+    return (tuple(CRITICAL_KEYWORDS), tuple(IMPORTANT_KEYWORDS), tuple(IGNORE_KEYWORDS),
+            tuple((tuple(words), label) for words, label in COMBINATION_RULES))
+
+
+def _keyword_matcher():
+    """Return the compiled matcher, rebuilding it if the keyword lists were changed."""
+    global _KEYWORD_MATCHER
+    signature = _keyword_signature()
+    if _KEYWORD_MATCHER is None or _KEYWORD_MATCHER["signature"] != signature:
+        _KEYWORD_MATCHER = _build_keyword_matcher()
+    return _KEYWORD_MATCHER
+
+
+def keyword_hits(text, matcher=None):
+    """Return the set of keywords that occur anywhere in lowercased `text`."""
+    matcher = matcher or _keyword_matcher()
+    if not text or matcher["pattern"] is None:
+        return set()
+    text = text.lower()
+    search = matcher["pattern"].search
+    implied = matcher["implied"]
+    hits = set()
+    pos = 0
+    while True:
+        m = search(text, pos)
+        if not m:
+            return hits
+        hits.update(implied[m.group()])
+        pos = m.start() + 1
+
+
+def keyword_positions(text, matcher=None):
+    """Return {keyword: [offsets]} for keywords occurring as whole words in lowercased `text`."""
+    matcher = matcher or _keyword_matcher()
+    positions = {}
+    if not text or matcher["word_pattern"] is None:
+        return positions
+    for m in matcher["word_pattern"].finditer(text.lower()):
+        positions.setdefault(m.group(), []).append(m.start())
+    return positions
+
+
 def classify(title):
-    text = title.lower()
+    matcher = _keyword_matcher()
+    return _classify_hits(keyword_hits(title, matcher), matcher)
+
 
-    for words, label in COMBINATION_RULES:
-        if all(w in text for w in words):
+def _classify_hits(hits, matcher, where="title", rules=True):
+    for required, words, label in matcher["rules"] if rules else ():
+        if required <= hits:
             print(f"🔎 classify: matched combination rule {words} -> {label}")
             return "🚨", label
 
-    if any(k in text for k in CRITICAL_KEYWORDS):
-        print(f"🔎 classify: matched CRITICAL keyword in title")
+    if hits & matcher["critical"]:
+        print(f"🔎 classify: matched CRITICAL keyword in {where}")
         return "🚨", "CRITICAL"
 
-    if any(k in text for k in IMPORTANT_KEYWORDS):
-        print(f"🔎 classify: matched IMPORTANT keyword in title")
+    if hits & matcher["important"]:
+        print(f"🔎 classify: matched IMPORTANT keyword in {where}")
         return "⚠️", "IMPORTANT"
 
-    if any(k in text for k in IGNORE_KEYWORDS):
-        print(f"🔎 classify: matched IGNORE keyword in title; will skip")
+    if hits & matcher["ignore"]:
+        print(f"🔎 classify: matched IGNORE keyword in {where}; will skip")
         return None, None
 
     print(f"🔎 classify: no keywords matched; defaulting to INFO")
     return "ℹ️", "INFO"
 
-def check_bse():
-    print("🔍 Fetching BSE announcements...")
-    # Try API-first
-    api_row = get_latest_announcement_from_api()
-    if api_row:
-        date = api_row["date"]
-        scrip = api_row["scrip"]
-        title = api_row["title"]
-        pdf = api_row["pdf"]
-        current = {"date": date, "scrip": scrip, "title": title, "pdf": pdf}
-        print(f"ℹ️ Latest announcement (from API): {scrip} - {title[:80]}")
-    else:
-        try:
-            r = fetch_with_retries(BSE_URL, headers=HEADERS, timeout=20, max_attempts=5, backoff_factor=1)
-            soup = BeautifulSoup(r.text, "html.parser")
-        except Exception as exc:
-            print(f"❌ Error fetching BSE page after retries: {exc}")
-            tracked = get_tracked_display()
-            message = f"No New anouncement for NSE Symbol : {tracked}"
-            send_nohit_notification(message)
-            return
 
-        table = soup.find("table")
-        if not table:
-            print("⚠️ No table found on BSE page")
-            tracked = get_tracked_display()
-            message = f"No New anouncement for NSE Symbol : {tracked}"
-            send_nohit_notification(message)
-            return
+def classify_body(text):
+    """classify() for the text of an attachment. Keywords count only as whole words, a
+    combination rule needs its words within PDF_RULE_WINDOW characters of each other, and
+    PDF_BODY_IGNORE_KEYWORDS do not count on their own. Negated mentions are skipped."""
+    matcher = _keyword_matcher()
+    lowered = (text or "").lower()
+    positions = {}
+    for word, offsets in keyword_positions(lowered, matcher).items():
+        kept = [p for p in offsets if not _NEGATED_RE.search(lowered, max(0, p - 40), p)]
+        if kept:
+            positions[word] = kept
+    for required, words, label in matcher["rules"]:
+        if required <= positions.keys() and _words_near(positions, words, PDF_RULE_WINDOW):
+            print(f"🔎 classify: matched combination rule {words} in attachment -> {label}")
+            return "🚨", label
+    hits = set(positions) - set(PDF_BODY_IGNORE_KEYWORDS)
+    return _classify_hits(hits, matcher, where="attachment", rules=False)
 
-        rows = table.find_all("tr")
-        print(f"ℹ️ Found {len(rows)} rows in announcements table")
 
-        # find the first row that looks like an announcement (has at least 3 columns)
-        target_row = None
-        for r in rows[1:]:
-            cols = r.find_all("td")
-            if len(cols) >= 3:
-                target_row = r
-                break
+def _words_near(positions, words, window):
+    """True when every one of `words` occurs within `window` characters of one occurrence of the first."""
+    first, others = words[0], words[1:]
+    return any(all(any(abs(p - q) <= window for q in positions[w]) for w in others) for p in positions[first])
 
-        if not target_row:
-            print("⚠️ No suitable announcement row found")
-            tracked = get_tracked_display()
-            message = f"No New anouncement for NSE Symbol : {tracked}"
-            send_nohit_notification(message)
-            return
 
-        cols = target_row.find_all("td")
-        print(f"ℹ️ Found {len(cols)} columns in selected announcement row")
-
-        # Table layouts vary. Find the most likely title cell and any numeric scrip code inside the row.
-        col_texts = [c.get_text(" ", strip=True) for c in cols]
-        # Choose title candidate as the longest text column
-        title_idx = max(range(len(col_texts)), key=lambda i: len(col_texts[i]))
-        title = col_texts[title_idx]
-        # Try to find a 5-6 digit scrip code anywhere in the columns or title
-        scrip = ""
-        for txt in col_texts:
-            m = re.search(r"\b(\d{5,6})\b", txt)
-            if m:
-                scrip = m.group(1)
-                break
-        # If no numeric scrip found, fall back to common scrip column (index 1)
-        if not scrip and len(col_texts) > 1:
-            scrip = col_texts[1]
-        # Attempt to find a pdf link in any column
-        pdf = ""
-        for c in cols:
-            a = c.find("a")
-            if a and a.get("href"):
-                pdf = a.get("href")
-                break
-        # If the found link is not an actual attachment, try XBRL AttachmentURL for the scrip
-        if not _looks_like_attachment(pdf):
-            try:
-                pdf_x = _fetch_xbrl_attachment_for_scrip(scrip, api_headers=api_headers if 'api_headers' in globals() else None)
-                if pdf_x:
-                    pdf = pdf_x
-            except Exception:
-                pass
-        # Date: try to parse a date-like token from any column or from subsequent rows
-        date = ""
-        date_re = re.compile(r"\d{2}-\d{2}-\d{4}")
-        for txt in col_texts:
-            dm = date_re.search(txt)
-            if dm:
-                date = dm.group(0)
-                break
-        if not date:
-            # Look ahead a couple of rows for Exchange Received Time
-            next_rows = rows[rows.index(target_row) + 1: rows.index(target_row) + 4]
-            for nr in next_rows:
-                dm = date_re.search(nr.get_text())
-                if dm:
-                    date = dm.group(0)
-                    break
+def _severity_rank(emoji):
+    """Ordering of classify() results: ignored < INFO < IMPORTANT < CRITICAL."""
+    return SEVERITY_LEVELS[_SEVERITY_BY_EMOJI[emoji]] if emoji in _SEVERITY_BY_EMOJI else -1
 
-        current = {"date": date, "scrip": scrip, "title": title, "pdf": pdf}
-        print(f"ℹ️ Latest announcement: {scrip} - {title[:80]}")
+# Dispatched announcement keys live in a SQLite seen-index next to the state file
+# (override the path with SEEN_DB_FILE). Entries expire after SEEN_TTL_DAYS (default 30).
+@settings_loader
+def _load_seen_index_settings():
+    global SEEN_DB_FILE, SEEN_TTL_DAYS
+    SEEN_DB_FILE = os.getenv("SEEN_DB_FILE")
+    try:
+        SEEN_TTL_DAYS = float(os.getenv("SEEN_TTL_DAYS", "30"))
+    except ValueError:
+        SEEN_TTL_DAYS = 30.0
 
 
-    # Quick guard: detect templated / placeholder content (e.g., server-side templates left in HTML)
-    def is_templated(text):
-        if not text:
-            return False
-        # Common markers observed: `{{ ... }}` templates and identifiers like 'CorpannData' or 'cann.'
-        templ_markers = ["{{", "}}", "CorpannData", "cann.", "CorpannData.Table"]
-        for m in templ_markers:
-            if m in text:
-                return True
-        return False
+_SEEN_INDEXES = {}
 
-    if is_templated(date) or is_templated(scrip) or is_templated(title) or is_templated(pdf):
-        print("⚠️ Templated content detected in scraped fields; sending 'no updates' message and updating state")
-        tracked = get_tracked_display()
-        message = f"No New anouncement for NSE Symbol : {tracked}"
-        send_nohit_notification(message)
-        save_last_seen(current)
-        return
 
-    # Only care about our tracked scrip(s). If latest announcement is not about any of them, send a 'no updates' message.
-    tracked_names = TRACKED_SCRIP_LIST if 'TRACKED_SCRIP_LIST' in globals() else []
-    scrip_upper = (scrip or "").upper()
-    title_upper = (title or "").upper()
+def _seen_index_path():
+    if SEEN_DB_FILE:
+        return SEEN_DB_FILE
+    return os.path.join(os.path.dirname(os.path.abspath(STATE_FILE)), "seen_index.sqlite3")
 
-    # Helper: split text into 'word' tokens and match tracked names exactly (avoid substring false-positives)
-    def _tokens(text):
-        return re.findall(r"\w+", (text or "").upper())
 
-    is_for_tracked = any((t in _tokens(scrip_upper)) or (t in _tokens(title_upper)) for t in tracked_names) if tracked_names else False
+def get_seen_index():
+    """Return the SeenIndex for the current state location, opening it on first use.
 
-    tracked = get_tracked_display()
+    Keys found under `seen` in an older last_seen.json are imported once.
+    """
+    path = _seen_index_path()
+    index = _SEEN_INDEXES.get(path)
+    if index is None:
+        from seen_index import SeenIndex
 
-    if not is_for_tracked:
-        message = f"No New anouncement for NSE Symbol : {tracked}"
-        send_nohit_notification(message)
-        return
+        index = SeenIndex(path, ttl_seconds=SEEN_TTL_DAYS * 86400)
+        _SEEN_INDEXES[path] = index
+        legacy = (load_last_seen() or {}).get("seen")
+        if legacy:
+            index.add_many((k, "", "") for k in legacy)
+            print(f"ℹ️ Imported {len(legacy)} seen keys from {STATE_FILE} into {path}")
+    return index
 
-    if current == load_last_seen() and not FORCE_SEND:
-        message = f"No New anouncement for NSE Symbol : {tracked}"
-        send_nohit_notification(message)
-        return
-    if FORCE_SEND and current == load_last_seen():
-        print("⚠️ FORCE_SEND enabled — overriding last_seen and forcing send")
 
-    emoji, tag = classify(title)
-    print(f"ℹ️ Classification result: emoji={emoji} tag={tag}")
-    if not emoji:
-        print("ℹ️ Announcement ignored by keyword filters; updating state and exiting")
-        save_last_seen(current)
-        return
+def announcement_key(rec):
+    """Return a stable identity for an announcement: its NEWSID when known, else a hash."""
+    newsid = str(rec.get("newsid") or "").strip()
+    if newsid:
+        return f"id:{newsid}"
+    raw = "|".join(str(rec.get(k) or "").strip() for k in ("scrip", "date", "title"))
+    return "h:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _record_fields(rec):
+    return {k: rec.get(k) for k in ("date", "scrip", "title", "pdf")}
 
+
+def _next_state(state, records):
+    """Build the last_seen.json contents after dispatching `records` (newest first)."""
+    new_state = _record_fields(records[0])
+    if state.get("nohit_notified"):
+        new_state["nohit_notified"] = state["nohit_notified"]
+    return new_state
+
+
+def _is_templated(text):
+    if not text:
+        return False
+    # Common markers observed: `{{ ... }}` templates and identifiers like 'CorpannData' or 'cann.'
+    templ_markers = ["{{", "}}", "CorpannData", "cann.", "CorpannData.Table"]
+    for m in templ_markers:
+        if m in text:
+            return True
+    return False
+
+
+def _is_templated_record(rec):
+    return any(_is_templated(rec.get(k)) for k in ("date", "scrip", "title", "pdf"))
+
+
+def _is_for_tracked(rec):
+    """True when the record's scrip or title contains a watched symbol (or its scrip code) as a whole word."""
+    # word tokens are matched against tracked names exactly (avoid substring false-positives)
+    return get_tracked_matcher().match_record(rec)
+
+
+def format_announcement_message(rec, emoji):
     # Message format per request:
     # Scrip Name : Announcement
     # ---
@@ -628,26 +2425,376 @@ def check_bse():
     # ---
     # Link :
     prefix = f"{emoji} " if emoji else ""
-    header = f"{prefix}{scrip} : Announcement"
+    header = f"{prefix}{rec['scrip']} : Announcement"
     message = (
         f"{header}\n"
         f"---\n"
-        f"Date : {date}\n"
+        f"Date : {rec['date']}\n"
         f"---\n"
-        f"Title : {title}\n"
+        f"Title : {rec['title']}\n"
         f"---\n"
-        f"Link : {pdf}"
+        f"Link : {rec['pdf']}"
     )
-
     # Temporary: inject a test emoji when title mentions LODR so we can verify emoji rendering.
     # Controlled by TEMP_LODR_TEST and TEMP_LODR_EMOJI env vars; this is intended to be removed later.
-    message = inject_lodr_test_emoji(title, message)
+    return inject_lodr_test_emoji(rec["title"], message)
 
-    print(f"📨 Payload: {message}")
-    print("📨 Sending Telegram message...")
-    send_telegram(message)
+
+_HTML_DATE_RE = re.compile(r"\d{2}-\d{2}-\d{4}")
+
+
+def parse_html_announcement(html):
+    """Extract the latest announcement {date, scrip, title, pdf} from the ann.html page.
+
+    The first table is read with the streaming ann_html parser. Reading stops once the
+    announcement row is found, plus up to three following rows when its date has to be
+    looked up there. A templated row (unbound `{{CorpannData...}}` placeholders) stops
+    reading right away. Returns None when the page has no usable announcement row.
+    """
+    from ann_html import AnnouncementTableParser, iter_table_rows
+
+    parser = AnnouncementTableParser()
+    target = None
+    date = ""
+    seen = 0
+    lookahead = 0
+    for row in iter_table_rows(html, parser):
+        seen += 1
+        if target is None:
+            # the first row is the header; the announcement is the first row with >= 3 columns
+            if seen == 1 or len(row["cells"]) < 3:
+                continue
+            target = row
+            for txt in row["cells"]:
+                dm = _HTML_DATE_RE.search(txt)
+                if dm:
+                    date = dm.group(0)
+                    break
+            if date or row["templated"]:
+                break
+            continue
+        # Look ahead a couple of rows for Exchange Received Time
+        lookahead += 1
+        dm = _HTML_DATE_RE.search(row["text"])
+        if dm:
+            date = dm.group(0)
+            break
+        if lookahead >= 3:
+            break
+
+    if not parser.saw_table:
+        print("⚠️ No table found on BSE page")
+        return None
+    print(f"ℹ️ Read {seen} rows of announcements table")
+    if target is None:
+        print("⚠️ No suitable announcement row found")
+        return None
+
+    col_texts = target["cells"]
+    print(f"ℹ️ Found {len(col_texts)} columns in selected announcement row")
+    # Table layouts vary. Choose title candidate as the longest text column
+    title = max(col_texts, key=len)
+    # Try to find a 5-6 digit scrip code anywhere in the columns or title
+    scrip = ""
+    for txt in col_texts:
+        m = re.search(r"\b(\d{5,6})\b", txt)
+        if m:
+            scrip = m.group(1)
+            break
+    # If no numeric scrip found, fall back to common scrip column (index 1)
+    if not scrip and len(col_texts) > 1:
+        scrip = col_texts[1]
+    # First link in any column
+    pdf = next((href for href in target["links"] if href), "")
+    return {"date": date, "scrip": scrip, "title": title, "pdf": pdf}
+
+
+async def async_check_bse(get_rows=None, send=None, fetch=None):
+    """One poll: fetch, match, dedupe, classify and dispatch.
+
+    `get_rows` and `fetch` default to the native async implementations and alerts go
+    through the TelegramDispatcher queue. check_bse() passes adapters over the synchronous
+    module functions instead, with `send` delivering each alert as its own message.
+    The poll is timed as the "poll" span and METRICS_FILE is rewritten afterwards. All of
+    its fetches share the RUN_DEADLINE budget. The API poll state is saved only after
+    dispatch.
+    """
+    global _RUN_DEADLINE_AT
+    owns_deadline = _RUN_DEADLINE_AT is None and RUN_DEADLINE > 0
+    if owns_deadline:
+        _RUN_DEADLINE_AT = time.monotonic() + RUN_DEADLINE
+    try:
+        with METRICS.span("poll"):
+            result = await _async_check_bse(get_rows, send, fetch)
+        # the API high-water mark only moves once this poll's alerts are out
+        commit_api_poll_state()
+        return result
+    finally:
+        if owns_deadline:
+            _RUN_DEADLINE_AT = None
+        METRICS.inc("polls")
+        write_metrics()
+
+
+async def _async_check_bse(get_rows, send, fetch):
+    get_rows = get_rows or functools.partial(async_get_announcements_from_api, incremental=True)
+    fetch = fetch or async_fetch_with_retries
+    dispatcher = get_telegram_dispatcher() if send is None and BOT_TOKEN else None
+    if dispatcher is not None and len(dispatcher):
+        # Retry whatever an earlier poll could not deliver before looking for new alerts
+        print(f"📨 Retrying {len(dispatcher)} queued Telegram message(s)")
+        await dispatcher.flush()
+    send = send or async_send_telegram
+
+    async def _nohit():
+        message = f"No New anouncement for NSE Symbol : {get_tracked_display()}"
+        await asyncio.to_thread(send_nohit_notification, message)
+
+    print("🔍 Fetching BSE announcements...")
+    # Try API-first
+    api_rows = await get_rows()
+    if api_rows == []:
+        # API answered but nothing changed since the previous poll
+        await _nohit()
+        return
+    if api_rows:
+        records = [dict(rec) for rec in api_rows]
+        for rec in records:
+            print(f"ℹ️ Announcement (from API): {rec['scrip']} - {rec['title'][:80]}")
+    else:
+        try:
+            r = await fetch(BSE_URL, headers=HEADERS, timeout=20, max_attempts=5, backoff_factor=1)
+        except Exception as exc:
+            print(f"❌ Error fetching BSE page after retries: {exc}")
+            await _nohit()
+            return
+
+        with METRICS.span("parse", kind="ann_html"):
+            current = parse_html_announcement(r.text)
+        if current is None:
+            await _nohit()
+            return
+        # If the found link is not an actual attachment, try XBRL AttachmentURL for the scrip
+        if not _looks_like_attachment(current["pdf"]) and not _is_templated_record(current):
+            try:
+                pdf_x = await async_fetch_xbrl_attachment_for_scrip(current["scrip"], fetch=fetch)
+                if pdf_x:
+                    current["pdf"] = pdf_x
+            except Exception:
+                pass
+        print(f"ℹ️ Latest announcement: {current['scrip']} - {current['title'][:80]}")
+        records = [current]
+
+    # Quick guard: detect templated / placeholder content (e.g., server-side templates left in HTML)
+    templated = [rec for rec in records if _is_templated_record(rec)]
+    if templated:
+        records = [rec for rec in records if rec not in templated]
+    if templated and not records:
+        # the placeholder page is never saved as state: it is not an announcement, and
+        # saving it would drop nohit_notified and repeat the 'no updates' message
+        print("⚠️ Templated content detected in scraped fields; sending 'no updates' message and keeping state")
+        await _nohit()
+        return
+
+    # Only care about our tracked scrip(s). If no announcement is about any of them, send a 'no updates' message.
+    tracked_records = [rec for rec in records if _is_for_tracked(rec)]
+    if not tracked_records:
+        await _nohit()
+        return
+
+    # Dedupe against the seen-index: skip anything already dispatched in an earlier run
+    state = load_last_seen() or {}
+    last = _record_fields(state)
+    index = get_seen_index()
+    with METRICS.span("state_io", op="seen_filter"):
+        fresh_keys = set(index.filter_new(announcement_key(rec) for rec in tracked_records))
+    new_records = [rec for rec in tracked_records
+                   if announcement_key(rec) in fresh_keys and _record_fields(rec) != last]
+    METRICS.inc("already_seen", len(tracked_records) - len(new_records))
+    if not new_records:
+        if not FORCE_SEND:
+            await _nohit()
+            return
+        print("⚠️ FORCE_SEND enabled — overriding last_seen and forcing send")
+        new_records = tracked_records
+
+    # Dispatch oldest first so the chat reads chronologically. Each key is claimed in the
+    # index before sending so a concurrent run cannot alert on the same announcement.
+    # Every announcement is classified and formatted once, then routed to its subscribers.
+    subscribers = get_subscriber_index()
+    messages = []
+    alerted = []
+    quiet = []
+    for rec in reversed(new_records):
+        if not index.add(announcement_key(rec), rec["scrip"], rec["title"]) and not FORCE_SEND:
+            print(f"ℹ️ {rec['scrip']} already dispatched by another run; skipping")
+            continue
+        with METRICS.span("classify"):
+            emoji, tag = classify(rec["title"])
+        METRICS.inc("classified", tag=tag or "IGNORED")
+        print(f"ℹ️ Classification result for {rec['scrip']}: emoji={emoji} tag={tag}")
+        if not emoji:
+            print("ℹ️ Announcement ignored by keyword filters; marking as seen")
+            quiet.append(rec)
+            continue
+        targets = subscribers.route(rec, _SEVERITY_BY_EMOJI.get(emoji, "INFO"))
+        if not targets:
+            print(f"ℹ️ {tag} is below every matching subscriber's threshold; marking as seen")
+            quiet.append(rec)
+            continue
+        messages.append((format_announcement_message(rec, emoji), [t["chat_id"] for t in targets]))
+        alerted.append(rec)
+
+    async def _send_in_order():
+        if dispatcher is not None:
+            for message, chats in messages:
+                print(f"📨 Payload: {message}")
+                for chat_id in chats:
+                    if chat_id is None:
+                        print("⚠️ send_telegram: missing BOT_TOKEN or CHAT_ID; message not sent")
+                        continue
+                    dispatcher.enqueue(chat_id, message)
+            print(f"📨 Sending {len(messages)} alert(s) via Telegram queue...")
+            await dispatcher.flush()
+            return
+        for message, chats in messages:
+            print(f"📨 Payload: {message}")
+            print("📨 Sending Telegram message...")
+            for chat_id in chats:
+                await send(message, chat_id=chat_id)
+
+    # Telegram sends go out in order while state is persisted alongside them
+    sending = asyncio.ensure_future(_send_in_order())
     print("💾 Updating last_seen.json")
-    save_last_seen(current)
+    save_last_seen(_next_state(state, new_records))
+    try:
+        index.expire()
+    except Exception as exc:
+        print(f"⚠️ Failed to expire old seen-index entries: {exc}")
+    await sending
+    # attachments are fetched only once every alert is out, on their own threads; with
+    # PDF_RECLASSIFY the quiet ones too, as their body may still warrant an alert
+    prefetch_attachments(alerted + quiet if PDF_RECLASSIFY else alerted, dispatcher=dispatcher)
+
+
+def check_bse():
+    """Synchronous poll built on the module-level get_announcements_from_api,
+    send_telegram and fetch_with_retries (so replacing any of them takes effect)."""
+    return _run_sync(async_check_bse(
+        get_rows=lambda: asyncio.to_thread(get_announcements_from_api),
+        send=lambda msg, **kw: asyncio.to_thread(send_telegram, msg, **kw),
+        fetch=_fetch_via_sync,
+    ))
+
+
+# Daemon mode (`python bot.py --daemon`): keep the process warm and poll in a loop so the
+# HTTP pool, seen-index and config stay loaded between polls.
+# DAEMON_INTERVAL: seconds between polls outside market hours (default 300)
+# DAEMON_MARKET_INTERVAL: seconds between polls during MARKET_HOURS (default 60)
+# MARKET_HOURS: IST window for the tighter cadence, "HH:MM-HH:MM" (default 09:00-18:00)
+# DAEMON_JITTER: +/- fraction of the interval added at random (default 0.1)
+@settings_loader
+def _load_daemon_settings():
+    global DAEMON_INTERVAL, DAEMON_MARKET_INTERVAL, DAEMON_JITTER, MARKET_HOURS
+    try:
+        DAEMON_INTERVAL = float(os.getenv("DAEMON_INTERVAL", "300"))
+    except ValueError:
+        DAEMON_INTERVAL = 300.0
+    try:
+        DAEMON_MARKET_INTERVAL = float(os.getenv("DAEMON_MARKET_INTERVAL", "60"))
+    except ValueError:
+        DAEMON_MARKET_INTERVAL = 60.0
+    try:
+        DAEMON_JITTER = float(os.getenv("DAEMON_JITTER", "0.1"))
+    except ValueError:
+        DAEMON_JITTER = 0.1
+    MARKET_HOURS = os.getenv("MARKET_HOURS", "09:00-18:00")
+
+
+def _parse_market_hours(spec):
+    """Parse "HH:MM-HH:MM" into (start_minutes, end_minutes); falls back to 09:00-18:00."""
+    try:
+        start, end = spec.split("-", 1)
+        sh, sm = (int(x) for x in start.strip().split(":", 1))
+        eh, em = (int(x) for x in end.strip().split(":", 1))
+        return sh * 60 + sm, eh * 60 + em
+    except Exception:
+        return 9 * 60, 18 * 60
+
+
+def in_market_hours(now=None):
+    """True when `now` (aware datetime, default current time) falls inside MARKET_HOURS IST."""
+    now = (now or datetime.datetime.now(IST)).astimezone(IST)
+    start, end = _parse_market_hours(MARKET_HOURS)
+    minutes = now.hour * 60 + now.minute
+    return start <= minutes < end
+
+
+def next_poll_delay(now=None, rand=random.uniform):
+    """Seconds to wait before the next daemon poll, including jitter."""
+    base = DAEMON_MARKET_INTERVAL if in_market_hours(now) else DAEMON_INTERVAL
+    jitter = base * max(DAEMON_JITTER, 0)
+    return max(1.0, base + rand(-jitter, jitter))
+
+
+def poll_once():
+    """Run one poll on the native asyncio pipeline."""
+    return _run_sync(async_check_bse())
+
+
+def run_daemon(stop_event=None, max_ticks=None):
+    """Call poll_once() on a schedule until SIGTERM/SIGINT (or `stop_event`) stops it."""
+    stop_event = stop_event or threading.Event()
+
+    def _stop(signum, frame):
+        print(f"🛑 Received signal {signum}; finishing current poll and shutting down")
+        stop_event.set()
+
+    previous = {}
+    if threading.current_thread() is threading.main_thread():
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            previous[sig] = signal.signal(sig, _stop)
+
+    print("🚀 Daemon mode started")
+    ticks = 0
+    try:
+        while not stop_event.is_set():
+            try:
+                poll_once()
+            except Exception as exc:
+                print(f"❌ Poll failed: {exc}")
+            ticks += 1
+            if max_ticks is not None and ticks >= max_ticks:
+                break
+            delay = next_poll_delay()
+            print(f"💤 Next poll in {delay:.0f}s")
+            stop_event.wait(delay)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        close_http_session()
+        print("👋 Daemon stopped")
+
+
+def main(argv=None):
+    global DAEMON_INTERVAL, DAEMON_MARKET_INTERVAL
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Poll BSE announcements and alert on Telegram.")
+    parser.add_argument("--daemon", action="store_true", help="keep running and poll on a schedule")
+    parser.add_argument("--interval", type=float, help="seconds between polls outside market hours")
+    parser.add_argument("--market-interval", type=float, help="seconds between polls during market hours")
+    args = parser.parse_args(argv)
+    if args.interval:
+        DAEMON_INTERVAL = args.interval
+    if args.market_interval:
+        DAEMON_MARKET_INTERVAL = args.market_interval
+    if args.daemon:
+        run_daemon()
+    else:
+        poll_once()
+        wait_for_attachments(ATTACHMENT_TIMEOUT)
+
 
 if __name__ == "__main__":
-    check_bse()
+    main()
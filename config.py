@@ -0,0 +1,49 @@
+import os
+
+# .env files already applied by load_dotenv(): absolute path -> (mtime, {key: value})
+_LOADED = {}
+
+
+def read_dotenv(path=".env"):
+    """Parse KEY=VALUE lines from `path` (comments and blank lines skipped, surrounding
+    quotes stripped). Returns {} when the file does not exist."""
+    values = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#") or "=" not in line:
+                    continue
+                key, val = line.split("=", 1)
+                values[key.strip()] = val.strip().strip('"').strip("'")
+    except FileNotFoundError:
+        pass
+    return values
+
+
+def load_dotenv(path=".env", override=True, force=False):
+    """Apply `path` to os.environ (overriding existing values unless `override=False`).
+
+    Loading is explicit and cached: a file that was already applied and has not changed
+    since is not read again unless `force` is set. Returns the keys whose environment
+    value changed, so callers know whether settings derived from it must be re-read.
+    """
+    full = os.path.abspath(path)
+    try:
+        mtime = os.path.getmtime(full)
+    except OSError:
+        return []
+    cached = _LOADED.get(full)
+    if cached is not None and cached[0] == mtime and not force:
+        return []
+    values = read_dotenv(full)
+    changed = []
+    for key, val in values.items():
+        if not override and key in os.environ:
+            continue
+        if os.environ.get(key) != val:
+            os.environ[key] = val
+            changed.append(key)
+    _LOADED[full] = (mtime, values)
+    print(f"ℹ️ Loaded environment variables from {path}")
+    return changed
@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+
+# Histogram buckets (seconds) for span durations
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _NullSpan:
+    """Returned by a disabled Metrics: entering, leaving and labelling it do nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **labels):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "labels", "start")
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+
+    def set(self, **labels):
+        """Add labels known only once the span is running (e.g. an HTTP status)."""
+        self.labels.update(labels)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.labels.setdefault("error", exc_type.__name__)
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _prom_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Metrics:
+    """In-process counters and span timings for one bot process.
+
+    `span(name, **labels)` times a block into a histogram; `observe()` records a duration
+    measured by the caller; `inc(name, **labels)` bumps a counter. While `enabled` is
+    False each of these returns immediately (`span()` hands back a shared no-op object),
+    so instrumented code costs one attribute check. With a `log_stream`, every finished
+    span is also written to it as one JSON line. Results are exported with
+    `to_prometheus()` (text exposition format) or `snapshot()` / `write()`.
+    """
+
+    def __init__(self, enabled=False, log_stream=None, prefix="bse_bot", buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.log_stream = log_stream
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def span(self, name, **labels):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, labels)
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * len(self.buckets)}
+            hist["count"] += 1
+            hist["sum"] += seconds
+            hist["max"] = max(hist["max"], seconds)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    hist["buckets"][i] += 1
+        if self.log_stream is not None:
+            self.log("span", span=name, seconds=round(seconds, 6), **labels)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def log(self, event, **fields):
+        """Write one structured JSON log line to `log_stream` (when set)."""
+        if self.log_stream is None:
+            return
+        line = json.dumps(dict({"ts": round(time.time(), 3), "event": event}, **fields), ensure_ascii=False, default=str)
+        with self._lock:
+            self.log_stream.write(line + "\n")
+            self.log_stream.flush()
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started = time.time()
+
+    def counter(self, name, **labels):
+        """Current value of one counter (0 if never incremented)."""
+        with self._lock:
+            return self.counters.get(_key(name, labels), 0)
+
+    def snapshot(self):
+        """JSON-serialisable view: {"started", "counters": [...], "spans": [...]}."""
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            spans = [{"name": name, "labels": dict(labels), "count": h["count"], "sum": round(h["sum"], 6),
+                      "max": round(h["max"], 6), "mean": round(h["sum"] / h["count"], 6) if h["count"] else 0.0}
+                     for (name, labels), h in sorted(self.histograms.items())]
+        return {"started": self.started, "written": time.time(), "counters": counters, "spans": spans}
+
+    def to_prometheus(self):
+        """Prometheus text exposition: `<prefix>_<name>_total` counters and one
+        `<prefix>_span_seconds` histogram labelled by span."""
+        lines = []
+        with self._lock:
+            by_name = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                by_name.setdefault(name, []).append((labels, value))
+            for name, series in by_name.items():
+                metric = f"{self.prefix}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.extend(f"{metric}{_prom_labels(labels)} {value}" for labels, value in series)
+            if self.histograms:
+                metric = f"{self.prefix}_span_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for (name, labels), h in sorted(self.histograms.items()):
+                    base = (("span", name),) + labels
+                    for bound, count in zip(self.buckets, h["buckets"]):
+                        lines.append(f"{metric}_bucket{_prom_labels(base, (('le', repr(bound)),))} {count}")
+                    lines.append(f"{metric}_bucket{_prom_labels(base, (('le', '+Inf'),))} {h['count']}")
+                    lines.append(f"{metric}_sum{_prom_labels(base)} {h['sum']:.6f}")
+                    lines.append(f"{metric}_count{_prom_labels(base)} {h['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Atomically write the metrics to `path`: Prometheus text for *.prom, else JSON."""
+        text = self.to_prometheus() if path.endswith(".prom") else json.dumps(self.snapshot(), indent=2) + "\n"
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
@@ -0,0 +1,188 @@
+"""Plain-text extraction from PDF attachments.
+
+Uses pypdf when it is installed. Otherwise a small built-in extractor reads the text
+operators (Tj, TJ, ', ") of every content stream, inflating FlateDecode streams with
+zlib. That is enough for the text-based PDFs BSE filings are generated as; scanned
+images and fonts without a byte-to-text mapping yield little or no text.
+"""
+import re
+import zlib
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # optional dependency
+    PdfReader = None
+
+_STREAM_RE = re.compile(rb"stream\r?\n")
+_ESCAPES = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f",
+            ord("("): b"(", ord(")"): b")", ord("\\"): b"\\"}
+_DELIMITERS = b"()<>[]{}/%"
+_WHITESPACE = b" \t\r\n\f\x00"
+
+
+def extract_text(path):
+    """Return the text of the PDF at `path` with whitespace collapsed ("" if none)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if PdfReader is not None:
+        import io
+
+        try:
+            text = "\n".join(page.extract_text() or "" for page in PdfReader(io.BytesIO(data)).pages)
+            return " ".join(text.split())
+        except Exception:
+            pass  # fall back to the built-in extractor
+    return " ".join(extract_text_from_bytes(data).split())
+
+
+def extract_text_from_bytes(data):
+    """Built-in extractor: text shown by the content streams of PDF bytes `data`."""
+    parts = []
+    for m in _STREAM_RE.finditer(data):
+        end = data.find(b"endstream", m.end())
+        if end < 0:
+            break
+        header = data[data.rfind(b"obj", 0, m.start()) + 3:m.start()]
+        if b"/Image" in header or b"/FontFile" in header:
+            continue
+        body = data[m.end():end]
+        if b"/FlateDecode" in header:
+            try:
+                body = zlib.decompressobj().decompress(body)
+            except zlib.error:
+                continue
+        elif b"/Filter" in header:
+            continue  # other encodings (DCT, LZW, ...) do not carry text we can read
+        if b"BT" in body:
+            parts.append(_content_text(body))
+    return "\n".join(p for p in parts if p)
+
+
+def _content_text(content):
+    """Text of one content stream: strings shown between BT and ET, line breaks on moves."""
+    out = []
+    operands = []
+    in_text = False
+    for kind, value in _tokens(content):
+        if kind == "op":
+            if value == b"BT":
+                in_text, operands = True, []
+                continue
+            if value == b"ET":
+                in_text = False
+                out.append("\n")
+            elif in_text:
+                if value in (b"Tj", b"'", b'"') and operands:
+                    if value != b"Tj":
+                        out.append("\n")
+                    out.append(_decode(operands[-1]) if isinstance(operands[-1], bytes) else "")
+                elif value == b"TJ" and operands and isinstance(operands[-1], list):
+                    for item in operands[-1]:
+                        if isinstance(item, bytes):
+                            out.append(_decode(item))
+                        elif item < -200:  # a wide negative kern is a word gap
+                            out.append(" ")
+                elif value in (b"Td", b"TD", b"T*", b"Tm"):
+                    out.append("\n")
+            operands = []
+        else:
+            operands.append(value)
+    return "".join(out).strip()
+
+
+def _decode(raw):
+    # two-byte strings with a zero high byte are UTF-16BE (Identity-H fonts often are)
+    if len(raw) >= 2 and len(raw) % 2 == 0 and raw[0::2].count(0) == len(raw) // 2:
+        return raw.decode("utf-16-be", errors="ignore")
+    return raw.decode("latin-1")
+
+
+def _tokens(content):
+    """Yield ("str", bytes), ("num", float), ("arr", list), ("name", bytes) and ("op", bytes) tokens."""
+    i, n = 0, len(content)
+    stack = []
+    while i < n:
+        c = content[i]
+        if c in _WHITESPACE:
+            i += 1
+            continue
+        if c == ord("%"):
+            nl = content.find(b"\n", i)
+            i = n if nl < 0 else nl + 1
+            continue
+        if c == ord("("):
+            value, i = _literal(content, i + 1)
+            token = ("str", value)
+        elif c == ord("<") and content[i + 1:i + 2] != b"<":
+            close = content.find(b">", i)
+            close = n if close < 0 else close
+            hexdigits = re.sub(rb"[^0-9A-Fa-f]", b"", content[i + 1:close])
+            token = ("str", bytes.fromhex((hexdigits + b"0" * (len(hexdigits) % 2)).decode("ascii")))
+            i = close + 1
+        elif c == ord("["):
+            stack.append([])
+            i += 1
+            continue
+        elif c == ord("]"):
+            i += 1
+            if not stack:
+                continue
+            token = ("arr", stack.pop())
+        else:
+            if c == ord("/"):
+                j = i + 1
+            elif c in _DELIMITERS:  # "<<", ">>", braces, stray ")"
+                i += 1
+                continue
+            else:
+                j = i
+            while j < n and content[j] not in _WHITESPACE and content[j] not in _DELIMITERS:
+                j += 1
+            word, i = content[i:j], j
+            if word.startswith(b"/"):
+                token = ("name", word)
+            else:
+                try:
+                    token = ("num", float(word))
+                except ValueError:
+                    token = ("op", word)
+        if stack:
+            if token[0] in ("str", "num", "arr"):
+                stack[-1].append(token[1])
+            continue
+        yield token
+
+
+def _literal(content, i):
+    """Parse a literal string body starting after "(", returning (bytes, next index)."""
+    out = bytearray()
+    depth = 1
+    n = len(content)
+    while i < n:
+        c = content[i]
+        if c == ord("\\"):
+            nxt = content[i + 1:i + 2]
+            if not nxt:
+                break
+            if nxt[0] in _ESCAPES:
+                out += _ESCAPES[nxt[0]]
+                i += 2
+            elif nxt in b"01234567":
+                m = re.match(rb"[0-7]{1,3}", content[i + 1:i + 4])
+                out.append(int(m.group(), 8) & 0xFF)
+                i += 1 + len(m.group())
+            elif nxt in (b"\r", b"\n"):
+                i += 2 + (content[i + 1:i + 3] == b"\r\n")
+            else:
+                out += nxt
+                i += 2
+            continue
+        if c == ord("("):
+            depth += 1
+        elif c == ord(")"):
+            depth -= 1
+            if depth == 0:
+                return bytes(out), i + 1
+        out.append(c)
+        i += 1
+    return bytes(out), n
@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from urllib.parse import urlencode
+
+# Response headers worth keeping with a capture
+_KEEP_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def request_key(url, params=None):
+    """Stable key for a GET: the URL plus its query parameters in sorted order."""
+    query = urlencode(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+    return hashlib.sha256(f"{url}?{query}".encode("utf-8")).hexdigest()
+
+
+class CachedResponse:
+    """Minimal stand-in for requests.Response built from a stored capture."""
+
+    from_cache = True
+
+    def __init__(self, url, params, status_code, headers, content, fetched_at):
+        self.url = url
+        self.params = params
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.fetched_at = fetched_at
+
+    @property
+    def ok(self):
+        return 200 <= self.status_code < 400
+
+    @property
+    def text(self):
+        ctype = self.headers.get("Content-Type", "")
+        encoding = ctype.split("charset=", 1)[1].split(";")[0].strip() if "charset=" in ctype else "utf-8"
+        return self.content.decode(encoding or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"HTTP {self.status_code} for {self.url} (cached)")
+
+    def iter_content(self, chunk_size=1):
+        size = max(1, chunk_size or 1)
+        for i in range(0, len(self.content), size):
+            yield self.content[i:i + size]
+
+    def close(self):
+        pass
+
+
+class ResponseCache:
+    """Content-addressed, compressed on-disk store of raw HTTP responses.
+
+    Bodies are zlib-compressed into `<root>/objects/<sha256[:2]>/<sha256>.z`, so an
+    identical body is stored once however often it is captured. A SQLite index
+    (`<root>/index.sqlite3`) records every capture: request key, URL, params, time,
+    status and headers. `lookup()` returns the newest capture of a request, optionally
+    the newest at or before a given time. `evict()` drops captures older than
+    `max_age_seconds`, then the oldest captures until the stored bodies fit in
+    `max_bytes`, and finally deletes bodies no capture refers to.
+    """
+
+    EVICT_EVERY = 50
+
+    def __init__(self, root, max_bytes=256 * 1024 * 1024, max_age_seconds=60 * 86400):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._stores_since_evict = 0
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite3"), timeout=30,
+                                     check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS captures ("
+            " id INTEGER PRIMARY KEY,"
+            " key TEXT NOT NULL,"
+            " url TEXT NOT NULL,"
+            " params TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " status INTEGER NOT NULL,"
+            " headers TEXT NOT NULL,"
+            " blob TEXT NOT NULL,"
+            " size INTEGER NOT NULL"
+            ")"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS captures_key_idx ON captures (key, fetched_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS captures_time_idx ON captures (fetched_at)")
+
+    def _blob_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest + ".z")
+
+    def store(self, url, params, status_code, headers, content, fetched_at=None):
+        """Record one response; returns the content hash of its body."""
+        content = content or b""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._blob_path(digest)
+        packed = None if os.path.exists(path) else zlib.compress(content, 6)
+        kept = {k: headers.get(k) for k in _KEEP_HEADERS if headers and headers.get(k)}
+        # The body is written and indexed under the lock evict() sweeps with, so it never
+        # sees a body that is on disk but not yet referenced
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(packed if packed is not None else zlib.compress(content, 6))
+                os.replace(tmp, path)
+            self._conn.execute(
+                "INSERT INTO captures (key, url, params, fetched_at, status, headers, blob, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (request_key(url, params), url, json.dumps(params or {}, sort_keys=True),
+                 fetched_at if fetched_at is not None else time.time(), int(status_code),
+                 json.dumps(kept), digest, os.path.getsize(path)),
+            )
+            self._stores_since_evict += 1
+            due = self._stores_since_evict >= self.EVICT_EVERY
+        if due:
+            self.evict()
+        return digest
+
+    def _load(self, row):
+        url, params, fetched_at, status, headers, digest = row
+        try:
+            with open(self._blob_path(digest), "rb") as f:
+                content = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+        return CachedResponse(url, json.loads(params), status, json.loads(headers), content, fetched_at)
+
+    def lookup(self, url, params=None, at=None):
+        """Return the newest CachedResponse for this request (at or before `at`), or None."""
+        query = "SELECT url, params, fetched_at, status, headers, blob FROM captures WHERE key = ?"
+        args = [request_key(url, params)]
+        if at is not None:
+            query += " AND fetched_at <= ?"
+            args.append(at)
+        query += " ORDER BY fetched_at DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, args).fetchone()
+        return self._load(row) if row else None
+
+    def iter_captures(self, url_contains=None, since=None, until=None):
+        """Yield CachedResponses in capture order, optionally filtered by URL and time."""
+        query = "SELECT url, params, fetched_at, status, headers, blob FROM captures WHERE 1=1"
+        args = []
+        if url_contains:
+            query += " AND url LIKE ?"
+            args.append(f"%{url_contains}%")
+        if since is not None:
+            query += " AND fetched_at >= ?"
+            args.append(since)
+        if until is not None:
+            query += " AND fetched_at <= ?"
+            args.append(until)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY fetched_at", args).fetchall()
+        for row in rows:
+            resp = self._load(row)
+            if resp is not None:
+                yield resp
+
+    def stats(self):
+        with self._lock:
+            captures, requests = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT key) FROM captures").fetchone()
+            blobs, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM (SELECT blob, MAX(size) AS size FROM captures GROUP BY blob)"
+            ).fetchone()
+        return {"captures": captures, "requests": requests, "bodies": blobs, "bytes": size}
+
+    def evict(self, now=None):
+        """Apply the age and size limits; returns the number of captures removed."""
+        now = now if now is not None else time.time()
+        removed = 0
+        with self._lock:
+            self._stores_since_evict = 0
+            if self.max_age_seconds and self.max_age_seconds > 0:
+                removed += self._conn.execute("DELETE FROM captures WHERE fetched_at < ?",
+                                              (now - self.max_age_seconds,)).rowcount
+            if self.max_bytes and self.max_bytes > 0:
+                blobs = self._conn.execute(
+                    "SELECT blob, MAX(size), MAX(fetched_at) AS last FROM captures GROUP BY blob ORDER BY last"
+                ).fetchall()
+                total = sum(size for _, size, _ in blobs)
+                for digest, size, _ in blobs:
+                    if total <= self.max_bytes:
+                        break
+                    removed += self._conn.execute("DELETE FROM captures WHERE blob = ?", (digest,)).rowcount
+                    total -= size
+            referenced = {d for (d,) in self._conn.execute("SELECT DISTINCT blob FROM captures")}
+            objects = os.path.join(self.root, "objects")
+            for sub in os.listdir(objects):
+                for name in os.listdir(os.path.join(objects, sub)):
+                    if name.endswith(".z") and name[:-2] not in referenced:
+                        try:
+                            os.remove(os.path.join(objects, sub, name))
+                        except OSError:
+                            pass
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    # python response_cache.py <cache dir> [stats|evict|list [url-substring]]
+    if len(sys.argv) < 2:
+        print("usage: python response_cache.py <cache dir> [stats|evict|list [url-substring]]")
+        raise SystemExit(2)
+    cache = ResponseCache(sys.argv[1])
+    cmd = sys.argv[2] if len(sys.argv) > 2 else "stats"
+    if cmd == "evict":
+        print(f"🧹 Removed {cache.evict()} capture(s)")
+    elif cmd == "list":
+        for resp in cache.iter_captures(sys.argv[3] if len(sys.argv) > 3 else None):
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(resp.fetched_at))
+            print(f"{stamp}  {resp.status_code}  {len(resp.content):>8}  {resp.url} {resp.params}")
+    print(cache.stats())
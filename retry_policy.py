@@ -0,0 +1,164 @@
+import json
+import os
+import random
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of contacting a host whose circuit breaker is open."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a fetch runs out of its time budget (per call or per run)."""
+
+
+def full_jitter_delay(attempt, backoff_factor, cap, rand=random.uniform):
+    """"Full jitter" backoff: uniform in [0, min(cap, backoff_factor * 2**(attempt-1))]."""
+    ceiling = min(cap, backoff_factor * (2 ** (attempt - 1))) if cap and cap > 0 else backoff_factor * (2 ** (attempt - 1))
+    return rand(0, ceiling) if ceiling > 0 else 0.0
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    import email.utils
+
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    now = now if now is not None else time.time()
+    return max(0.0, when.timestamp() - now)
+
+
+class CircuitBreaker:
+    """Per-host breaker: closed -> open after `failure_threshold` consecutive failures,
+    open -> half-open after `reset_timeout` seconds, where a single probe request decides
+    between closed (success) and open again (failure).
+
+    A host can also be deferred (`defer()`, from Retry-After) without counting as failed;
+    a 429 answering the half-open probe re-opens the breaker (`record_rate_limited()`).
+    Times are wall-clock so the state can be persisted between cron runs.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0, clock=time.time):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.not_before = 0.0
+        self._probing = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        """True when a request may go out now (claims the probe slot when half-open)."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        """Returns True when this closed an open breaker."""
+        reopened = self.opened_at is not None
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        return reopened
+
+    def record_failure(self):
+        """Returns True when this failure opened (or re-opened) the breaker."""
+        self.failures += 1
+        if self._probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+            self.opened_at = self.clock()
+            self._probing = False
+            return True
+        return False
+
+    def defer(self, seconds):
+        self.not_before = max(self.not_before, self.clock() + max(0.0, seconds))
+
+    def record_rate_limited(self, retry_after=None):
+        """A 429: defer the host by `retry_after` (when given) without counting a failure.
+        Returns True when it answered the half-open probe, which re-opens the breaker, so
+        the probe slot is freed and the next probe waits another `reset_timeout`."""
+        if retry_after is not None:
+            self.defer(retry_after)
+        if self._probing:
+            self.opened_at = self.clock()
+            self._probing = False
+            return True
+        return False
+
+    def wait_time(self):
+        """Seconds until the host may be contacted again (Retry-After)."""
+        return max(0.0, self.not_before - self.clock())
+
+    def to_dict(self):
+        return {"failures": self.failures, "opened_at": self.opened_at, "not_before": self.not_before}
+
+    def load(self, data):
+        self.failures = int(data.get("failures", 0))
+        self.opened_at = data.get("opened_at")
+        self.not_before = float(data.get("not_before", 0.0))
+
+
+class CircuitBreakers:
+    """CircuitBreaker per host, persisted to `path` (JSON) whenever one opens or closes."""
+
+    def __init__(self, path=None, failure_threshold=5, reset_timeout=60.0, clock=time.time):
+        self.path = path
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.lock = threading.Lock()
+        self._breakers = {}
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                for host, state in (data.get("hosts") or {}).items():
+                    self.get(host).load(state)
+            except FileNotFoundError:
+                pass
+            except Exception as exc:
+                print(f"⚠️ Ignoring unreadable circuit breaker state {path}: {exc}")
+
+    def get(self, host):
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout, self.clock)
+            self._breakers[host] = breaker
+        return breaker
+
+    def __iter__(self):
+        return iter(self._breakers.items())
+
+    def save(self):
+        if not self.path:
+            return
+        data = {"hosts": {host: b.to_dict() for host, b in self._breakers.items()
+                          if b.opened_at is not None or b.wait_time() > 0}}
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.path)
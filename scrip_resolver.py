@@ -0,0 +1,180 @@
+import csv
+import io
+import json
+import os
+import re
+import sys
+import time
+
+# Column/key aliases used by BSE's bulk scrip master downloads:
+# - ListofScrips.csv: "Security Code", "Security Id", "Issuer Name" / "Security Name"
+# - ListofScripData API: SCRIP_CD, scrip_id, Scrip_Name / Issuer_Name
+_CODE_KEYS = ("SCRIP_CD", "Security Code", "SecurityCode", "scrip_cd", "code")
+_SYMBOL_KEYS = ("scrip_id", "Security Id", "SecurityId", "SCRIP_ID", "symbol")
+_NAME_KEYS = ("Scrip_Name", "Issuer_Name", "Issuer Name", "Security Name", "SLONGNAME", "name")
+
+_NAME_SUFFIXES = {"LTD", "LIMITED", "CO", "COMPANY", "THE"}
+
+
+def normalize_name(name):
+    """Uppercase, drop punctuation and common suffixes ("Ltd", "Limited") for name lookups."""
+    words = re.findall(r"[A-Z0-9]+", (name or "").upper())
+    while words and words[-1] in _NAME_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def _first(row, keys):
+    for k in keys:
+        v = row.get(k)
+        if v not in (None, ""):
+            return str(v).strip()
+    return ""
+
+
+def master_rows(rows):
+    """The rows that look like scrip master entries: a numeric code and a symbol. Other
+    payloads with a SCRIP_CD (announcement rows, say) are not a scrip master."""
+    return [row for row in rows or [] if isinstance(row, dict)
+            and _first(row, _CODE_KEYS).isdigit() and _first(row, _SYMBOL_KEYS)]
+
+
+class ScripResolver:
+    """Maps NSE-style symbols, numeric BSE scrip codes and company long names to each other.
+
+    Entries are {"code": int, "symbol": str, "name": str}. They are loaded from a JSON
+    cache file (written by `save()`), which can be seeded from a bulk scrip master file
+    via `load_master_file()` or refreshed from the BSE API by the bot. Lookups are dict
+    based and memoized per query string.
+    """
+
+    def __init__(self, cache_path=None, ttl_seconds=7 * 86400):
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self.fetched_at = 0.0
+        self.version = 0
+        self.by_code = {}
+        self.by_symbol = {}
+        self.by_name = {}
+        self._memo = {}
+        if cache_path:
+            self.load_cache()
+
+    def __len__(self):
+        return len(self.by_code)
+
+    def is_stale(self, now=None):
+        now = now if now is not None else time.time()
+        return not self.by_code or (now - self.fetched_at) > self.ttl_seconds
+
+    def load_rows(self, rows, fetched_at=None):
+        """Replace the mapping with `rows` (dicts in any supported master format).
+        Returns the number of usable entries loaded."""
+        by_code, by_symbol, by_name = {}, {}, {}
+        for row in rows or []:
+            if not isinstance(row, dict):
+                continue
+            code = _first(row, _CODE_KEYS)
+            if not code.isdigit():
+                continue
+            entry = {
+                "code": int(code),
+                "symbol": _first(row, _SYMBOL_KEYS).upper(),
+                "name": _first(row, _NAME_KEYS),
+            }
+            if not entry["symbol"] and not entry["name"]:
+                # a bare code maps nothing to anything
+                continue
+            by_code[entry["code"]] = entry
+            if entry["symbol"]:
+                by_symbol[entry["symbol"]] = entry
+            if entry["name"]:
+                by_name.setdefault(normalize_name(entry["name"]), entry)
+        if not by_code:
+            return 0
+        self.by_code, self.by_symbol, self.by_name = by_code, by_symbol, by_name
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self.version += 1
+        self._memo.clear()
+        return len(by_code)
+
+    def load_master_file(self, path):
+        """Load a bulk scrip master (BSE ListofScrips CSV or a JSON list)."""
+        with open(path, "r", encoding="utf-8-sig") as f:
+            raw = f.read()
+        if raw.lstrip().startswith(("[", "{")):
+            data = json.loads(raw)
+            rows = data.get("Table", data) if isinstance(data, dict) else data
+        else:
+            rows = list(csv.DictReader(io.StringIO(raw)))
+            rows = [{(k or "").strip(): v for k, v in r.items()} for r in rows]
+        return self.load_rows(rows)
+
+    def load_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return 0
+        return self.load_rows(data.get("entries") or [], fetched_at=data.get("fetched_at", 0.0))
+
+    def save(self):
+        if not self.cache_path:
+            return
+        data = {
+            "fetched_at": self.fetched_at,
+            "entries": [{"SCRIP_CD": e["code"], "scrip_id": e["symbol"], "Scrip_Name": e["name"]}
+                        for e in self.by_code.values()],
+        }
+        tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.cache_path)
+
+    def resolve(self, value):
+        """Resolve a code, symbol or long name to its entry dict, or None if unknown."""
+        key = str(value or "").strip()
+        if not key:
+            return None
+        if key in self._memo:
+            return self._memo[key]
+        entry = None
+        if key.isdigit():
+            entry = self.by_code.get(int(key))
+        if entry is None:
+            entry = self.by_symbol.get(key.upper())
+        if entry is None:
+            entry = self.by_name.get(normalize_name(key))
+        self._memo[key] = entry
+        return entry
+
+    def code_for(self, value):
+        """Return the numeric BSE code for a code/symbol/name; numeric input passes through."""
+        entry = self.resolve(value)
+        if entry:
+            return entry["code"]
+        key = str(value or "").strip()
+        return int(key) if key.isdigit() else None
+
+    def symbol_for(self, value):
+        entry = self.resolve(value)
+        return entry["symbol"] if entry else None
+
+    def name_for(self, value):
+        entry = self.resolve(value)
+        return entry["name"] if entry else None
+
+
+if __name__ == "__main__":
+    # Seed the cache from a bulk master file:
+    #   python scrip_resolver.py ListofScrips.csv [scrip_master.json]
+    if len(sys.argv) < 2:
+        print("usage: python scrip_resolver.py <master.csv|master.json> [cache.json]")
+        raise SystemExit(2)
+    resolver = ScripResolver(sys.argv[2] if len(sys.argv) > 2 else "scrip_master.json")
+    count = resolver.load_master_file(sys.argv[1])
+    if not count:
+        print(f"❌ No scrip entries found in {sys.argv[1]}")
+        raise SystemExit(1)
+    resolver.save()
+    print(f"💾 Saved {count} scrips to {resolver.cache_path}")
@@ -1,4 +1,9 @@
-import requests, pprint
+import pprint
+
+import bot
+
+bot.configure()
+# Goes through bot.fetch_with_retries, so RESPONSE_CACHE=record / replay apply here too
 
 url = "https://api.bseindia.com/BseIndiaAPI/api/AnnSubCategoryGetData/w"
 params = {
@@ -19,7 +24,7 @@ headers = {
 }
 
 try:
-    r = requests.get(url, params=params, headers=headers, timeout=30)
+    r = bot.fetch_with_retries(url, params=params, headers=headers, timeout=30, max_attempts=1)
 except Exception as e:
     print('Request failed:', e)
     raise SystemExit(1)
@@ -0,0 +1,37 @@
+import contextlib, json, sys, time
+
+import bot
+from response_cache import ResponseCache
+
+with contextlib.redirect_stdout(sys.stderr):
+    bot.configure()
+
+# Re-run matching + classification over captured AnnSubCategoryGetData responses
+# (recorded with RESPONSE_CACHE=record), fully offline:
+#   python scripts/replay_classify.py [cache dir] [since YYYY-MM-DD] > replayed.jsonl
+cache = ResponseCache(sys.argv[1]) if len(sys.argv) > 1 else bot.get_response_cache()
+since = time.mktime(time.strptime(sys.argv[2], "%Y-%m-%d")) if len(sys.argv) > 2 else None
+matcher = bot.get_tracked_matcher()
+
+seen = set()
+captures = rows = 0
+for resp in cache.iter_captures(bot.API_ANN_ENDPOINT, since=since):
+    captures += 1
+    try:
+        table = (resp.json() or {}).get("Table") or []
+    except Exception:
+        continue
+    for row in table:
+        rows += 1
+        if matcher and not matcher.match_row(row):
+            continue
+        rec = bot._api_row_to_record(row)
+        key = bot.announcement_key(rec)
+        if key in seen:
+            continue
+        seen.add(key)
+        with contextlib.redirect_stdout(sys.stderr):  # keep classify()'s logging out of the JSONL
+            emoji, tag = bot.classify(rec["title"])
+        print(json.dumps(dict(rec, emoji=emoji, tag=tag, captured_at=resp.fetched_at), ensure_ascii=False))
+
+print(f"📼 {captures} capture(s), {rows} row(s), {len(seen)} unique match(es)", file=sys.stderr)
@@ -1,11 +1,15 @@
-import bot, pprint, time as _time
+import bot, pprint, datetime
 
-orig = _time.strftime
-_time.strftime = lambda fmt: '20260208'
+bot.configure()
+
+# The poll window runs up to bot._bse_today() (IST); pin it to the sample day. A
+# non-incremental poll has no state to widen the window, so only 20260208 is queried.
+orig = bot._bse_today
+bot._bse_today = lambda: datetime.date(2026, 2, 8)
 try:
     print('Calling get_latest_announcement_from_api() for 20260208...')
     res = bot.get_latest_announcement_from_api()
     print('Result:')
     pprint.pprint(res)
 finally:
-    _time.strftime = orig
+    bot._bse_today = orig
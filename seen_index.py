@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class SeenIndex:
+    """On-disk set of announcement keys that have already been dispatched.
+
+    Backed by a single SQLite file so membership checks are primary-key lookups,
+    inserts are atomic (`INSERT OR IGNORE` inside a transaction) and several
+    bot processes can share the file without corrupting it. Entries older than
+    `ttl_seconds` are dropped by `expire()`.
+    """
+
+    def __init__(self, path, ttl_seconds=30 * 86400):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._known = set()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " key TEXT PRIMARY KEY,"
+            " seen_at REAL NOT NULL,"
+            " scrip TEXT,"
+            " title TEXT"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS seen_at_idx ON seen (seen_at)")
+
+    def __contains__(self, key):
+        if key in self._known:
+            return True
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM seen WHERE key = ?", (key,)).fetchone()
+        if row:
+            self._known.add(key)
+            return True
+        return False
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def filter_new(self, keys):
+        """Return the subset of `keys` (order preserved) not present in the index."""
+        keys = list(keys)
+        pending = [k for k in keys if k not in self._known]
+        found = set()
+        with self._lock:
+            for i in range(0, len(pending), 500):
+                chunk = pending[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for (k,) in self._conn.execute(f"SELECT key FROM seen WHERE key IN ({marks})", chunk):
+                    found.add(k)
+        self._known.update(found)
+        return [k for k in keys if k not in self._known]
+
+    def add(self, key, scrip="", title=""):
+        """Record `key`. Returns True if this call inserted it, False if it was already there."""
+        return bool(self.add_many([(key, scrip, title)]))
+
+    def add_many(self, entries):
+        """Atomically record (key, scrip, title) tuples; returns the keys newly inserted."""
+        now = time.time()
+        inserted = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for key, scrip, title in entries:
+                    cur = self._conn.execute(
+                        "INSERT OR IGNORE INTO seen (key, seen_at, scrip, title) VALUES (?, ?, ?, ?)",
+                        (key, now, scrip or "", (title or "")[:500]),
+                    )
+                    if cur.rowcount:
+                        inserted.append(key)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._known.update(k for k, _, _ in entries)
+        return inserted
+
+    def expire(self, now=None):
+        """Delete entries older than the TTL; returns the number removed."""
+        if not self.ttl_seconds or self.ttl_seconds <= 0:
+            return 0
+        cutoff = (now if now is not None else time.time()) - self.ttl_seconds
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM seen WHERE seen_at < ?", (cutoff,))
+        self._known.clear()
+        return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
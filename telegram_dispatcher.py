@@ -0,0 +1,220 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+# Telegram rejects messages longer than this many characters
+TELEGRAM_MAX_MESSAGE_LEN = 4096
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst` tokens."""
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill()
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self._refill()
+        self.tokens -= 1
+
+    def pause(self, seconds):
+        """Drain the bucket so no token is available for `seconds` (used for 429 retry_after)."""
+        self._refill()
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+def split_message(text, limit=TELEGRAM_MAX_MESSAGE_LEN):
+    """Split `text` into chunks of at most `limit` characters, preferring line breaks."""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text or not chunks:
+        chunks.append(text)
+    return chunks
+
+
+def coalesce(items, limit=TELEGRAM_MAX_MESSAGE_LEN, sep="\n\n"):
+    """Group queued items (dicts with "text") into batches whose joined text fits `limit`.
+
+    Returns a list of (text, items) pairs, preserving order.
+    """
+    batches = []
+    text, group = "", []
+    for item in items:
+        candidate = f"{text}{sep}{item['text']}" if group else item["text"]
+        if group and len(candidate) > limit:
+            batches.append((text, group))
+            text, group = item["text"], [item]
+        else:
+            text, group = candidate, group + [item]
+    if group:
+        batches.append((text, group))
+    return batches
+
+
+class TelegramDispatcher:
+    """Outbound Telegram queue with coalescing, rate limiting and on-disk persistence.
+
+    Messages are queued with `enqueue()` and delivered by `flush()`. Queued alerts for the
+    same chat are joined into as few messages as fit the 4096-character limit. Each send
+    waits on a per-chat and a global token bucket. A 429 pauses the chat for
+    `retry_after` seconds, up to `max_retry_after`. The queue is written to `path` as soon
+    as a message is enqueued and again after every flush, so anything not yet delivered
+    (including after a crash mid-flush) is retried on the next flush, even in the next run.
+
+    `post(chat_id, text)` is an async callable that returns `(status_code, retry_after)`.
+    `status_code` is None for network errors.
+
+    The queue itself is guarded by a lock, so threads other than the poll's (attachment
+    workers) may enqueue and flush from their own event loops.
+    """
+
+    def __init__(self, post, path=None, chat_rate=1.0, chat_burst=3, global_rate=25.0,
+                 global_burst=25, max_len=TELEGRAM_MAX_MESSAGE_LEN, coalesce=True,
+                 max_retry_after=30.0, max_attempts=20, sleep=asyncio.sleep, clock=time.monotonic):
+        self.post = post
+        self.path = path
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_len = max_len
+        self.coalesce = coalesce
+        self.max_retry_after = max_retry_after
+        self.max_attempts = max_attempts
+        self.sleep = sleep
+        self.clock = clock
+        self.global_bucket = TokenBucket(global_rate, global_burst, clock=clock)
+        self.chat_buckets = {}
+        self.pending = []
+        self._inflight = []
+        self._dirty = False
+        self._lock = threading.RLock()
+        if path:
+            self.load()
+
+    def __len__(self):
+        return len(self.pending)
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return
+        self.pending = [item for item in data.get("pending", []) if isinstance(item, dict) and item.get("text")]
+
+    def save(self):
+        with self._lock:
+            if not self.path or not self._dirty:
+                return
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"pending": self._inflight + self.pending}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    def enqueue(self, chat_id, text):
+        with self._lock:
+            for chunk in split_message(text, self.max_len):
+                self.pending.append({"chat_id": chat_id, "text": chunk, "queued_at": time.time(), "attempts": 0})
+            self._dirty = True
+            self.save()
+
+    def _chat_bucket(self, chat_id):
+        key = str(chat_id)
+        if key not in self.chat_buckets:
+            self.chat_buckets[key] = TokenBucket(self.chat_rate, self.chat_burst, clock=self.clock)
+        return self.chat_buckets[key]
+
+    async def _acquire(self, bucket):
+        while True:
+            wait = max(bucket.delay(), self.global_bucket.delay())
+            if wait <= 0:
+                bucket.consume()
+                self.global_bucket.consume()
+                return
+            await self.sleep(wait)
+
+    async def _drain_chat(self, chat_id, items):
+        """Deliver `items` for one chat in order; returns (delivered, undelivered) item lists."""
+        bucket = self._chat_bucket(chat_id)
+        batches = coalesce(items, self.max_len) if self.coalesce else [(i["text"], [i]) for i in items]
+        delivered = []
+        for n, (text, group) in enumerate(batches):
+            while True:
+                await self._acquire(bucket)
+                try:
+                    status, retry_after = await self.post(chat_id, text)
+                except Exception as exc:
+                    print(f"❌ Telegram send failed: {exc}")
+                    status, retry_after = None, None
+                if status == 429 and retry_after is not None and retry_after <= self.max_retry_after:
+                    print(f"⏳ Telegram rate limited chat {chat_id}; retrying in {retry_after}s")
+                    bucket.pause(retry_after)
+                    continue
+                break
+            if status is not None and 200 <= status < 300:
+                delivered.extend(group)
+                continue
+            if status is not None and 400 <= status < 500 and status != 429:
+                # Permanent rejection (bad request, chat not found, bot blocked): don't requeue
+                print(f"❌ Telegram rejected message for chat {chat_id} (status {status}); dropping")
+                delivered.extend(group)
+                continue
+            undelivered = [i for _, g in batches[n:] for i in g]
+            return delivered, undelivered
+        return delivered, []
+
+    async def flush(self):
+        """Try to deliver everything queued; returns the number of items no longer queued
+        (delivered, or dropped after a permanent rejection)."""
+        # enqueue() already saved the batch; the file keeps it until this flush settles it,
+        # so a crash mid-flush resends rather than loses messages
+        with self._lock:
+            batch, self.pending = self.pending, []
+            self._inflight = self._inflight + batch
+        if not batch:
+            return 0
+        by_chat = {}
+        for item in batch:
+            by_chat.setdefault(str(item["chat_id"]), []).append(item)
+        results = await asyncio.gather(*(self._drain_chat(items[0]["chat_id"], items) for items in by_chat.values()))
+        delivered = sum(len(done) for done, _ in results)
+        remaining = []
+        for _, left in results:
+            for item in left:
+                item["attempts"] = item.get("attempts", 0) + 1
+                if item["attempts"] >= self.max_attempts:
+                    print(f"❌ Giving up on Telegram message for chat {item['chat_id']} after {item['attempts']} attempts")
+                    continue
+                remaining.append(item)
+        if remaining:
+            print(f"💾 {len(remaining)} Telegram message(s) kept in outbox for retry")
+        # Messages enqueued while this flush was running stay queued behind the leftovers
+        with self._lock:
+            settled = {id(i) for i in batch}
+            self._inflight = [i for i in self._inflight if id(i) not in settled]
+            self.pending = remaining + self.pending
+            self._dirty = True
+            self.save()
+        return delivered
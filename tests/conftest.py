@@ -0,0 +1,27 @@
+import pytest
+
+import bot
+
+
+@pytest.fixture(autouse=True)
+def _state_in_tmp_path(tmp_path, monkeypatch):
+    # state files default to the directory of STATE_FILE (the repo root); a test run alone
+    # must not leave a scrip master, seen index or breaker state there for CI to commit
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot, "SCRIP_MASTER_FILE", str(tmp_path / "scrip_master.json"))
+
+
+@pytest.fixture(autouse=True)
+def _fresh_xbrl_cache():
+    # XBRL lookups are cached in-process; each test brings its own fake responses
+    bot.XBRL_CACHE.clear()
+    yield
+    bot.XBRL_CACHE.clear()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_circuit_breakers():
+    # breaker state is per process (and per state file); start every test closed
+    bot._CIRCUIT_BREAKERS.clear()
+    yield
+    bot._CIRCUIT_BREAKERS.clear()
@@ -22,7 +22,7 @@ def test_api_success_uses_api(monkeypatch, tmp_path):
 
     # Ensure send_telegram is called for API data
     sent = {"ok": False}
-    def fake_send(msg):
+    def fake_send(msg, chat_id=None):
         sent["ok"] = True
         # Should contain Scrip (IDEA) or numeric code
         assert "IDEA" in msg or "531380" in msg
@@ -43,7 +43,7 @@ def test_api_success_uses_api(monkeypatch, tmp_path):
 
 def test_api_failure_fallback_to_html(monkeypatch, tmp_path, capsys):
     # Simulate API failure by returning None
-    monkeypatch.setattr(bot, "get_latest_announcement_from_api", lambda: None)
+    monkeypatch.setattr(bot, "get_announcements_from_api", lambda: None)
 
     # Return templated HTML (so fallback then uses templated guard and skips send)
     templ_html = """
@@ -64,15 +64,16 @@ def test_api_failure_fallback_to_html(monkeypatch, tmp_path, capsys):
     monkeypatch.setattr(bot, "fetch_with_retries", lambda *args, **kwargs: r)
 
     captured_send = {"msg": None}
-    monkeypatch.setattr(bot, "send_telegram", lambda msg: captured_send.update({"msg": msg}))
+    monkeypatch.setattr(bot, "send_telegram", lambda msg, chat_id=None: captured_send.update({"msg": msg}))
 
-    bot.STATE_FILE = str(tmp_path / "last_seen.json")
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
     bot.check_bse()
 
     captured = capsys.readouterr()
     assert "Templated content detected" in captured.out
     assert captured_send["msg"] is not None
     assert "No New anouncement for NSE Symbol" in captured_send["msg"]
+    # only the 'no updates' notification is recorded, never the placeholder page
     with open(bot.STATE_FILE, "r", encoding="utf-8") as f:
         data = json.load(f)
-    assert "CorpannData" in data["title"] or "CorpannData" in data["scrip"]
+    assert "title" not in data and data["nohit_notified"]
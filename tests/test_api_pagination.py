@@ -0,0 +1,64 @@
+import threading
+import time
+import types
+
+import bot
+
+
+def make_page(pageno, n, total=None, prefix="ROW"):
+    data = {"Table": [{"NEWS_DT": "d", "SCRIP_CD": 100000 + pageno, "NEWSSUB": f"{prefix} p{pageno} r{i}", "NSURL": ""} for i in range(n)]}
+    if total is not None:
+        data["Table1"] = [{"ROWCNT": total}]
+    return data
+
+
+def test_pages_prefetched_and_yielded_in_order(monkeypatch):
+    requested = []
+    lock = threading.Lock()
+
+    def fake_fetch(url, params=None, **kwargs):
+        p = params["pageno"]
+        with lock:
+            requested.append(p)
+        # make later pages return first to prove ordering is by page
+        time.sleep(0.01 * (5 - p))
+        return types.SimpleNamespace(json=lambda: make_page(p, 3 if p < 4 else 1, total=10))
+
+    monkeypatch.setattr(bot, "fetch_with_retries", fake_fetch)
+    first = make_page(1, 3, total=10)
+    rows = list(bot.iter_announcement_rows(first, {"pageno": 1}, {}))
+    assert [r["SCRIP_CD"] for r in rows] == [100001] * 3 + [100002] * 3 + [100003] * 3 + [100004]
+    assert sorted(requested) == [2, 3, 4]
+
+
+def test_sequential_walk_without_total(monkeypatch):
+    monkeypatch.setattr(bot, "API_PAGE_SIZE", 2, raising=False)
+    pages = {2: make_page(2, 2), 3: make_page(3, 1)}
+    calls = []
+
+    def fake_fetch(url, params=None, **kwargs):
+        calls.append(params["pageno"])
+        return types.SimpleNamespace(json=lambda: pages.get(params["pageno"], {"Table": []}))
+
+    monkeypatch.setattr(bot, "fetch_with_retries", fake_fetch)
+    rows = list(bot.iter_announcement_rows(make_page(1, 2), {"pageno": 1}, {}))
+    assert len(rows) == 5
+    # page 3 was short, so page 4 is never requested
+    assert calls == [2, 3]
+
+
+def test_tracked_row_on_later_page_is_found(monkeypatch):
+    def fake_fetch(url, params=None, **kwargs):
+        p = params["pageno"]
+        page = make_page(p, 2, total=6)
+        if p == 3:
+            page["Table"][1]["NEWSSUB"] = "ACME - 500001 - Board Meeting Intimation"
+            page["Table"][1]["NSURL"] = "https://example.com/a.pdf"
+        return types.SimpleNamespace(json=lambda: page)
+
+    monkeypatch.setattr(bot, "fetch_with_retries", fake_fetch)
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ACME"], raising=False)
+    res = bot.get_latest_announcement_from_api()
+    assert res is not None
+    assert "ACME" in res["title"]
+    assert res["pdf"] == "https://example.com/a.pdf"
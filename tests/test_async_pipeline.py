@@ -0,0 +1,85 @@
+import asyncio
+import json
+import types
+
+import bot
+
+
+def test_async_backoff_does_not_block_loop(monkeypatch):
+    attempts = []
+
+    def fake_attempt(url, headers, timeout, params, attempt):
+        attempts.append(attempt)
+        return types.SimpleNamespace(status_code=200) if attempt == 3 else None
+
+    monkeypatch.setattr(bot, "_fetch_attempt", fake_attempt)
+
+    async def scenario():
+        ticks = []
+
+        async def ticker():
+            for _ in range(20):
+                ticks.append(1)
+                await asyncio.sleep(0.005)
+
+        t = asyncio.ensure_future(ticker())
+        r = await bot.async_fetch_with_retries("http://x", max_attempts=3, backoff_factor=0.02)
+        await t
+        return r, ticks
+
+    r, ticks = asyncio.run(scenario())
+    assert r.status_code == 200
+    assert attempts == [1, 2, 3]
+    assert len(ticks) == 20
+
+
+def test_async_fetch_raises_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(bot, "_fetch_attempt", lambda *a: None)
+    try:
+        asyncio.run(bot.async_fetch_with_retries("http://x", max_attempts=2, backoff_factor=0))
+    except Exception as exc:
+        assert "after 2 attempts" in str(exc)
+    else:
+        raise AssertionError("expected failure")
+
+
+def test_native_async_poll_end_to_end(monkeypatch, tmp_path):
+    table = {"Table": [
+        {"NEWSID": "a1", "NEWS_DT": "2026-02-08T10:01:00", "SCRIP_CD": 500001, "NEWSSUB": "ALPHA - 500001 - Order received", "NSURL": ""},
+    ]}
+    xbrl = "<xbrli:xbrl><in-bse-co:AttachmentURL>https://example.com/a.pdf</in-bse-co:AttachmentURL></xbrli:xbrl>"
+
+    def fake_attempt(url, headers, timeout, params, attempt):
+        if "CorpXbrlGen" in url:
+            return types.SimpleNamespace(status_code=200, text=xbrl)
+        return types.SimpleNamespace(status_code=200, json=lambda: table)
+
+    posts = []
+
+    def fake_post(url, json=None, timeout=None):
+        posts.append(json)
+        return types.SimpleNamespace(status_code=200, text="{}")
+
+    monkeypatch.setattr(bot, "_fetch_attempt", fake_attempt)
+    monkeypatch.setattr(bot, "get_http_session", lambda: types.SimpleNamespace(post=fake_post))
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ALPHA"], raising=False)
+    monkeypatch.setattr(bot, "BOT_TOKEN", "T", raising=False)
+    monkeypatch.setattr(bot, "CHAT_ID", 1, raising=False)
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+
+    bot.poll_once()
+    assert len(posts) == 1
+    assert "ALPHA - 500001" in posts[0]["text"]
+    assert "https://example.com/a.pdf" in posts[0]["text"]
+    with open(bot.STATE_FILE, "r", encoding="utf-8") as f:
+        assert json.load(f)["pdf"] == "https://example.com/a.pdf"
+
+
+def test_sync_wrapper_inside_running_loop(monkeypatch):
+    monkeypatch.setattr(bot, "fetch_with_retries", lambda *a, **k: types.SimpleNamespace(text=""))
+
+    async def scenario():
+        # calling a sync wrapper from async code must not fail with "loop already running"
+        return bot._fetch_xbrl_attachment_for_scrip("500001")
+
+    assert asyncio.run(scenario()) == ""
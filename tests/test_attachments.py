@@ -0,0 +1,106 @@
+import os
+import types
+
+import pytest
+
+import bot
+from attachments import AttachmentStore, AttachmentTooLarge
+
+
+def test_store_dedupes_by_content_and_streams_in_chunks(tmp_path):
+    store = AttachmentStore(str(tmp_path / "att"))
+    entry, duplicate = store.put_stream("https://x/a.pdf", iter([b"%PDF-", b"body"]))
+    assert not duplicate and entry["size"] == 9
+    assert entry["path"].endswith(".pdf") and entry["sha256"] in entry["path"]
+    again, duplicate = store.put_stream("https://x/b.pdf", iter([b"%PDF-body"]))
+    assert duplicate and again["path"] == entry["path"]
+    assert len(os.listdir(tmp_path / "att" / "objects" / entry["sha256"][:2])) == 1
+
+    # the index survives a restart
+    reopened = AttachmentStore(str(tmp_path / "att"))
+    assert reopened.lookup("https://x/b.pdf")["sha256"] == entry["sha256"]
+
+
+def test_store_aborts_oversized_streams(tmp_path):
+    store = AttachmentStore(str(tmp_path))
+    pulled = []
+
+    def chunks():
+        for i in range(10):
+            pulled.append(i)
+            yield b"x" * 100
+
+    with pytest.raises(AttachmentTooLarge):
+        store.put_stream("https://x/big.pdf", chunks(), max_bytes=250)
+    assert pulled == [0, 1, 2]
+    assert os.listdir(tmp_path / "tmp") == [] and store.lookup("https://x/big.pdf") is None
+
+
+class FakeSession:
+    def __init__(self, events, body=b"%PDF-1.7 report", headers=None):
+        self.events = events
+        self.body = body
+        self.headers = headers or {}
+
+    def get(self, url, headers=None, timeout=None, params=None, stream=False):
+        assert stream
+        self.events.append(("download", url))
+        body = self.body
+        return types.SimpleNamespace(status_code=200, headers=self.headers, close=lambda: None,
+                                     iter_content=lambda chunk_size: (body[i:i + chunk_size] for i in range(0, len(body), chunk_size)))
+
+
+def test_size_cap_uses_api_size_then_content_length(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "ATTACHMENT_DIR", str(tmp_path))
+    monkeypatch.setattr(bot, "ATTACHMENT_MAX_MB", 1)
+    events = []
+    monkeypatch.setattr(bot, "get_http_session", lambda: FakeSession(events, headers={"Content-Length": str(5 << 20)}))
+    rec = {"scrip": "500001", "pdf": "https://www.bseindia.com/xml-data/corpfiling/AttachLive/a.pdf"}
+    assert bot.download_attachment(dict(rec, attachsize=3 << 20)) == "too_large"
+    assert events == []  # skipped from Fld_Attachsize without a request
+    assert bot.download_attachment(rec) == "too_large"
+    assert bot.download_attachment(dict(rec, pdf="https://www.bseindia.com/stock-share-price/x/")) == "skipped"
+
+
+def test_alerts_go_out_before_attachments_are_fetched(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot, "ATTACHMENT_DIR", str(tmp_path / "att"))
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ALPHA"], raising=False)
+    monkeypatch.setattr(bot, "ATTACHMENT_CHUNK_KB", 1)
+    events = []
+    monkeypatch.setattr(bot, "get_http_session", lambda: FakeSession(events, body=b"%PDF" + b"x" * 5000))
+    monkeypatch.setattr(bot, "send_telegram", lambda msg, **kw: events.append(("send", msg)))
+    rows = [{"date": "2026-02-08T10:00:00", "scrip": "ALPHA", "title": "ALPHA - Order received", "newsid": "n1",
+             "pdf": "https://www.bseindia.com/xml-data/corpfiling/AttachLive/n1.pdf", "attachsize": 5004}]
+    monkeypatch.setattr(bot, "get_announcements_from_api", lambda: rows)
+
+    bot.check_bse()
+    assert bot.wait_for_attachments(10)
+    assert [kind for kind, _ in events] == ["send", "download"]
+    entry = bot.get_attachment_store().lookup(rows[0]["pdf"])
+    assert entry["size"] == 5004
+    assert (tmp_path / "att" / entry["path"]).read_bytes().startswith(b"%PDF")
+
+
+def test_downloads_honour_the_circuit_breaker_and_replay(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot, "ATTACHMENT_DIR", str(tmp_path / "att"))
+    events = []
+    monkeypatch.setattr(bot, "get_http_session", lambda: FakeSession(events))
+    rec = {"scrip": "500001", "pdf": "https://www.bseindia.com/xml-data/corpfiling/AttachLive/a.pdf"}
+
+    breakers = bot.get_circuit_breakers()
+    for _ in range(bot.CIRCUIT_FAILURE_THRESHOLD):
+        breakers.get("www.bseindia.com").record_failure()
+    assert bot.download_attachment(rec) == "failed"
+    assert events == []  # an open breaker fails fast, like every other BSE fetch
+    bot._CIRCUIT_BREAKERS.clear()
+
+    monkeypatch.setattr(bot, "RESPONSE_CACHE_MODE", "replay")
+    assert bot.download_attachment(rec) == "failed"  # a replay miss never reaches the network
+    bot.get_response_cache().store(rec["pdf"], None, 200, {}, b"%PDF-1.7 captured")
+    assert bot.download_attachment(rec) == "stored"
+    assert events == []
+    entry = bot.get_attachment_store().lookup(rec["pdf"])
+    with open(os.path.join(str(tmp_path / "att"), entry["path"]), "rb") as f:
+        assert f.read() == b"%PDF-1.7 captured"
@@ -0,0 +1,116 @@
+import asyncio
+import datetime
+import json
+import os
+import types
+
+import backfill
+import bot
+
+
+def make_api(days, fail=(), with_total=True):
+    """Fake AnnSubCategoryGetData: `days` maps YYYYMMDD -> rows, served in pages of API_PAGE_SIZE.
+    `fail` holds days, or (day, page) pairs, that raise."""
+    calls = []
+
+    async def fetch(url, headers=None, timeout=None, max_attempts=None, params=None, **kwargs):
+        day, page = params["strPrevDate"], params["pageno"]
+        calls.append((day, page))
+        if day in fail or (day, page) in fail:
+            raise Exception("boom")
+        rows = days.get(day, [])
+        size = bot.API_PAGE_SIZE
+        data = {"Table": rows[(page - 1) * size: page * size]}
+        if with_total:
+            data["Table1"] = [{"ROWCNT": len(rows)}]
+        return types.SimpleNamespace(json=lambda: data)
+
+    return fetch, calls
+
+
+def rows_for(day, n, hit_every=10):
+    return [{"NEWSID": f"{day}-{i}", "NEWS_DT": f"{day}T10:00:{i % 60:02d}", "SCRIP_CD": 500000 + i,
+             "NEWSSUB": f"{'ALPHA' if i % hit_every == 0 else 'OTHER'} - {500000 + i} - Order received"}
+            for i in range(n)]
+
+
+def read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_backfill_streams_matches_and_resumes(tmp_path):
+    days = {"20260201": rows_for("20260201", 120), "20260202": rows_for("20260202", 5), "20260203": rows_for("20260203", 30)}
+    fetch, calls = make_api(days, fail={"20260202"})
+    out = str(tmp_path / "bf.jsonl")
+    matcher = bot.TrackedMatcher(["ALPHA"])
+    start, end = datetime.date(2026, 2, 1), datetime.date(2026, 2, 3)
+
+    summary = asyncio.run(backfill.backfill(start, end, out, fetch=fetch, matcher=matcher, rate=1000))
+    assert summary["failed"] == ["2026-02-02"]
+    recs = read_jsonl(out)
+    assert len(recs) == 12 + 3
+    assert {r["day"] for r in recs} == {"2026-02-01", "2026-02-03"}
+    assert all(r["tag"] == "IMPORTANT" and r["source"] == "api" for r in recs)
+    # all three pages of the busy day were read
+    assert sorted(p for d, p in calls if d == "20260201") == [1, 2, 3]
+
+    # second run only retries the failed day
+    fetch2, calls2 = make_api(days)
+    summary = asyncio.run(backfill.backfill(start, end, out, fetch=fetch2, matcher=matcher, rate=1000))
+    assert summary["failed"] == [] and summary["days"] == 1
+    assert {d for d, _ in calls2} == {"20260202"}
+    assert len(read_jsonl(out)) == 16
+
+
+def test_failed_page_without_total_leaves_day_pending(tmp_path):
+    days = {"20260201": rows_for("20260201", 120)}
+    fetch, _ = make_api(days, fail={("20260201", 2)}, with_total=False)
+    out = str(tmp_path / "bf.jsonl")
+    matcher = bot.TrackedMatcher(["ALPHA"])
+    day = datetime.date(2026, 2, 1)
+
+    summary = asyncio.run(backfill.backfill(day, day, out, fetch=fetch, matcher=matcher, rate=1000))
+    assert summary["failed"] == ["2026-02-01"]
+    assert not os.path.exists(out) or read_jsonl(out) == []
+
+    # the walk ends on the short third page once page 2 answers, and only then is the day done
+    fetch, calls = make_api(days, with_total=False)
+    summary = asyncio.run(backfill.backfill(day, day, out, fetch=fetch, matcher=matcher, rate=1000))
+    assert summary["failed"] == [] and summary["done"] == 1
+    assert sorted(p for _, p in calls) == [1, 2, 3]
+    assert len(read_jsonl(out)) == 12
+
+
+def test_partial_output_after_crash_is_discarded(tmp_path):
+    fetch, _ = make_api({"20260201": rows_for("20260201", 10)})
+    out = str(tmp_path / "bf.jsonl")
+    matcher = bot.TrackedMatcher(["ALPHA"])
+    day = datetime.date(2026, 2, 1)
+    asyncio.run(backfill.backfill(day, day, out, fetch=fetch, matcher=matcher, rate=1000))
+    with open(out, "a", encoding="utf-8") as f:
+        f.write('{"half-written": ')
+    fetch, _ = make_api({"20260202": rows_for("20260202", 10)})
+    asyncio.run(backfill.backfill(day, day + datetime.timedelta(days=1), out, fetch=fetch, matcher=matcher, rate=1000))
+    assert [r["day"] for r in read_jsonl(out)] == ["2026-02-01", "2026-02-02"]
+
+
+def test_rate_limit_is_global():
+    slept = []
+
+    async def fetch(url, **kwargs):
+        return None
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        limited.bucket.tokens = 1
+
+    limited = backfill.RateLimitedFetch(2, burst=2, fetch=fetch, sleep=fake_sleep)
+
+    async def scenario():
+        for _ in range(4):
+            await limited("u")
+
+    asyncio.run(scenario())
+    assert limited.requests == 4
+    assert len(slept) == 2
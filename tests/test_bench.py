@@ -0,0 +1,55 @@
+import bench
+import bot
+
+
+def test_percentiles_interpolate():
+    assert bench.percentile([3.0], 95) == 3.0
+    assert bench.percentile([1.0, 2.0, 3.0, 4.0, 5.0], 50) == 3.0
+    assert bench.percentile([0.0, 10.0], 90) == 9.0
+    summary = bench.summarize([0.001, 0.002, 0.003])
+    assert summary["p50"] == 2.0 and summary["min"] == 1.0 and summary["max"] == 3.0
+
+
+def test_run_benchmarks_reports_every_stage(monkeypatch):
+    monkeypatch.setattr(bot, "API_PAGE_SIZE", 50)
+    fixtures = bench.SyntheticFixtures(["ALPHA", "BETA"], rows=120, html_rows=20, hit_rate=0.1, xbrl_kb=1)
+    original_domain = bot.NEWAPI_DOMAIN
+    report = bench.run_benchmarks(fixtures, iterations=2)
+
+    assert set(report["stages"]) == {"classify", "parse_html_announcement", "get_latest_announcement_from_api",
+                                     "check_bse", "check_bse_html_fallback"}
+    for stage in report["stages"].values():
+        assert stage["iterations"] == 2 and stage["errors"] == 0
+        assert {"p50", "p95", "p99", "mean"} <= set(stage["latency_ms"])
+        assert stage["peak_kb"] > 0
+    api = report["stages"]["get_latest_announcement_from_api"]["requests"]
+    # three pages of 50 rows, plus XBRL lookups for matches that link a quote page
+    assert api["by_endpoint"]["api"] == 3
+    assert api["by_endpoint"].get("xbrl", 0) > 0
+    assert report["stages"]["check_bse"]["telegram_sends"] > 0
+    fallback = report["stages"]["check_bse_html_fallback"]["requests"]["by_endpoint"]
+    assert fallback["api"] == 1 and fallback["html"] == 1
+    assert report["stages"]["classify"]["requests"]["mean"] == 0
+    # the bot is pointed back at BSE afterwards
+    assert bot.NEWAPI_DOMAIN == original_domain
+
+
+def test_injected_failures_are_retried(monkeypatch):
+    monkeypatch.setattr(bot.time, "sleep", lambda s: None)
+    fixtures = bench.SyntheticFixtures(["ALPHA"], rows=10, html_rows=5, xbrl_kb=1)
+    report = bench.run_benchmarks(fixtures, iterations=3, fail_rate=0.5, seed=3,
+                                  stages=["get_latest_announcement_from_api"])
+    stage = report["stages"]["get_latest_announcement_from_api"]
+    assert list(report["stages"]) == ["get_latest_announcement_from_api"]
+    assert stage["requests"]["max"] > 1
+
+
+def test_compare_flags_regressions():
+    def report(p50, p95, requests):
+        return {"stages": {"check_bse": {"latency_ms": {"p50": p50, "p95": p95}, "requests": {"mean": requests}}}}
+
+    baseline = report(100.0, 200.0, 10)
+    assert bench.compare(report(110.0, 240.0, 10), baseline, tolerance=0.25) == []
+    regressions = bench.compare(report(130.0, 200.0, 14), baseline, tolerance=0.25)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("check_bse: latency p50 100.0 -> 130.0")
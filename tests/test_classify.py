@@ -0,0 +1,68 @@
+import random
+
+import bot
+
+
+def reference_classify(title):
+    # The original linear-scan classifier, kept here as the oracle for the compiled one
+    text = title.lower()
+    for words, label in bot.COMBINATION_RULES:
+        if all(w in text for w in words):
+            return "🚨", label
+    if any(k in text for k in bot.CRITICAL_KEYWORDS):
+        return "🚨", "CRITICAL"
+    if any(k in text for k in bot.IMPORTANT_KEYWORDS):
+        return "⚠️", "IMPORTANT"
+    if any(k in text for k in bot.IGNORE_KEYWORDS):
+        return None, None
+    return "ℹ️", "INFO"
+
+
+TITLES = [
+    "Resignation of Statutory Auditor",
+    "Delay in payment of interest on NCDs",
+    "Credit Rating - Downgrade by CRISIL",
+    "Invocation of Pledge by lender",
+    "Board Meeting Intimation",
+    "Outcome of AGM",
+    "Demerger of business undertaking",
+    "Order received from Indian Railways",
+    "Newspaper Publication",
+    "Compliance Certificate under Regulation 74(5)",
+    "Updates",
+    "Portal maintenance",          # 'rta' inside 'portal'
+    "Subsidiary debarred by SEBI",
+    "Project delay due to monsoon",
+    "NCLT admits IBC petition",
+    "Intimation under Reg 30 - Award of Work",
+    "",
+]
+
+
+def test_matches_reference_on_known_titles():
+    for t in TITLES:
+        assert bot.classify(t) == reference_classify(t), t
+
+
+def test_matches_reference_on_random_titles():
+    rng = random.Random(42)
+    vocab = set(bot.CRITICAL_KEYWORDS + bot.IMPORTANT_KEYWORDS + bot.IGNORE_KEYWORDS)
+    for words, _ in bot.COMBINATION_RULES:
+        vocab.update(words)
+    pieces = sorted(vocab) + ["of", "the", "company", "xyz", "de", "re", "-", "Ltd", "PAYMENT", "Q3"]
+    for _ in range(2000):
+        # glue pieces with and without spaces to create overlapping / embedded keywords
+        title = "".join(rng.choice(pieces) + rng.choice(["", " ", " - "]) for _ in range(rng.randint(1, 6)))
+        title = "".join(c.upper() if rng.random() < 0.3 else c for c in title)
+        assert bot.classify(title) == reference_classify(title), title
+
+
+def test_keyword_hits_includes_overlapping_words():
+    hits = bot.keyword_hits("DEMERGER and auditor's resignation")
+    assert {"demerger", "merger", "auditor", "resignation"} <= hits
+
+
+def test_matcher_rebuilds_when_keywords_change(monkeypatch):
+    assert bot.classify("Quarterly widget update") == ("ℹ️", "INFO")
+    monkeypatch.setattr(bot, "CRITICAL_KEYWORDS", bot.CRITICAL_KEYWORDS + ["widget"])
+    assert bot.classify("Quarterly widget update") == ("🚨", "CRITICAL")
@@ -0,0 +1,137 @@
+import asyncio
+import datetime
+import json
+import types
+
+import pytest
+
+import bot
+
+
+@pytest.fixture(autouse=True)
+def _fixture_day(monkeypatch):
+    # the poll window runs from the high-water mark's day to today; keep it on the fixtures' day
+    monkeypatch.setattr(bot, "_bse_today", lambda: datetime.date(2026, 2, 8))
+
+
+def _row(newsid, minute, scrip, sym):
+    return {"NEWSID": newsid, "NEWS_DT": f"2026-02-08T10:{minute:02d}:00", "SCRIP_CD": scrip,
+            "NEWSSUB": f"{sym} - {scrip} - Order received", "NSURL": f"https://example.com/{newsid}.pdf"}
+
+
+class FakeAPI:
+    def __init__(self, rows, etag=None):
+        self.rows = rows
+        self.etag = etag
+        self.decoded = 0
+        self.requests = []
+
+    async def fetch(self, url, headers=None, timeout=None, max_attempts=None, params=None, **kwargs):
+        if bot.API_ANN_ENDPOINT not in url:
+            return None
+        self.requests.append(dict(headers or {}))
+        if self.etag and (headers or {}).get("If-None-Match") == self.etag:
+            return types.SimpleNamespace(status_code=304, content=b"", headers={})
+        body = json.dumps({"Table": self.rows}).encode("utf-8")
+
+        def decode():
+            self.decoded += 1
+            return json.loads(body)
+
+        return types.SimpleNamespace(status_code=200, content=body, json=decode,
+                                     headers={"ETag": self.etag} if self.etag else {})
+
+
+def poll(api):
+    rows = asyncio.run(bot.async_get_announcements_from_api(fetch=api.fetch, incremental=True))
+    bot.commit_api_poll_state()
+    return rows
+
+
+def test_unchanged_body_skips_decoding(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ALPHA"], raising=False)
+    api = FakeAPI([_row("n1", 1, 500001, "ALPHA")])
+    assert [r["newsid"] for r in poll(api)] == ["n1"]
+    assert poll(api) == []
+    assert api.decoded == 1
+
+
+def test_changed_body_only_processes_rows_above_high_water_mark(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ALPHA", "BETA"], raising=False)
+    api = FakeAPI([_row("n1", 1, 500001, "ALPHA")])
+    assert [r["newsid"] for r in poll(api)] == ["n1"]
+    api.rows = [_row("n2", 2, 500002, "BETA")] + api.rows
+    assert [r["newsid"] for r in poll(api)] == ["n2"]
+    # a new row that doesn't match still moves the mark, and nothing old is rematched
+    api.rows = [_row("n3", 3, 500003, "GAMMA")] + api.rows
+    assert poll(api) is None
+    api.rows = [{**api.rows[0], "NEWSSUB": "GAMMA - corrected"}] + api.rows[1:]
+    assert poll(api) == []
+    # a watchlist change resets the mark
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ALPHA", "BETA", "GAMMA"], raising=False)
+    assert [r["newsid"] for r in poll(api)] == ["n3", "n2", "n1"]
+
+
+def test_etag_sends_conditional_request(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ALPHA"], raising=False)
+    api = FakeAPI([_row("n1", 1, 500001, "ALPHA")], etag='"v1"')
+    assert poll(api)
+    assert poll(api) == []
+    assert api.requests[1]["If-None-Match"] == '"v1"'
+    # one-off reads (not the poll loop) always see the full table
+    assert asyncio.run(bot.async_get_announcements_from_api(fetch=api.fetch))[0]["newsid"] == "n1"
+
+
+def test_failed_page_does_not_advance_the_poll_state(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ALPHA", "BETA"], raising=False)
+    monkeypatch.setattr(bot, "API_PAGE_SIZE", 2)
+    rows = [_row("n3", 3, 500001, "ALPHA"), _row("n2", 2, 500003, "GAMMA"), _row("n1", 1, 500002, "BETA")]
+    broken = {2}
+
+    async def fetch(url, headers=None, params=None, **kwargs):
+        if bot.API_ANN_ENDPOINT not in url:
+            return None
+        page = params["pageno"]
+        if page in broken:
+            raise RuntimeError("boom")
+        body = json.dumps({"Table": rows[(page - 1) * 2: page * 2], "Table1": [{"ROWCNT": len(rows)}]}).encode("utf-8")
+        return types.SimpleNamespace(status_code=200, content=body, headers={}, json=lambda: json.loads(body))
+
+    api = types.SimpleNamespace(fetch=fetch)
+    # page 1 still alerts, but the mark stays put so the next poll reads page 2 as well
+    assert [r["newsid"] for r in poll(api)] == ["n3"]
+    assert bot.load_api_poll_state() == {}
+    broken.clear()
+    assert [r["newsid"] for r in poll(api)] == ["n3", "n1"]
+    assert bot.load_api_poll_state()["hwm"]["newsids"] == ["n3"]
+
+
+def test_poll_state_is_saved_only_after_dispatch(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ALPHA"], raising=False)
+    monkeypatch.setattr(bot, "CHAT_ID", "-100")
+    monkeypatch.setattr(bot, "send_nohit_notification", lambda msg: None)
+    api = FakeAPI([_row("n1", 1, 500001, "ALPHA")])
+    get_rows = lambda: bot.async_get_announcements_from_api(fetch=api.fetch, incremental=True)
+
+    async def failing_send(msg, chat_id=None):
+        raise RuntimeError("telegram down")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(bot.async_check_bse(get_rows=get_rows, send=failing_send, fetch=api.fetch))
+    assert bot.load_api_poll_state() == {}
+
+    sent = []
+
+    async def send(msg, chat_id=None):
+        sent.append(chat_id)
+
+    (tmp_path / "ok").mkdir()
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "ok" / "last_seen.json"))
+    asyncio.run(bot.async_check_bse(get_rows=get_rows, send=send, fetch=api.fetch))
+    assert sent == ["-100"]
+    assert bot.load_api_poll_state()["hwm"]["newsids"] == ["n1"]
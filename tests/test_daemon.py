@@ -0,0 +1,55 @@
+import datetime
+import threading
+
+import bot
+
+
+def ist(hour, minute=0):
+    return datetime.datetime(2026, 2, 9, hour, minute, tzinfo=bot.IST)
+
+
+def test_market_hours_window(monkeypatch):
+    monkeypatch.setattr(bot, "MARKET_HOURS", "09:00-18:00", raising=False)
+    assert bot.in_market_hours(ist(9, 0))
+    assert bot.in_market_hours(ist(17, 59))
+    assert not bot.in_market_hours(ist(18, 0))
+    assert not bot.in_market_hours(ist(3, 30))
+    # UTC input is converted to IST (04:00 UTC == 09:30 IST)
+    assert bot.in_market_hours(datetime.datetime(2026, 2, 9, 4, 0, tzinfo=datetime.timezone.utc))
+
+
+def test_next_poll_delay_uses_cadence_and_jitter(monkeypatch):
+    monkeypatch.setattr(bot, "DAEMON_INTERVAL", 300.0, raising=False)
+    monkeypatch.setattr(bot, "DAEMON_MARKET_INTERVAL", 60.0, raising=False)
+    monkeypatch.setattr(bot, "DAEMON_JITTER", 0.1, raising=False)
+    assert bot.next_poll_delay(ist(11), rand=lambda a, b: 0) == 60.0
+    assert bot.next_poll_delay(ist(22), rand=lambda a, b: 0) == 300.0
+    assert bot.next_poll_delay(ist(11), rand=lambda a, b: b) == 66.0
+    assert bot.next_poll_delay(ist(22), rand=lambda a, b: a) == 270.0
+
+
+def test_run_daemon_polls_until_stopped(monkeypatch):
+    stop = threading.Event()
+    calls = []
+
+    def fake_check():
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("transient")
+        if len(calls) == 3:
+            stop.set()
+
+    monkeypatch.setattr(bot, "poll_once", fake_check)
+    monkeypatch.setattr(bot, "next_poll_delay", lambda: 0.01)
+    bot.run_daemon(stop_event=stop)
+    # an exception in one poll does not stop the loop
+    assert len(calls) == 3
+
+
+def test_main_runs_single_poll_by_default(monkeypatch):
+    calls = []
+    monkeypatch.setattr(bot, "poll_once", lambda: calls.append("once"))
+    monkeypatch.setattr(bot, "run_daemon", lambda: calls.append("daemon"))
+    bot.main([])
+    bot.main(["--daemon"])
+    assert calls == ["once", "daemon"]
@@ -0,0 +1,90 @@
+import re
+
+import pytest
+
+import bot
+from ann_html import AnnouncementTableParser, iter_table_rows
+
+
+def bs4_reference(html):
+    """The previous BeautifulSoup-based extraction, kept as an oracle."""
+    BeautifulSoup = pytest.importorskip("bs4").BeautifulSoup
+    table = BeautifulSoup(html, "html.parser").find("table")
+    if not table:
+        return None
+    rows = table.find_all("tr")
+    target = next((r for r in rows[1:] if len(r.find_all("td")) >= 3), None)
+    if target is None:
+        return None
+    cols = target.find_all("td")
+    texts = [c.get_text(" ", strip=True) for c in cols]
+    title = texts[max(range(len(texts)), key=lambda i: len(texts[i]))]
+    scrip = ""
+    for txt in texts:
+        m = re.search(r"\b(\d{5,6})\b", txt)
+        if m:
+            scrip = m.group(1)
+            break
+    if not scrip and len(texts) > 1:
+        scrip = texts[1]
+    pdf = ""
+    for c in cols:
+        a = c.find("a")
+        if a and a.get("href"):
+            pdf = a.get("href")
+            break
+    date = ""
+    for txt in texts:
+        dm = re.search(r"\d{2}-\d{2}-\d{4}", txt)
+        if dm:
+            date = dm.group(0)
+            break
+    if not date:
+        for nr in rows[rows.index(target) + 1: rows.index(target) + 4]:
+            dm = re.search(r"\d{2}-\d{2}-\d{4}", nr.get_text())
+            if dm:
+                date = dm.group(0)
+                break
+    return {"date": date, "scrip": scrip, "title": title, "pdf": pdf}
+
+
+PAGES = [
+    """<html><body><div>nav</div><table><tr><th>Head</th></tr>
+    <tr><td>500001</td><td>ALPHA &amp; Co</td><td><span>ALPHA - 500001 - Order received</span> for supply</td>
+    <td><a href="/x/1.pdf">pdf</a></td></tr>
+    <tr><td colspan="4">Exchange Received Time 08-02-2026 10:01:00</td></tr></table>
+    <table><tr><td>other</td></tr></table></body></html>""",
+    """<table><tr></tr><tr><td>a</td><td>b</td></tr>
+    <tr><td>Board Meeting</td><td>BETA</td><td>BETA - Outcome of Board Meeting 07-02-2026</td><td><a>no link</a><a href="/y.pdf">y</a></td></tr>
+    </table>""",
+    """<table><tr><td>x</td></tr><tr><td>only</td><td>two</td></tr></table>""",
+    """<p>no table here</p>""",
+]
+
+
+@pytest.mark.parametrize("html", PAGES)
+def test_matches_previous_bs4_extraction(html):
+    assert bot.parse_html_announcement(html) == bs4_reference(html)
+
+
+def test_stops_reading_after_announcement_row(capsys):
+    tail = "".join(f"<tr><td>{i}</td><td>filler</td><td>row {i}</td></tr>" for i in range(5000))
+    html = ("<table><tr><th>h</th></tr><tr><td>500001</td><td>ALPHA</td><td>ALPHA - Order 08-02-2026</td></tr>"
+            + tail + "</table>")
+    rec = bot.parse_html_announcement(html)
+    assert rec["date"] == "08-02-2026" and rec["scrip"] == "500001"
+    assert "Read 2 rows" in capsys.readouterr().out
+
+
+def test_templates_detected_while_streaming():
+    html = ("<table><tr></tr><tr><td>Security Code : {{CorpannData.Table[0].SCRIP_CD}}</td>"
+            "<td>Company : {{CorpannData.Table[0].SLONGNAME }}</td><td>{{CorpannData.Table[0].NEWS_DT}}</td></tr>"
+            + "<tr><td>{{cann.NEWSSUB}}</td></tr>" * 1000 + "</table>")
+    parser = AnnouncementTableParser()
+    rows = iter_table_rows(html, parser, chunk_size=256)
+    next(rows)
+    row = next(rows)
+    assert row["templated"] and parser.templated
+    assert not parser.done
+    rec = bot.parse_html_announcement(html)
+    assert bot._is_templated_record(rec)
@@ -0,0 +1,59 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import bot
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_parse_pool_sizes():
+    sizes = bot._parse_pool_sizes("api.bseindia.com=12, WWW.BSEINDIA.COM=3,bad,x=notint,y=0")
+    assert sizes == {"api.bseindia.com": 12, "www.bseindia.com": 3}
+
+
+def test_session_is_shared_and_hosts_mounted(monkeypatch):
+    bot.close_http_session()
+    monkeypatch.setattr(bot, "HTTP_POOL_SIZES", {"api.bseindia.com": 7}, raising=False)
+    try:
+        s1 = bot.get_http_session()
+        assert bot.get_http_session() is s1
+        adapter = s1.get_adapter("https://api.bseindia.com/BseIndiaAPI/api/x")
+        assert adapter._pool_maxsize == 7
+        other = s1.get_adapter("https://example.com/")
+        assert other._pool_maxsize == bot.HTTP_POOL_DEFAULT_SIZE
+    finally:
+        bot.close_http_session()
+
+
+def test_connections_are_reused():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    server.daemon_threads = True
+    t = threading.Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    bot.close_http_session()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/ping"
+        for _ in range(3):
+            r = bot.fetch_with_retries(url, timeout=5, max_attempts=1)
+            assert r.status_code == 200
+        stats = bot.get_http_stats()["127.0.0.1"]
+        assert stats["requests"] == 3
+        assert stats["connections"] == 1
+        assert stats["reused"] == 2
+    finally:
+        bot.close_http_session()
+        server.shutdown()
+        server.server_close()
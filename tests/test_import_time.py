@@ -0,0 +1,75 @@
+import json
+import os
+import re
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules that must not load just because bot was imported (or for the API-only path)
+HEAVY = ("requests", "urllib3", "bs4", "lxml", "sqlite3", "html.parser", "xml", "argparse")
+try:
+    IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "750"))
+except ValueError:
+    IMPORT_BUDGET_MS = 750.0
+
+
+def run_python(code, cwd, importtime=False):
+    env = {k: v for k, v in os.environ.items() if k not in ("BOT_TOKEN", "CHAT_ID", "TRACKED_SCRIP")}
+    env["PYTHONPATH"] = REPO
+    args = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    return subprocess.run(args, cwd=cwd, env=env, capture_output=True, text=True, timeout=60, check=True)
+
+
+def heavy(modules):
+    return sorted(m for m in modules if any(m == h or m.startswith(h + ".") for h in HEAVY))
+
+
+def test_import_is_side_effect_free_and_within_budget(tmp_path):
+    (tmp_path / ".env").write_text("BOT_TOKEN=from-dotenv\n", encoding="utf-8")
+    code = ("import sys, json\nbefore = set(sys.modules)\nimport bot\n"
+            "json.dump({'new': sorted(set(sys.modules) - before), 'token': bot.BOT_TOKEN}, sys.stderr)")
+    run_python("import bot", tmp_path)  # warm the bytecode cache
+    proc = run_python(code, tmp_path, importtime=True)
+
+    assert proc.stdout == ""
+    result = json.loads(proc.stderr[proc.stderr.rindex("{"):])
+    assert result["token"] is None  # .env is only read by entry points
+    assert heavy(result["new"]) == []
+    total_us = next(int(m.group(1)) for m in re.finditer(r"import time:\s+\d+ \|\s+(\d+) \| bot$", proc.stderr, re.M))
+    assert total_us / 1000 < IMPORT_BUDGET_MS, f"import bot took {total_us / 1000:.0f}ms"
+
+
+def test_api_only_poll_path_stays_light(tmp_path):
+    code = (
+        "import sys, json, types\nimport bot\n"
+        "table = {'Table': [{'NEWSID': 'n1', 'NEWS_DT': '2026-02-08T10:00:00', 'SCRIP_CD': 500001,"
+        " 'NEWSSUB': 'ALPHA - 500001 - Order received', 'NSURL': 'https://example.com/1.pdf'}]}\n"
+        "bot.fetch_with_retries = lambda *a, **k: types.SimpleNamespace(json=lambda: table)\n"
+        "bot.TRACKED_SCRIP_LIST = ['ALPHA']\n"
+        "bot.STATE_FILE = 'last_seen.json'\n"
+        "rows = bot.get_announcements_from_api()\n"
+        "json.dump({'rows': len(rows), 'modules': sorted(sys.modules)}, sys.stderr)"
+    )
+    proc = run_python(code, tmp_path)
+    result = json.loads(proc.stderr[proc.stderr.rindex('{"rows"'):])
+    assert result["rows"] == 1
+    assert heavy(result["modules"]) == []
+    assert "ann_html" not in result["modules"]
+
+
+def test_configure_applies_dotenv_once(tmp_path):
+    (tmp_path / ".env").write_text("TRACKED_SCRIP=FOO,BAR\nXBRL_CACHE_TTL=5\nMETRICS=1\nBACKFILL_RATE=2\n", encoding="utf-8")
+    code = (
+        "import bot, backfill\n"
+        "from bot import METRICS, XBRL_CACHE\n"
+        "assert 'FOO' not in bot.TRACKED_SCRIP_LIST\n"
+        "bot.configure()\n"
+        "assert bot.TRACKED_SCRIP_LIST == ['FOO', 'BAR'], bot.TRACKED_SCRIP_LIST\n"
+        "assert backfill.BACKFILL_RATE == 2.0\n"
+        "# settings change in place; objects imported from bot are still the live ones\n"
+        "assert bot.METRICS is METRICS and METRICS.enabled\n"
+        "assert bot.XBRL_CACHE is XBRL_CACHE and XBRL_CACHE.ttl_seconds == 5.0\n"
+        "bot.configure()\n"
+    )
+    proc = run_python(code, tmp_path)
+    assert proc.stdout.count("Loaded environment variables") == 1
@@ -0,0 +1,97 @@
+import io
+import json
+import types
+
+import bot
+from metrics import Metrics
+
+
+def test_disabled_metrics_record_nothing():
+    m = Metrics(enabled=False)
+    span = m.span("fetch", endpoint="api")
+    assert span is m.span("parse")
+    with span as s:
+        s.set(status=200)
+    m.inc("matches")
+    m.observe("match", 0.5)
+    assert m.counters == {} and m.histograms == {}
+    assert m.to_prometheus() == "\n"
+
+
+def test_spans_counters_and_exports(tmp_path):
+    log = io.StringIO()
+    m = Metrics(enabled=True, log_stream=log)
+    with m.span("fetch", endpoint="api") as span:
+        span.set(status=200)
+    try:
+        with m.span("parse", kind="xbrl"):
+            raise ValueError("bad body")
+    except ValueError:
+        pass
+    m.inc("matches", 2, source="api")
+    m.inc("matches", source="api")
+    assert m.counter("matches", source="api") == 3
+
+    snap = m.snapshot()
+    assert {s["name"] for s in snap["spans"]} == {"fetch", "parse"}
+    assert next(s for s in snap["spans"] if s["name"] == "parse")["labels"] == {"kind": "xbrl", "error": "ValueError"}
+
+    text = m.to_prometheus()
+    assert "# TYPE bse_bot_matches_total counter" in text
+    assert 'bse_bot_matches_total{source="api"} 3' in text
+    assert 'bse_bot_span_seconds_bucket{span="fetch",endpoint="api",status="200",le="+Inf"} 1' in text
+    assert 'bse_bot_span_seconds_count{span="fetch",endpoint="api",status="200"} 1' in text
+
+    lines = [json.loads(line) for line in log.getvalue().splitlines()]
+    assert [line["span"] for line in lines] == ["fetch", "parse"]
+    assert lines[0]["event"] == "span" and lines[0]["status"] == 200
+
+    m.write(str(tmp_path / "run.prom"))
+    m.write(str(tmp_path / "run.json"))
+    assert (tmp_path / "run.prom").read_text(encoding="utf-8") == text
+    assert json.loads((tmp_path / "run.json").read_text(encoding="utf-8"))["counters"][0]["value"] == 3
+
+
+def test_fetch_retries_and_statuses_are_counted(monkeypatch):
+    m = Metrics(enabled=True)
+    monkeypatch.setattr(bot, "METRICS", m)
+    monkeypatch.setattr(bot.time, "sleep", lambda s: None)
+    statuses = iter([503, 200])
+
+    class Session:
+        def get(self, url, **kwargs):
+            return types.SimpleNamespace(status_code=next(statuses), headers={}, content=b"{}")
+
+    monkeypatch.setattr(bot, "get_http_session", lambda: Session())
+    bot.fetch_with_retries(bot.NEWAPI_DOMAIN + bot.API_ANN_ENDPOINT, max_attempts=2)
+    assert m.counter("fetch_retries", endpoint="api") == 1
+    assert m.counter("http_requests", endpoint="api", status=503) == 1
+    assert m.counter("http_requests", endpoint="api", status=200) == 1
+
+
+def test_poll_is_instrumented_and_dumped(monkeypatch, tmp_path):
+    m = Metrics(enabled=True)
+    monkeypatch.setattr(bot, "METRICS", m)
+    monkeypatch.setattr(bot, "METRICS_FILE", str(tmp_path / "bot.prom"))
+    table = {"Table": [
+        {"NEWSID": "n1", "NEWS_DT": "2026-02-08T10:01:00", "SCRIP_CD": 500001, "NEWSSUB": "ALPHA - 500001 - Order received", "NSURL": "https://example.com/1.pdf"},
+        {"NEWSID": "n0", "NEWS_DT": "2026-02-08T10:00:00", "SCRIP_CD": 500000, "NEWSSUB": "OTHER - 500000 - Trading window", "NSURL": "https://example.com/0.pdf"},
+    ]}
+    monkeypatch.setattr(bot, "fetch_with_retries", lambda *a, **k: types.SimpleNamespace(json=lambda: table))
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ALPHA"], raising=False)
+    monkeypatch.setattr(bot, "send_telegram", lambda msg, chat_id=None: None)
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+
+    bot.check_bse()
+    assert m.counter("polls") == 1
+    assert m.counter("rows_scanned") == 2
+    assert m.counter("matches", source="api") == 1
+    assert m.counter("classified", tag="IMPORTANT") == 1
+    spans = {s["name"] for s in m.snapshot()["spans"]}
+    assert {"poll", "parse", "match", "classify", "state_io"} <= spans
+    assert "bse_bot_polls_total 1" in (tmp_path / "bot.prom").read_text(encoding="utf-8")
+
+    # the same announcement again is deduped and the no-hit notice goes out (pytest mode)
+    bot.check_bse()
+    assert m.counter("already_seen") == 1
+    assert m.counter("nohit", outcome="sent") == 1
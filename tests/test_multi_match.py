@@ -0,0 +1,52 @@
+import json
+import types
+
+import bot
+
+
+def make_resp_json(data):
+    return types.SimpleNamespace(json=lambda: data)
+
+
+def _table():
+    return {"Table": [
+        {"NEWSID": "n3", "NEWS_DT": "2026-02-08T10:03:00", "SCRIP_CD": 500003, "NEWSSUB": "GAMMA - 500003 - Acquisition", "NSURL": "https://example.com/3.pdf"},
+        {"NEWSID": "n2", "NEWS_DT": "2026-02-08T10:02:00", "SCRIP_CD": 500002, "NEWSSUB": "OTHER - 500002 - Acquisition", "NSURL": "https://example.com/2.pdf"},
+        {"NEWSID": "n1", "NEWS_DT": "2026-02-08T10:01:00", "SCRIP_CD": 500001, "NEWSSUB": "ALPHA - 500001 - Order received", "NSURL": "https://example.com/1.pdf"},
+        {"NEWSID": "n0", "NEWS_DT": "2026-02-08T10:00:00", "SCRIP_CD": 500000, "NEWSSUB": "BETA - 500000 - Auditor resignation", "NSURL": "https://example.com/0.pdf"},
+    ]}
+
+
+def test_api_returns_every_tracked_row(monkeypatch):
+    monkeypatch.setattr(bot, "fetch_with_retries", lambda *a, **k: make_resp_json(_table()))
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ALPHA", "BETA", "GAMMA"], raising=False)
+    rows = bot.get_announcements_from_api()
+    assert [r["newsid"] for r in rows] == ["n3", "n1", "n0"]
+    # backwards compatible single-row accessor returns the newest match
+    assert bot.get_latest_announcement_from_api()["newsid"] == "n3"
+
+
+def test_check_bse_dispatches_all_new_matches_once(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "fetch_with_retries", lambda *a, **k: make_resp_json(_table()))
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ALPHA", "BETA", "GAMMA"], raising=False)
+    sent = []
+    monkeypatch.setattr(bot, "send_telegram", lambda msg, chat_id=None: sent.append(msg))
+    bot.STATE_FILE = str(tmp_path / "last_seen.json")
+
+    bot.check_bse()
+    alerts = [m for m in sent if "No New anouncement" not in m]
+    assert len(alerts) == 3
+    # oldest first
+    assert "500000" in alerts[0] and "500001" in alerts[1] and "500003" in alerts[2]
+
+    with open(bot.STATE_FILE, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    assert state["scrip"] == "500003"
+    index = bot.get_seen_index()
+    assert all(k in index for k in ("id:n0", "id:n1", "id:n3"))
+    assert "id:n2" not in index
+
+    # A second run with the same table must not re-alert
+    sent.clear()
+    bot.check_bse()
+    assert all("No New anouncement" in m for m in sent)
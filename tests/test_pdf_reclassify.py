@@ -0,0 +1,144 @@
+import types
+import zlib
+
+import pytest
+
+import pdf_text
+import bot
+from metrics import Metrics
+
+
+def make_pdf(*lines):
+    """A minimal text PDF: one FlateDecode content stream showing `lines`."""
+    ops = b"BT /F1 11 Tf 72 760 Td " + b" T* ".join(b"(" + line.encode("latin-1") + b") Tj" for line in lines) + b" ET"
+    stream = zlib.compress(ops)
+    return (b"%PDF-1.4\n1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n"
+            b"4 0 obj\n<< /Length " + str(len(stream)).encode() + b" /Filter /FlateDecode >>\nstream\n"
+            + stream + b"\nendstream\nendobj\ntrailer\n<< /Root 1 0 R >>\n%%EOF\n")
+
+
+def test_builtin_extractor_reads_text_operators():
+    content = (b"BT /F1 12 Tf (Intimation of) Tj T* [(resig) -10 (nation) -400 (of auditor \\(M/s. X\\))] TJ ET\n"
+               b"BT <0050006C0065006400670065> Tj ET")
+    stream = zlib.compress(content)
+    pdf = (b"%PDF-1.4\n3 0 obj\n<< /Length 99 /Filter /FlateDecode >>\nstream\n" + stream
+           + b"\nendstream\nendobj\n5 0 obj\n<< /Subtype /Image /Length 4 >>\nstream\nBT (x) Tj ET\nendstream\nendobj\n")
+    text = " ".join(pdf_text.extract_text_from_bytes(pdf).split())
+    assert text == "Intimation of resignation of auditor (M/s. X) Pledge"
+
+
+def test_body_rules_ignore_boilerplate_keywords():
+    assert bot.classify_body("pursuant to Regulation 30 of SEBI (LODR) Regulations, 2015")[0] is None
+    assert bot.classify_body("SEBI LODR ... resignation of the statutory auditor") == ("🚨", "🚨🚨 AUDITOR EXIT")
+
+
+# Text of a typical quarterly results filing: every "critical" word in it is boilerplate
+RESULTS_PDF = (
+    "Pursuant to Regulation 33 of the SEBI (Listing Obligations and Disclosure Requirements) Regulations, 2015, "
+    "we enclose the Unaudited Standalone and Consolidated Financial Results for the quarter ended December 31, 2025, "
+    "approved by the Board of Directors at its Board Meeting held today, along with the Limited Review Report "
+    "of the Statutory Auditor. The Statutory Auditor has expressed an unmodified conclusion. "
+    "Revenue from contracts with customers is recognised over time as project milestones are met; "
+    "the Company's order book stands at Rs. 4,210 crore. "
+    + "Segment information is presented in Note 4 and figures are regrouped where necessary. " * 20
+    + "There has been no default in repayment of borrowings and no delay in payment of interest "
+    "on non-convertible debentures. Shares pledged by promoters: Nil. The credit rating of the Company is CARE AA-."
+)
+
+
+def test_results_pdf_boilerplate_is_not_an_upgrade():
+    title_emoji, _ = bot.classify("ALPHA - Financial Results for the quarter ended December 2025")
+    emoji, tag = bot.classify_body(RESULTS_PDF)
+    assert bot._severity_rank(emoji) <= bot._severity_rank(title_emoji), tag
+
+
+def test_body_keywords_are_whole_words_and_rules_need_nearby_words():
+    assert "pledge" not in bot.keyword_positions("Shares pledged by promoters: Nil")
+    assert bot.keyword_positions("Pledge of shares")["pledge"] == [0]
+    far = "Commissioning of the project at Pune. " + "Other notes. " * 30 + "Interest was paid without delay."
+    assert bot.classify_body(far)[1] != "🚨 PROJECT DELAY"
+    assert bot.classify_body("Commissioning of the Pune project faces a delay of two quarters.") == ("🚨", "🚨 PROJECT DELAY")
+    assert bot.classify_body("There was no delay in payment of interest.")[1] != "🚨 PAYMENT DELAY"
+    assert bot.classify_body("There was a delay in payment of interest.") == ("🚨", "🚨 PAYMENT DELAY")
+
+
+class PdfSession:
+    def __init__(self, bodies):
+        self.bodies = bodies
+
+    def get(self, url, headers=None, timeout=None, params=None, stream=False):
+        body = self.bodies[url]
+        return types.SimpleNamespace(status_code=200, headers={"Content-Length": str(len(body))}, close=lambda: None,
+                                     iter_content=lambda chunk_size: iter([body]))
+
+
+def test_generic_filing_is_upgraded_from_its_pdf(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot, "ATTACHMENT_DIR", str(tmp_path / "att"))
+    monkeypatch.setattr(bot, "PDF_RECLASSIFY", True)
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ALPHA"], raising=False)
+    m = Metrics(enabled=True)
+    monkeypatch.setattr(bot, "METRICS", m)
+    base = "https://www.bseindia.com/xml-data/corpfiling/AttachLive/"
+    body = make_pdf("Pursuant to Regulation 30 of SEBI (LODR) Regulations,",
+                    "we inform you of the resignation of M/s. X & Co, the Statutory Auditor.")
+    monkeypatch.setattr(bot, "get_http_session", lambda: PdfSession({base + "a.pdf": body, base + "b.pdf": body}))
+    sent = []
+    monkeypatch.setattr(bot, "send_telegram", lambda msg, **kw: sent.append(msg))
+    rows = [{"date": "2026-02-08T10:00:00", "scrip": "ALPHA", "newsid": "n1", "pdf": base + "a.pdf",
+             "title": "ALPHA - Disclosure under Regulation 30"}]
+    monkeypatch.setattr(bot, "get_announcements_from_api", lambda: rows)
+
+    bot.check_bse()
+    assert bot.wait_for_attachments(60)
+    # the title alone is ignored, so the only message is the upgrade
+    assert len(sent) == 1 and sent[0].startswith("⬆️ Upgraded to 🚨🚨 AUDITOR EXIT")
+    assert "Link : " + base + "a.pdf" in sent[0]
+    assert m.counter("pdf_text", outcome="extracted") == 1
+
+    # the same document filed again under another URL is not extracted a second time
+    rows[:] = [dict(rows[0], newsid="n2", pdf=base + "b.pdf", date="2026-02-08T11:00:00")]
+    bot.check_bse()
+    assert bot.wait_for_attachments(60)
+    assert len(sent) == 2
+    assert m.counter("pdf_text", outcome="extracted") == 1
+    assert m.counter("pdf_text", outcome="cached") == 1
+    assert m.counter("upgrades", tag="🚨🚨 AUDITOR EXIT") == 2
+
+    # downloading an announcement's attachment again does not repeat its upgrade
+    assert bot.download_attachment(rows[0]) == "cached"
+    assert len(sent) == 2
+
+
+class FakeDispatcher:
+    def __init__(self):
+        self.queued, self.flushes = [], 0
+
+    def enqueue(self, chat_id, text):
+        self.queued.append((chat_id, text))
+
+    async def flush(self):
+        self.flushes += 1
+        return len(self.queued)
+
+
+def test_upgrade_goes_through_the_polls_telegram_queue(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot, "ATTACHMENT_DIR", str(tmp_path / "att"))
+    monkeypatch.setattr(bot, "PDF_RECLASSIFY", True)
+    monkeypatch.setattr(bot, "CHAT_ID", "42")
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ALPHA"], raising=False)
+    url = "https://www.bseindia.com/xml-data/corpfiling/AttachLive/c.pdf"
+    body = make_pdf("We inform you of the resignation of M/s. X & Co, the Statutory Auditor.")
+    monkeypatch.setattr(bot, "get_http_session", lambda: PdfSession({url: body}))
+    monkeypatch.setattr(bot, "send_telegram", lambda msg, **kw: pytest.fail("sent around the queue"))
+    rec = {"date": "2026-02-08T10:00:00", "scrip": "ALPHA", "newsid": "n3", "pdf": url,
+           "title": "ALPHA - Disclosure under Regulation 30"}
+    dispatcher = FakeDispatcher()
+
+    assert bot.download_attachment(dict(rec), dispatcher=dispatcher) == "stored"
+    assert [chat for chat, _ in dispatcher.queued] == ["42"]
+    assert dispatcher.queued[0][1].startswith("⬆️ Upgraded to 🚨🚨 AUDITOR EXIT")
+    assert dispatcher.flushes == 1
+    assert bot.download_attachment(dict(rec), dispatcher=dispatcher) == "cached"
+    assert len(dispatcher.queued) == 1
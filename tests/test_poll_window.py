@@ -0,0 +1,92 @@
+import asyncio
+import datetime
+import json
+import types
+
+import bot
+
+
+def _row(newsid, day, hhmm, scrip, sym):
+    return {"NEWSID": newsid, "NEWS_DT": f"{day}T{hhmm}:00", "SCRIP_CD": scrip,
+            "NEWSSUB": f"{sym} - {scrip} - Order received", "NSURL": f"https://example.com/{newsid}.pdf"}
+
+
+class DayAPI:
+    """Fake AnnSubCategoryGetData serving `days` (YYYYMMDD -> rows, newest first)."""
+
+    def __init__(self, days):
+        self.days = days
+        self.queried = []
+        self.in_flight = self.max_in_flight = 0
+
+    async def fetch(self, url, headers=None, timeout=None, max_attempts=None, params=None, **kwargs):
+        if bot.API_ANN_ENDPOINT not in url:
+            return None
+        assert params["strPrevDate"] == params["strToDate"]
+        self.queried.append(params["strPrevDate"])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        body = json.dumps({"Table": self.days.get(params["strPrevDate"], [])}).encode("utf-8")
+        return types.SimpleNamespace(status_code=200, content=body, headers={}, json=lambda: json.loads(body))
+
+
+def poll(api):
+    rows = asyncio.run(bot.async_get_announcements_from_api(fetch=api.fetch, incremental=True))
+    bot.commit_api_poll_state()
+    return rows
+
+
+def test_poll_window_spans_gap_and_is_capped():
+    today = datetime.date(2026, 2, 9)
+    assert bot.poll_window(None, today) == ["20260209"]
+    assert bot.poll_window("2026-02-09T09:00:00", today) == ["20260209"]
+    assert bot.poll_window("2026-02-06T23:59:00", today) == ["20260209", "20260208", "20260207", "20260206"]
+    assert bot.poll_window("2026-01-01T10:00:00", today, max_days=3) == ["20260209", "20260208", "20260207"]
+    assert bot.poll_window("2026-03-01T10:00:00", today) == ["20260209"]  # clock skew
+
+
+def test_catch_up_after_midnight_and_skipped_runs(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ALPHA", "BETA"], raising=False)
+    today = [datetime.date(2026, 2, 6)]
+    monkeypatch.setattr(bot, "_bse_today", lambda: today[0])
+    api = DayAPI({"20260206": [_row("a1", "2026-02-06", "15:00", 500001, "ALPHA")]})
+    assert [r["newsid"] for r in poll(api)] == ["a1"]
+
+    # a late filing that day and filings on the following days, all while cron was stalled
+    api.days["20260206"].insert(0, _row("a2", "2026-02-06", "23:58", 500002, "BETA"))
+    api.days["20260207"] = [_row("a3", "2026-02-07", "11:00", 500001, "ALPHA")]
+    api.days["20260209"] = [_row("a4", "2026-02-09", "09:30", 500002, "BETA")]
+    today[0] = datetime.date(2026, 2, 9)
+    api.queried.clear()
+    assert [r["newsid"] for r in poll(api)] == ["a4", "a3", "a2"]
+    assert sorted(api.queried) == ["20260206", "20260207", "20260208", "20260209"]
+
+    # caught up: the next poll only covers today again
+    api.queried.clear()
+    assert poll(api) == []
+    assert api.queried == ["20260209"]
+
+
+def test_window_days_are_fetched_concurrently(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ALPHA"], raising=False)
+    monkeypatch.setattr(bot, "API_MAX_WINDOW_DAYS", 3)
+    monkeypatch.setattr(bot, "_bse_today", lambda: datetime.date(2026, 2, 9))
+    bot.save_api_poll_state({"watch": bot.hashlib.sha1(b"ALPHA").hexdigest(),
+                             "hwm": {"date": "2026-01-20T10:00:00", "newsids": ["old"]}})
+    api = DayAPI({d: [_row(f"n{d}", f"{d[:4]}-{d[4:6]}-{d[6:]}", "10:00", 500001, "ALPHA")]
+                  for d in ("20260207", "20260208", "20260209")})
+    assert [r["newsid"] for r in poll(api)] == ["n20260209", "n20260208", "n20260207"]
+    assert sorted(api.queried) == ["20260207", "20260208", "20260209"]
+    assert api.max_in_flight == 3
+
+
+def test_single_day_poll_state_is_migrated(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    bot.save_api_poll_state({"watch": "w", "day": "20260208", "validators": {"sha1": "abc"},
+                             "hwm": {"date": "2026-02-08T10:00:00", "newsids": ["n1"]}})
+    state = bot.load_api_poll_state()
+    assert state["validators"] == {"20260208": {"sha1": "abc"}} and "day" not in state
@@ -0,0 +1,127 @@
+import asyncio
+import datetime
+import json
+import types
+
+import bot
+
+
+def _row(newsid, dt, scrip):
+    return {"NEWSID": newsid, "NEWS_DT": dt, "SCRIP_CD": scrip,
+            "NEWSSUB": f"CO{scrip} - {scrip} - Order received", "NSURL": f"https://example.com/{newsid}.pdf"}
+
+
+class ExchangeAPI:
+    """Fake AnnSubCategoryGetData over a whole exchange: `rows` (newest first) of one day,
+    honouring strScrip and paginating by API_PAGE_SIZE."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.params = []
+        self.bytes = 0
+
+    async def fetch(self, url, headers=None, timeout=None, max_attempts=None, params=None, **kwargs):
+        if bot.API_ANN_ENDPOINT not in url:
+            return None
+        self.params.append(dict(params))
+        rows = [r for r in self.rows if not params["strScrip"] or str(r["SCRIP_CD"]) == params["strScrip"]]
+        size = bot.API_PAGE_SIZE
+        page = int(params["pageno"])
+        body = json.dumps({"Table": rows[(page - 1) * size: page * size], "Table1": [{"ROWCNT": len(rows)}]}).encode("utf-8")
+        self.bytes += len(body)
+        return types.SimpleNamespace(status_code=200, content=body, headers={}, json=lambda: json.loads(body))
+
+
+def _setup(monkeypatch, tmp_path, tracked):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot, "SCRIP_MASTER_FILE", str(tmp_path / "scrip_master.json"))
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", tracked, raising=False)
+    monkeypatch.setattr(bot, "_bse_today", lambda: datetime.date(2026, 2, 8))
+    monkeypatch.setattr(bot, "API_PAGE_SIZE", 50)
+
+
+def poll(api):
+    rows = asyncio.run(bot.async_get_announcements_from_api(fetch=api.fetch, incremental=True))
+    bot.commit_api_poll_state()
+    return rows
+
+
+def test_planner_prefers_per_scrip_queries_for_small_watchlists():
+    matcher = bot.TrackedMatcher([str(500000 + i) for i in range(26)])
+    day = ["20260208"]
+    assert bot.choose_query_plan(matcher, day) == "scrip"
+    assert bot.choose_query_plan(matcher, ["20260208", "20260207"], incremental=True) == "scrip"
+    # a broad poll that only reads one page after the high-water mark is cheaper than 26 queries
+    assert bot.choose_query_plan(matcher, day, incremental=True) == "broad"
+    # a quiet exchange makes the broad query cheap as well
+    assert bot.choose_query_plan(matcher, day, {"day_rows": 40}) == "broad"
+    # symbols without a code can only be matched in a broad query
+    assert bot.choose_query_plan(bot.TrackedMatcher(["500001", "NOCODE"]), day) == "broad"
+    assert bot.choose_query_plan(bot.TrackedMatcher([]), day) == "broad"
+
+
+def test_forced_plan(monkeypatch):
+    matcher = bot.TrackedMatcher(["500001"])
+    monkeypatch.setattr(bot, "API_QUERY_PLAN", "broad")
+    assert bot.choose_query_plan(matcher, ["20260208"]) == "broad"
+    monkeypatch.setattr(bot, "API_QUERY_PLAN", "scrip")
+    assert bot.choose_query_plan(matcher, ["20260208"], {"day_rows": 1}) == "scrip"
+
+
+def test_per_scrip_poll_cuts_payload(monkeypatch, tmp_path):
+    _setup(monkeypatch, tmp_path, [str(500000 + i) for i in range(26)])
+    day = [_row(f"n{i}", f"2026-02-08T{17 - i // 100:02d}:{59 - i % 60:02d}:00", 600000 + i) for i in range(1500)]
+    day[10] = _row("hit1", day[10]["NEWS_DT"], 500003)
+    day[900] = _row("hit2", day[900]["NEWS_DT"], 500007)
+
+    broad = ExchangeAPI(day)
+    monkeypatch.setattr(bot, "API_QUERY_PLAN", "broad")
+    assert [r["newsid"] for r in asyncio.run(bot.async_get_announcements_from_api(fetch=broad.fetch))] == ["hit1", "hit2"]
+
+    monkeypatch.setattr(bot, "API_QUERY_PLAN", "auto")
+    api = ExchangeAPI(day)
+    assert [r["newsid"] for r in poll(api)] == ["hit1", "hit2"]
+    assert {p["strScrip"] for p in api.params} == {str(500000 + i) for i in range(26)}
+    assert all(p["strPrevDate"] == p["strToDate"] == "20260208" for p in api.params)
+    assert api.bytes * 100 < broad.bytes
+
+    # observations are kept for the next plan, and the high-water mark still applies
+    state = bot.load_api_poll_state()
+    assert state["plan_stats"]["scrip_rows_per_day"] < 0.5
+    assert state["hwm"]["newsids"] == ["hit1"]
+    assert not poll(api)
+
+
+def test_per_scrip_query_failure_does_not_advance_the_mark(monkeypatch, tmp_path):
+    _setup(monkeypatch, tmp_path, ["500001", "500002"])
+    monkeypatch.setattr(bot, "API_QUERY_PLAN", "scrip")
+    api = ExchangeAPI([_row("a", "2026-02-08T10:00:00", 500001)])
+    ok = api.fetch
+
+    async def flaky(url, params=None, **kwargs):
+        if params and params.get("strScrip") == "500002":
+            raise RuntimeError("boom")
+        return await ok(url, params=params, **kwargs)
+
+    assert asyncio.run(bot.async_get_announcements_from_api(fetch=flaky, incremental=True)) is None
+    assert bot.load_api_poll_state() == {}
+
+
+def test_quiet_per_scrip_polls_do_not_widen_the_window(monkeypatch, tmp_path, capsys):
+    _setup(monkeypatch, tmp_path, ["500001"])
+    monkeypatch.setattr(bot, "API_QUERY_PLAN", "scrip")
+    today = [datetime.date(2026, 2, 5)]
+    monkeypatch.setattr(bot, "_bse_today", lambda: today[0])
+    api = ExchangeAPI([_row("a", "2026-02-05T10:00:00", 500001)])
+    assert [r["newsid"] for r in poll(api)] == ["a"]
+
+    # the tracked scrip files nothing more; the gap since the last poll is warned about once
+    today[0] = datetime.date(2026, 2, 20)
+    poll(api)
+    assert "Last poll was 15 day(s) ago" in capsys.readouterr().out
+    for _ in range(2):
+        api.params.clear()
+        assert not poll(api)
+        assert "Last poll was" not in capsys.readouterr().out
+        assert {(p["strPrevDate"], p["strToDate"]) for p in api.params} == {("20260220", "20260220")}
+    assert bot.load_api_poll_state()["hwm"]["date"] == "2026-02-05T10:00:00"
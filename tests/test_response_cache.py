@@ -0,0 +1,88 @@
+import asyncio
+import json
+import os
+import types
+
+import pytest
+
+import bot
+from response_cache import ResponseCache
+
+
+def count_objects(root):
+    return sum(len(files) for _, _, files in os.walk(os.path.join(root, "objects")))
+
+
+def test_store_lookup_and_content_addressing(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c"))
+    body = json.dumps({"Table": [{"NEWSID": "1"}]}).encode("utf-8")
+    cache.store("https://x/AnnSubCategoryGetData/w", {"pageno": 1, "strScrip": ""}, 200,
+                {"Content-Type": "application/json; charset=utf-8", "Server": "x"}, body, fetched_at=100)
+    cache.store("https://x/AnnSubCategoryGetData/w", {"strScrip": "", "pageno": 1}, 200, {}, body, fetched_at=200)
+    cache.store("https://x/AnnSubCategoryGetData/w", {"pageno": 1, "strScrip": ""}, 200, {}, b"newer", fetched_at=300)
+    assert count_objects(cache.root) == 2
+    r = cache.lookup("https://x/AnnSubCategoryGetData/w", {"strScrip": "", "pageno": "1"})
+    assert r.content == b"newer"
+    old = cache.lookup("https://x/AnnSubCategoryGetData/w", {"pageno": 1, "strScrip": ""}, at=150)
+    assert old.json() == {"Table": [{"NEWSID": "1"}]}
+    assert old.headers == {"Content-Type": "application/json; charset=utf-8"}
+    assert cache.lookup("https://x/other", {}) is None
+    assert cache.stats()["captures"] == 3
+
+
+def test_eviction_by_age_and_size(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c"), max_bytes=10 ** 9, max_age_seconds=100)
+    cache.store("u1", {}, 200, {}, b"a" * 10, fetched_at=0)
+    cache.store("u2", {}, 200, {}, b"b" * 10, fetched_at=150)
+    assert cache.evict(now=160) == 1
+    assert cache.lookup("u1") is None and cache.lookup("u2") is not None
+    assert count_objects(cache.root) == 1
+
+    cache.max_age_seconds = 0
+    cache.max_bytes = 1
+    cache.store("u3", {}, 200, {}, os.urandom(200), fetched_at=170)
+    cache.evict(now=170)
+    assert cache.stats()["captures"] == 0
+    assert count_objects(cache.root) == 0
+
+
+def test_evict_never_removes_a_body_being_stored(tmp_path):
+    cache = ResponseCache(str(tmp_path / "c"))
+
+    class EvictingHeaders(dict):
+        # stands in for another thread's evict() landing in the middle of store()
+        def get(self, key, default=None):
+            cache.evict()
+            return super().get(key, default)
+
+    cache.store("u1", {}, 200, EvictingHeaders({"ETag": '"v1"'}), b"body")
+    assert cache.lookup("u1").content == b"body"
+    assert count_objects(cache.root) == 1
+
+
+def test_record_then_replay_without_network(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "RESPONSE_CACHE_DIR", str(tmp_path / "cache"), raising=False)
+    body = json.dumps({"Table": [{"NEWSID": "n1"}]}).encode("utf-8")
+
+    def fake_get(url, headers=None, timeout=None, params=None, stream=False):
+        return types.SimpleNamespace(status_code=200, content=body, headers={"Content-Type": "application/json"},
+                                     text=body.decode("utf-8"), json=lambda: json.loads(body))
+
+    url = bot.NEWAPI_DOMAIN + bot.API_ANN_ENDPOINT
+    params = bot.announcement_params("20260208")
+    monkeypatch.setattr(bot, "get_http_session", lambda: types.SimpleNamespace(get=fake_get))
+    monkeypatch.setattr(bot, "RESPONSE_CACHE_MODE", "record", raising=False)
+    bot.fetch_with_retries(url, params=params, max_attempts=1)
+    bot.fetch_with_retries("https://api.telegram.org/other", max_attempts=1)
+    assert bot.get_response_cache().stats()["captures"] == 1
+
+    def no_network(*a, **k):
+        raise AssertionError("network used in replay mode")
+
+    monkeypatch.setattr(bot, "get_http_session", lambda: types.SimpleNamespace(get=no_network, post=no_network))
+    monkeypatch.setattr(bot, "RESPONSE_CACHE_MODE", "replay", raising=False)
+    assert bot.fetch_with_retries(url, params=params).json()["Table"][0]["NEWSID"] == "n1"
+    assert asyncio.run(bot.async_fetch_with_retries(url, params=params)).json()["Table"][0]["NEWSID"] == "n1"
+    with pytest.raises(Exception, match="Replay miss"):
+        bot.fetch_with_retries(url, params=bot.announcement_params("20260209"))
+    assert asyncio.run(bot.async_telegram_post(1, "hi")) == (200, None)
@@ -0,0 +1,189 @@
+import email.utils
+import json
+import types
+
+import pytest
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+import bot
+from retry_policy import (CircuitBreaker, CircuitBreakers, CircuitOpenError, DeadlineExceeded,
+                          full_jitter_delay, parse_retry_after)
+
+
+def test_full_jitter_is_capped():
+    top = lambda lo, hi: hi  # noqa: E731 - always the largest delay
+    assert full_jitter_delay(1, 1, 8, rand=top) == 1
+    assert full_jitter_delay(3, 1, 8, rand=top) == 4
+    assert full_jitter_delay(10, 1, 8, rand=top) == 8
+    assert full_jitter_delay(3, 0, 8) == 0.0
+    assert 0 <= full_jitter_delay(4, 1, 8) <= 8
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    date = email.utils.formatdate(1_000_030, usegmt=True)
+    assert parse_retry_after(date, now=1_000_000) == 30.0
+
+
+def test_breaker_opens_probes_and_closes():
+    now = [0.0]
+    b = CircuitBreaker(failure_threshold=3, reset_timeout=60, clock=lambda: now[0])
+    assert [b.record_failure() for _ in range(3)] == [False, False, True]
+    assert b.state == "open" and not b.allow()
+    now[0] = 61
+    assert b.state == "half_open"
+    assert b.allow() and not b.allow()  # a single probe
+    assert b.record_failure()  # failed probe re-opens
+    assert b.state == "open"
+    now[0] = 122
+    assert b.allow()
+    assert b.record_success()
+    assert b.state == "closed" and b.allow()
+
+
+def test_rate_limited_probe_reopens_the_breaker():
+    now = [0.0]
+    b = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    assert b.record_failure()
+    now[0] = 10
+    assert b.allow()
+    assert b.record_rate_limited(30)
+    assert b.state == "open" and b.failures == 1
+    assert b.wait_time() == 30
+    # the probe slot is free again once the breaker half-opens
+    for t in (20, 100, 10000):
+        now[0] = t
+        assert b.state == "half_open" and b.allow()
+        assert b.record_rate_limited()
+    now[0] = 10010
+    assert b.allow() and b.record_success()
+    assert not b.record_rate_limited(5)  # a 429 on a closed breaker only defers
+
+
+def fake_session(responses, calls):
+    class Session:
+        def get(self, url, **kwargs):
+            calls.append(kwargs.get("timeout"))
+            r = responses.pop(0) if len(responses) > 1 else responses[0]
+            if isinstance(r, Exception):
+                raise r
+            return r
+
+    return Session()
+
+
+def resp(status, headers=None):
+    return types.SimpleNamespace(status_code=status, headers=headers or {}, content=b"{}")
+
+
+def test_outage_opens_circuit_and_next_run_fails_fast(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot, "CIRCUIT_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(bot.time, "sleep", lambda s: None)
+    calls = []
+    session = fake_session([RequestsConnectionError("down")], calls)
+    monkeypatch.setattr(bot, "get_http_session", lambda: session)
+    url = "https://www.bseindia.com/corporates/ann.html"
+
+    with pytest.raises(CircuitOpenError):
+        bot.fetch_with_retries(url, max_attempts=5)
+    assert len(calls) == 3
+    with pytest.raises(CircuitOpenError):
+        bot.fetch_with_retries(url)
+    assert len(calls) == 3
+    state = json.loads((tmp_path / "circuit_state.json").read_text(encoding="utf-8"))
+    assert state["hosts"]["www.bseindia.com"]["opened_at"]
+
+    # a new process (next cron run) loads the open breaker and does not touch the host
+    bot._CIRCUIT_BREAKERS.clear()
+    with pytest.raises(CircuitOpenError):
+        bot.fetch_with_retries(url)
+    assert len(calls) == 3
+    # other hosts are unaffected
+    assert bot.get_circuit_breakers().get("api.bseindia.com").allow()
+
+
+def test_retry_after_is_honoured(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    slept = []
+    monkeypatch.setattr(bot.time, "sleep", slept.append)
+    calls = []
+    session = fake_session([resp(429, {"Retry-After": "3"}), resp(200)], calls)
+    monkeypatch.setattr(bot, "get_http_session", lambda: session)
+    r = bot.fetch_with_retries("https://api.bseindia.com/x", backoff_factor=0.01)
+    assert r.status_code == 200
+    assert slept and slept[0] >= 2.9
+    # rate limiting does not count towards opening the circuit
+    assert bot.get_circuit_breakers().get("api.bseindia.com").failures == 0
+
+
+def test_retry_after_defers_later_calls_to_the_host(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    slept = []
+    monkeypatch.setattr(bot.time, "sleep", slept.append)
+    calls = []
+    session = fake_session([resp(429, {"Retry-After": "30"}), resp(200)], calls)
+    monkeypatch.setattr(bot, "get_http_session", lambda: session)
+    with pytest.raises(Exception):
+        bot.fetch_with_retries("https://api.bseindia.com/x", max_attempts=1, deadline=0)
+    assert len(calls) == 1 and not slept
+
+    # a new call waits out the Retry-After before contacting the host...
+    assert bot.fetch_with_retries("https://api.bseindia.com/y", deadline=0).status_code == 200
+    assert len(calls) == 2 and slept and slept[0] > 29
+    # ...and gives up at once when the wait would overrun its deadline
+    bot.get_circuit_breakers().get("api.bseindia.com").defer(30)
+    with pytest.raises(DeadlineExceeded):
+        bot.fetch_with_retries("https://api.bseindia.com/z", deadline=5)
+    assert len(calls) == 2
+
+
+def test_rate_limited_probe_does_not_wedge_the_host(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot.time, "sleep", lambda s: None)
+    now = [1000.0]
+    breakers = CircuitBreakers(None, failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    monkeypatch.setattr(bot, "get_circuit_breakers", lambda: breakers)
+    calls = []
+    session = fake_session([resp(500), resp(429), resp(200)], calls)
+    monkeypatch.setattr(bot, "get_http_session", lambda: session)
+    url = "https://api.bseindia.com/x"
+    with pytest.raises(CircuitOpenError):
+        bot.fetch_with_retries(url, max_attempts=3, deadline=0)
+    now[0] += 10
+    with pytest.raises(Exception):
+        bot.fetch_with_retries(url, max_attempts=1, deadline=0)  # the probe gets a 429
+    assert breakers.get("api.bseindia.com").state == "open"
+    now[0] += 10
+    assert bot.fetch_with_retries(url, max_attempts=1, deadline=0).status_code == 200
+    assert breakers.get("api.bseindia.com").state == "closed" and len(calls) == 3
+
+
+def test_deadline_limits_sleeps_and_timeouts(monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    monkeypatch.setattr(bot.time, "sleep", lambda s: pytest.fail("must not sleep past the deadline"))
+    calls = []
+    session = fake_session([resp(503, {"Retry-After": "30"})], calls)
+    monkeypatch.setattr(bot, "get_http_session", lambda: session)
+    with pytest.raises(DeadlineExceeded):
+        bot.fetch_with_retries("https://api.bseindia.com/x", timeout=20, deadline=5)
+    assert len(calls) == 1 and calls[0] <= 5
+
+    # a poll's run budget caps every fetch inside it
+    monkeypatch.setattr(bot, "_RUN_DEADLINE_AT", bot.time.monotonic() - 1)
+    with pytest.raises(DeadlineExceeded):
+        bot.fetch_with_retries("https://api.bseindia.com/y")
+    assert len(calls) == 1
+
+
+def test_breaker_state_roundtrip(tmp_path):
+    path = str(tmp_path / "circuit.json")
+    breakers = CircuitBreakers(path, failure_threshold=1, reset_timeout=60)
+    breakers.get("a").record_failure()
+    breakers.get("b").record_success()
+    breakers.save()
+    loaded = CircuitBreakers(path, failure_threshold=1, reset_timeout=60)
+    assert loaded.get("a").state == "open"
+    assert dict(loaded).keys() == {"a"}
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import types
+
+import bot
+from scrip_resolver import ScripResolver, normalize_name
+
+
+CSV = """Security Code,Issuer Name,Security Id,Security Name,Status
+539594 ,Vishnu Prakash R Punglia Ltd,VPRPL,Vishnu Prakash R Punglia Limited,Active
+500187,AGI Greenpac Limited,AGI,AGI Greenpac Ltd,Active
+"""
+
+
+def test_load_csv_and_resolve(tmp_path):
+    master = tmp_path / "ListofScrips.csv"
+    master.write_text(CSV, encoding="utf-8")
+    r = ScripResolver()
+    assert r.load_master_file(str(master)) == 2
+    assert r.code_for("vprpl") == 539594
+    assert r.code_for("AGI Greenpac") == 500187
+    assert r.symbol_for("500187") == "AGI"
+    assert r.name_for("VPRPL") == "Vishnu Prakash R Punglia Ltd"
+    assert r.resolve("UNKNOWN") is None
+    assert r.code_for("123456") == 123456
+    assert normalize_name("The Acme Co. Ltd") == "THE ACME"
+
+
+def test_cache_round_trip_and_staleness(tmp_path):
+    cache = tmp_path / "scrip_master.json"
+    r = ScripResolver(str(cache), ttl_seconds=100)
+    assert r.is_stale()
+    r.load_rows([{"SCRIP_CD": "539594", "scrip_id": "VPRPL", "Scrip_Name": "Vishnu Prakash"}], fetched_at=1000)
+    r.save()
+    again = ScripResolver(str(cache), ttl_seconds=100)
+    assert again.code_for("VPRPL") == 539594
+    assert not again.is_stale(now=1050)
+    assert again.is_stale(now=1200)
+    # An empty/garbage payload never wipes a good mapping
+    assert again.load_rows([{"foo": "bar"}]) == 0
+    assert again.load_rows([{"SCRIP_CD": 500003, "scrip_id": "", "Scrip_Name": ""}]) == 0
+    assert again.code_for("VPRPL") == 539594
+
+
+def test_matcher_matches_resolved_codes():
+    r = ScripResolver()
+    r.load_rows([{"SCRIP_CD": 539594, "scrip_id": "VPRPL", "Scrip_Name": "Vishnu Prakash"}])
+    m = bot.TrackedMatcher(["VPRPL", "NOPE", "500187"], resolver=r)
+    assert m.match_row({"SCRIP_CD": 539594, "NEWSSUB": "Board Meeting Intimation"})
+    assert m.xbrl_codes() == ["539594", "500187"]
+    assert m.unresolved == ["NOPE"]
+
+
+def test_refresh_from_api_and_xbrl_skips_unresolved(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot, "SCRIP_MASTER_FILE", str(tmp_path / "scrip_master.json"), raising=False)
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["VPRPL", "NOPE"], raising=False)
+    xbrl_codes = []
+
+    class Resp:
+        def __init__(self, data):
+            self._data = data
+            self.text = json.dumps(data)
+
+        def json(self):
+            return self._data
+
+    async def fake_fetch(url, headers=None, timeout=None, max_attempts=None, params=None):
+        if bot.SCRIP_MASTER_ENDPOINT in url:
+            return Resp({"Table": [{"SCRIP_CD": "539594", "scrip_id": "VPRPL", "Scrip_Name": "Vishnu Prakash"}]})
+        if url == bot.XBRL_URL:
+            xbrl_codes.append(params["Scripcode"])
+            return None
+        return Resp({"Table": [{"SCRIP_CD": 500001, "NEWSSUB": "Other Co - Update", "NEWSID": "1"}], "Table1": [{"ROWCNT": 1}]})
+
+    assert asyncio.run(bot.async_get_announcements_from_api(fetch=fake_fetch)) is None
+    assert bot.get_scrip_resolver().code_for("VPRPL") == 539594
+    assert (tmp_path / "scrip_master.json").exists()
+    assert xbrl_codes == ["539594"]
+
+
+def test_refresh_rejects_rows_that_are_not_a_scrip_master(tmp_path, monkeypatch):
+    async def fake_fetch(url, **kwargs):
+        # the shape of AnnSubCategoryGetData, as a catch-all fake API returns it
+        return types.SimpleNamespace(json=lambda: {"Table": [
+            {"SCRIP_CD": 500003, "SLONGNAME": "Gamma Ltd", "NEWSSUB": "GAMMA - 500003 - Acquisition"}]})
+
+    assert asyncio.run(bot.async_refresh_scrip_master(fake_fetch)) is False
+    assert not (tmp_path / "scrip_master.json").exists()
+    assert len(bot.get_scrip_resolver()) == 0
@@ -1,6 +1,5 @@
 import os
 import bot
-import requests
 import types
 
 
@@ -9,7 +8,7 @@ def test_set_secrets_and_send(monkeypatch, tmp_path):
     monkeypatch.delenv("BOT_TOKEN", raising=False)
     monkeypatch.delenv("CHAT_ID", raising=False)
 
-    # Install fake requests.post to capture calls
+    # Install fake pooled session to capture calls
     called = {}
     def fake_post(url, json=None, timeout=None):
         called['url'] = url
@@ -20,7 +19,7 @@ def test_set_secrets_and_send(monkeypatch, tmp_path):
         r.text = '{}'
         return r
 
-    monkeypatch.setattr(requests, 'post', fake_post)
+    monkeypatch.setattr(bot, 'get_http_session', lambda: types.SimpleNamespace(post=fake_post))
 
     # Set secrets in memory
     bot.set_secrets(bot_token='TEST_TOKEN_123', chat_id='-999')
@@ -0,0 +1,57 @@
+import json
+import threading
+
+import bot
+from seen_index import SeenIndex
+
+
+def test_add_contains_and_filter_new(tmp_path):
+    index = SeenIndex(str(tmp_path / "seen.sqlite3"))
+    assert index.add("id:1", "ACME", "Board Meeting") is True
+    assert index.add("id:1", "ACME", "Board Meeting") is False
+    assert "id:1" in index
+    assert "id:2" not in index
+    assert index.filter_new(["id:3", "id:1", "id:2"]) == ["id:3", "id:2"]
+    assert len(index) == 1
+
+
+def test_entries_persist_and_expire(tmp_path):
+    path = str(tmp_path / "seen.sqlite3")
+    index = SeenIndex(path, ttl_seconds=60)
+    index.add_many([("a", "", ""), ("b", "", "")])
+    index.close()
+
+    reopened = SeenIndex(path, ttl_seconds=60)
+    assert "a" in reopened and "b" in reopened
+    import time
+    assert reopened.expire(now=time.time() + 120) == 2
+    assert "a" not in reopened
+
+
+def test_concurrent_writers_claim_each_key_once(tmp_path):
+    path = str(tmp_path / "seen.sqlite3")
+    indexes = [SeenIndex(path) for _ in range(4)]
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(index):
+        for i in range(50):
+            if index.add(f"k{i}"):
+                with lock:
+                    claimed.append(i)
+
+    threads = [threading.Thread(target=worker, args=(ix,)) for ix in indexes]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claimed) == list(range(50))
+
+
+def test_legacy_seen_list_is_imported(tmp_path, monkeypatch):
+    state_file = tmp_path / "last_seen.json"
+    state_file.write_text(json.dumps({"scrip": "X", "seen": ["id:old"]}), encoding="utf-8")
+    monkeypatch.setattr(bot, "STATE_FILE", str(state_file))
+    index = bot.get_seen_index()
+    assert "id:old" in index
+    assert index.path == str(tmp_path / "seen_index.sqlite3")
@@ -0,0 +1,63 @@
+import json
+import types
+
+import bot
+from scrip_resolver import ScripResolver
+
+
+def test_route_by_symbol_and_severity():
+    r = ScripResolver()
+    r.load_rows([{"SCRIP_CD": 539594, "scrip_id": "VPRPL", "Scrip_Name": "Vishnu Prakash"}])
+    idx = bot.SubscriberIndex([
+        {"name": "a", "chat_id": 1, "symbols": ["ALPHA", "VPRPL"]},
+        {"name": "b", "chat_id": 2, "symbols": "ALPHA,BETA", "min_severity": "critical"},
+    ], resolver=r)
+    assert idx.symbols == ["ALPHA", "VPRPL", "BETA"]
+    assert idx.by_symbol["ALPHA"] == [0, 1]
+    assert [s["chat_id"] for s in idx.route({"scrip": "500001", "title": "ALPHA - Order"}, "INFO")] == [1]
+    assert [s["chat_id"] for s in idx.route({"scrip": "500001", "title": "ALPHA - Fraud"}, "CRITICAL")] == [1, 2]
+    assert idx.route({"scrip": "500002", "title": "BETA - Order"}, "IMPORTANT") == []
+    # resolved scrip code routes to the symbol's subscriber
+    assert [s["chat_id"] for s in idx.route({"scrip": "539594", "title": "Board Meeting"})] == [1]
+
+
+def test_aliases_of_one_company_reach_every_subscriber():
+    r = ScripResolver()
+    r.load_rows([{"SCRIP_CD": 539594, "scrip_id": "VPRPL", "Scrip_Name": "Vishnu Prakash"}])
+    subs = [{"name": "a", "chat_id": 1, "symbols": ["539594"]}, {"name": "b", "chat_id": 2, "symbols": ["VPRPL"]}]
+    for order in (subs, subs[::-1]):
+        idx = bot.SubscriberIndex(order, resolver=r)
+        assert idx.matcher.codes == {539594: tuple(s["symbols"][0] for s in order)}
+        for rec in ({"scrip": "539594", "title": "Board Meeting"}, {"scrip": "", "title": "VPRPL - Board Meeting"}):
+            assert sorted(s["chat_id"] for s in idx.route(rec)) == [1, 2]
+
+
+def test_check_bse_fetches_once_and_fans_out(monkeypatch, tmp_path):
+    table = {"Table": [
+        {"NEWSID": "s2", "NEWS_DT": "2026-02-08T10:02:00", "SCRIP_CD": 500002, "NEWSSUB": "BETA - 500002 - Auditor resignation", "NSURL": "https://example.com/2.pdf"},
+        {"NEWSID": "s1", "NEWS_DT": "2026-02-08T10:01:00", "SCRIP_CD": 500001, "NEWSSUB": "ALPHA - 500001 - Shareholding update", "NSURL": "https://example.com/1.pdf"},
+    ]}
+    fetches = []
+
+    def fake_fetch(url, *a, **k):
+        fetches.append(url)
+        return types.SimpleNamespace(json=lambda: table)
+
+    subs = tmp_path / "subscribers.json"
+    subs.write_text(json.dumps({"subscribers": [
+        {"name": "desk-a", "chat_id": -101, "symbols": ["ALPHA", "BETA"]},
+        {"name": "desk-b", "chat_id": -102, "symbols": ["BETA"], "min_severity": "CRITICAL"},
+        {"name": "desk-c", "chat_id": -103, "symbols": ["ALPHA"], "min_severity": "IMPORTANT"},
+    ]}), encoding="utf-8")
+    sent = []
+    monkeypatch.setattr(bot, "fetch_with_retries", fake_fetch)
+    monkeypatch.setattr(bot, "send_telegram", lambda msg, chat_id=None: sent.append((chat_id, msg)))
+    monkeypatch.setattr(bot, "SUBSCRIBERS_FILE", str(subs), raising=False)
+    monkeypatch.setattr(bot, "SCRIP_MASTER_FILE", str(tmp_path / "scrip_master.json"), raising=False)
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+
+    bot.check_bse()
+    alerts = [(c, m) for c, m in sent if "No New anouncement" not in m]
+    assert [c for c, _ in alerts] == [-101, -101, -102]
+    assert "500001" in alerts[0][1] and "500002" in alerts[1][1] and "500002" in alerts[2][1]
+    assert sum(bot.API_ANN_ENDPOINT in u for u in fetches) == 1
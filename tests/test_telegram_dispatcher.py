@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+from telegram_dispatcher import TelegramDispatcher, coalesce, split_message
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_post(responses, sent):
+    async def post(chat_id, text):
+        sent.append((chat_id, text))
+        return responses.pop(0) if responses else (200, None)
+    return post
+
+
+def test_coalesce_and_split():
+    items = [{"text": "a" * 10}, {"text": "b" * 10}, {"text": "c" * 10}]
+    assert [t for t, _ in coalesce(items, limit=22)] == ["a" * 10 + "\n\n" + "b" * 10, "c" * 10]
+    assert split_message("line1\nline2\nline3", limit=8) == ["line1", "line2", "line3"]
+    assert split_message("x" * 25, limit=10) == ["x" * 10, "x" * 10, "x" * 5]
+
+
+def test_alerts_for_one_chat_are_coalesced(tmp_path):
+    sent = []
+    clock = FakeClock()
+    d = TelegramDispatcher(make_post([], sent), path=str(tmp_path / "outbox.json"), sleep=clock.sleep, clock=clock)
+    for i in range(3):
+        d.enqueue(-100, f"alert {i}")
+    d.enqueue(-200, "other chat")
+    assert asyncio.run(d.flush()) == 4
+    assert sorted(sent) == [(-200, "other chat"), (-100, "alert 0\n\nalert 1\n\nalert 2")]
+    assert len(d) == 0
+
+
+def test_rate_limit_and_retry_after(tmp_path):
+    sent = []
+    clock = FakeClock()
+    d = TelegramDispatcher(make_post([(429, 5.0)], sent), chat_rate=1.0, chat_burst=1,
+                           coalesce=False, sleep=clock.sleep, clock=clock)
+    for i in range(3):
+        d.enqueue(1, f"m{i}")
+    assert asyncio.run(d.flush()) == 3
+    assert [t for _, t in sent] == ["m0", "m0", "m1", "m2"]
+    # 429 pauses the chat for retry_after, then 1 msg/s for the rest
+    assert clock.now >= 5.0 + 2.0
+
+
+def test_undelivered_messages_persist_across_runs(tmp_path):
+    path = str(tmp_path / "outbox.json")
+    sent = []
+    clock = FakeClock()
+    d = TelegramDispatcher(make_post([(None, None)], sent), path=path, sleep=clock.sleep, clock=clock)
+    d.enqueue(1, "first")
+    d.enqueue(1, "second")
+    assert asyncio.run(d.flush()) == 0
+    with open(path, "r", encoding="utf-8") as f:
+        assert [i["text"] for i in json.load(f)["pending"]] == ["first", "second"]
+
+    sent.clear()
+    again = TelegramDispatcher(make_post([], sent), path=path, sleep=clock.sleep, clock=clock)
+    assert len(again) == 2
+    assert asyncio.run(again.flush()) == 2
+    assert sent == [(1, "first\n\nsecond")]
+    with open(path, "r", encoding="utf-8") as f:
+        assert json.load(f)["pending"] == []
+
+
+def test_enqueued_messages_survive_a_crash_before_flush(tmp_path):
+    path = str(tmp_path / "outbox.json")
+    d = TelegramDispatcher(make_post([], []), path=path)
+    d.enqueue(1, "queued")
+    # the process dies here, before any flush
+    again = TelegramDispatcher(make_post([], []), path=path)
+    assert [i["text"] for i in again.pending] == ["queued"]
+
+
+def test_enqueue_during_flush_keeps_the_batch_in_flight_on_disk(tmp_path):
+    path = str(tmp_path / "outbox.json")
+    sent = []
+
+    async def post(chat_id, text):
+        if text == "first":
+            # another thread (an attachment upgrade) queues while this send is in flight
+            d.enqueue(2, "upgrade")
+            with open(path, "r", encoding="utf-8") as f:
+                assert [i["text"] for i in json.load(f)["pending"]] == ["first", "upgrade"]
+        sent.append((chat_id, text))
+        return 200, None
+
+    d = TelegramDispatcher(post, path=path)
+    d.enqueue(1, "first")
+    assert asyncio.run(d.flush()) == 1
+    assert [i["text"] for i in d.pending] == ["upgrade"]
+    with open(path, "r", encoding="utf-8") as f:
+        assert [i["text"] for i in json.load(f)["pending"]] == ["upgrade"]
+    assert asyncio.run(d.flush()) == 1
+    assert sent == [(1, "first"), (2, "upgrade")]
+
+
+def test_permanent_rejection_is_dropped():
+    sent = []
+    clock = FakeClock()
+    d = TelegramDispatcher(make_post([(400, None)], sent), sleep=clock.sleep, clock=clock)
+    d.enqueue(1, "bad")
+    assert asyncio.run(d.flush()) == 1
+    assert len(d) == 0
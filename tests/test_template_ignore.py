@@ -27,7 +27,7 @@ def test_templated_content_skipped(monkeypatch, tmp_path, capsys):
     # Ensure .env values don't cause a real send; monkeypatch send_telegram to capture message
     captured_send = {"msg": None}
 
-    def fake_send(msg):
+    def fake_send(msg, chat_id=None):
         captured_send["msg"] = msg
 
     monkeypatch.setattr(bot, "send_telegram", fake_send)
@@ -35,7 +35,10 @@ def test_templated_content_skipped(monkeypatch, tmp_path, capsys):
     monkeypatch.setattr(bot, "fetch_with_retries", lambda *args, **kwargs: make_resp(html))
 
     # Use a temp state file so we don't clobber repo file
-    bot.STATE_FILE = str(tmp_path / "last_seen.json")
+    monkeypatch.setattr(bot, "STATE_FILE", str(tmp_path / "last_seen.json"))
+    previous = {"date": "2026-02-07T10:00:00", "scrip": "500001", "title": "ALPHA - Order received",
+                "pdf": "https://example.com/a.pdf"}
+    bot.save_last_seen(previous)
 
     # Run the check
     bot.check_bse()
@@ -47,7 +50,9 @@ def test_templated_content_skipped(monkeypatch, tmp_path, capsys):
     assert captured_send["msg"] is not None
     assert "No New anouncement for NSE Symbol" in captured_send["msg"]
 
-    # The templated announcement should be recorded to last_seen to avoid repeated noisy runs
+    # The placeholder page is not an announcement: last_seen keeps the previous one, along
+    # with the record of the 'no updates' message just sent
     with open(bot.STATE_FILE, "r", encoding="utf-8") as f:
         data = json.load(f)
-    assert "CorpannData" in data["title"] or "CorpannData" in data["scrip"]
+    assert {k: data[k] for k in previous} == previous
+    assert data["nohit_notified"]
@@ -0,0 +1,34 @@
+import bot
+
+
+def test_matches_symbols_and_codes():
+    m = bot.TrackedMatcher(["539594", "vprpl", " AGI ", ""])
+    assert m.symbols == frozenset({"539594", "VPRPL", "AGI"})
+    assert m.codes == {539594: ("539594",)}
+    assert m.match_row({"SCRIP_CD": 539594, "NEWSSUB": "Anything"})
+    assert m.match_row({"SCRIP_CD": 500001, "NEWSSUB": "VPRPL - Board Meeting"})
+    assert m.match_row({"SLONGNAME": "AGI Greenpac", "NEWSSUB": "x"})
+    assert not m.match_row({"SCRIP_CD": 500001, "NEWSSUB": "XAGIY - Board Meeting"})
+
+
+def test_matched_symbols_and_records():
+    m = bot.TrackedMatcher(["IDEA", "VPRPL", "AGI"])
+    assert m.matched_symbols("IDEA", "Update for VPRPL and others") == {"IDEA", "VPRPL"}
+    assert m.match_record({"scrip": "XAGIY", "title": "AGI order"})
+    assert not m.match_record({"scrip": "XAGIY", "title": "Some update"})
+
+
+def test_large_watchlist():
+    symbols = [f"SYM{i}" for i in range(5000)] + [str(500000 + i) for i in range(5000)]
+    m = bot.TrackedMatcher(symbols)
+    assert m.match_row({"SCRIP_CD": 504999, "NEWSSUB": "x"})
+    assert m.match_row({"SCRIP_CD": 1, "NEWSSUB": "SYM4999 - results"})
+    assert not m.match_row({"SCRIP_CD": 1, "NEWSSUB": "SYM5000 - results"})
+
+
+def test_module_matcher_follows_tracked_list(monkeypatch):
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["IDEA"], raising=False)
+    first = bot.get_tracked_matcher()
+    assert bot.get_tracked_matcher() is first
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["ACME"], raising=False)
+    assert bot.get_tracked_matcher().symbols == frozenset({"ACME"})
@@ -0,0 +1,83 @@
+import asyncio
+import re
+import types
+
+import bot
+from xbrl import XbrlCache, parse_xbrl
+
+
+def old_parse(body):
+    """The previous per-field re.search extraction, kept as an oracle."""
+    m_s = re.search(r'<[^>]*ScripCode[^>]*>(.*?)</', body)
+    m_date = re.search(r'<xbrli:instant>(.*?)</xbrli:instant>', body)
+    m_subj = re.search(r'<in-bse-co:SubjectOfAnnouncement[^>]*>(.*?)</', body, re.S)
+    m_attach = re.search(r'<in-bse-co:AttachmentURL[^>]*>(.*?)</', body, re.S)
+    return {
+        "scrip": m_s.group(1).strip() if m_s else "",
+        "date": m_date.group(1).strip() if m_date else "",
+        "title": (m_subj.group(1).strip() if m_subj else "").replace("\n", " "),
+        "pdf": m_attach.group(1).strip() if m_attach else "",
+    }
+
+
+DOC = (
+    '<?xml version="1.0"?><xbrli:xbrl xmlns:in-bse-co="x">'
+    '<xbrli:context id="c1"><xbrli:period><xbrli:instant>2026-02-08</xbrli:instant></xbrli:period></xbrli:context>'
+    '<in-bse-co:ScripCode contextRef="c1">539594</in-bse-co:ScripCode>'
+    '<in-bse-co:SubjectOfAnnouncement contextRef="c1">Board Meeting\nIntimation</in-bse-co:SubjectOfAnnouncement>'
+    '<in-bse-co:AttachmentURL contextRef="c1"> https://example.com/a.pdf </in-bse-co:AttachmentURL>'
+    '<in-bse-co:AttachmentURL contextRef="c1">https://example.com/second.pdf</in-bse-co:AttachmentURL>'
+    '</xbrli:xbrl>'
+)
+
+
+def test_single_pass_parser_matches_previous_extraction():
+    assert parse_xbrl(DOC) == old_parse(DOC)
+    assert parse_xbrl(DOC) == {"scrip": "539594", "date": "2026-02-08",
+                               "title": "Board Meeting Intimation", "pdf": "https://example.com/a.pdf"}
+    partial = "<xbrli:xbrl><in-bse-co:AttachmentURL>u</in-bse-co:AttachmentURL></xbrli:xbrl>"
+    assert parse_xbrl(partial) == old_parse(partial)
+    assert parse_xbrl("<html>error</html>") is None
+    assert parse_xbrl("") is None
+
+
+def test_cache_ttl_lru_and_content_memo():
+    now = [0.0]
+    cache = XbrlCache(ttl_seconds=10, max_entries=2, clock=lambda: now[0])
+    assert cache.get("539594") == (False, None)
+    doc = cache.put("539594", DOC)
+    assert cache.get("539594") == (True, doc)
+    # identical content for another scrip reuses the parsed document
+    assert cache.put("500001", DOC) is doc
+    cache.put("500002", "")
+    assert cache.get("539594") == (False, None)  # evicted (LRU, 2 entries)
+    now[0] = 11
+    assert cache.get("500002") == (False, None)  # expired
+
+
+def test_lookups_reuse_cache_across_polls(monkeypatch):
+    calls = []
+
+    def fake_fetch(url, params=None, **kwargs):
+        calls.append(params["Scripcode"])
+        return types.SimpleNamespace(text=DOC)
+
+    monkeypatch.setattr(bot, "fetch_with_retries", fake_fetch)
+    assert bot._fetch_xbrl_attachment_for_scrip("539594") == "https://example.com/a.pdf"
+    assert bot.fetch_xbrl_for_scrips(["539594"])[0]["title"] == "Board Meeting Intimation"
+    assert calls == ["539594"]
+
+
+def test_concurrent_lookups_share_one_request():
+    calls = []
+
+    async def fetch(url, params=None, **kwargs):
+        calls.append(params["Scripcode"])
+        await asyncio.sleep(0.01)
+        return types.SimpleNamespace(text=DOC)
+
+    async def scenario():
+        return await asyncio.gather(*(bot.async_fetch_xbrl_attachment_for_scrip("539594", fetch=fetch) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["https://example.com/a.pdf"] * 5
+    assert calls == ["539594"]
@@ -0,0 +1,87 @@
+import datetime
+import threading
+import time
+import types
+
+import bot
+
+
+def make_xbrl(code, subject):
+    return (
+        "<xbrli:xbrl>"
+        f"<in-bse-co:ScripCode>{code}</in-bse-co:ScripCode>"
+        "<xbrli:instant>2026-02-08</xbrli:instant>"
+        f"<in-bse-co:SubjectOfAnnouncement>{subject}</in-bse-co:SubjectOfAnnouncement>"
+        f"<in-bse-co:AttachmentURL>https://example.com/{code}.pdf</in-bse-co:AttachmentURL>"
+        "</xbrli:xbrl>"
+    )
+
+
+def test_fanout_results_are_in_input_order(monkeypatch):
+    # Later scrips answer faster; results must still line up with the input order
+    delays = {"111111": 0.15, "222222": 0.05, "333333": 0.0}
+
+    def fake_fetch(url, params=None, **kwargs):
+        s = params["Scripcode"]
+        time.sleep(delays.get(s, 0))
+        if s == "999999":
+            raise Exception("boom")
+        return types.SimpleNamespace(text=make_xbrl(s, f"Subject {s}"))
+
+    monkeypatch.setattr(bot, "fetch_with_retries", fake_fetch)
+    res = bot.fetch_xbrl_for_scrips(["111111", "999999", "222222", "333333"], max_in_flight=4, deadline=5)
+    assert [r["scrip"] if r else None for r in res] == ["111111", None, "222222", "333333"]
+    assert res[0]["pdf"] == "https://example.com/111111.pdf"
+
+
+def test_fanout_respects_max_in_flight(monkeypatch):
+    lock = threading.Lock()
+    state = {"cur": 0, "peak": 0}
+
+    def fake_fetch(url, params=None, **kwargs):
+        with lock:
+            state["cur"] += 1
+            state["peak"] = max(state["peak"], state["cur"])
+        time.sleep(0.02)
+        with lock:
+            state["cur"] -= 1
+        return types.SimpleNamespace(text="")
+
+    monkeypatch.setattr(bot, "fetch_with_retries", fake_fetch)
+    res = bot.fetch_xbrl_for_scrips([str(i) for i in range(12)], max_in_flight=3, deadline=5)
+    assert res == [None] * 12
+    assert state["peak"] <= 3
+
+
+def test_fanout_deadline_drops_stragglers(monkeypatch):
+    def fake_fetch(url, params=None, **kwargs):
+        if params["Scripcode"] == "111111":
+            time.sleep(0.5)
+        return types.SimpleNamespace(text=make_xbrl(params["Scripcode"], "x"))
+
+    monkeypatch.setattr(bot, "fetch_with_retries", fake_fetch)
+    start = time.monotonic()
+    res = bot.fetch_xbrl_for_scrips(["111111", "222222"], max_in_flight=2, deadline=0.1)
+    assert time.monotonic() - start < 0.4
+    assert res[0] is None
+    assert res[1]["scrip"] == "222222"
+
+
+def test_api_fallback_picks_first_tracked_hit(monkeypatch):
+    def fake_fetch(url, params=None, **kwargs):
+        if "Scripcode" not in (params or {}):
+            return types.SimpleNamespace(json=lambda: {"Table": [{"SCRIP_CD": 1, "NEWSSUB": "unrelated"}]})
+        s = params["Scripcode"]
+        if s == "111111":
+            time.sleep(0.05)
+        return types.SimpleNamespace(text=make_xbrl(s, f"Subject {s}"))
+
+    monkeypatch.setattr(bot, "fetch_with_retries", fake_fetch)
+    monkeypatch.setattr(bot, "TRACKED_SCRIP_LIST", ["111111", "222222"], raising=False)
+    monkeypatch.setattr(bot, "_bse_today", lambda: datetime.date(2026, 2, 8))
+    res = bot.get_latest_announcement_from_api()
+    assert res["scrip"] == "111111"
+
+    # months later the same latest filings are old news, not alerts
+    monkeypatch.setattr(bot, "_bse_today", lambda: datetime.date(2026, 6, 1))
+    assert bot.get_latest_announcement_from_api() is None
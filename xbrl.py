@@ -0,0 +1,99 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# One pass over the document picks up every field we use: the context instant date and
+# the ScripCode / SubjectOfAnnouncement / AttachmentURL facts (any namespace prefix).
+_FIELDS_RE = re.compile(
+    r"<xbrli:instant>(?P<date>.*?)</xbrli:instant>"
+    r"|<(?!/)[^>]*?(?P<tag>ScripCode|SubjectOfAnnouncement|AttachmentURL)[^>]*>(?P<value>.*?)</",
+    re.S,
+)
+_FIELD_KEYS = {"ScripCode": "scrip", "SubjectOfAnnouncement": "title", "AttachmentURL": "pdf"}
+
+
+def parse_xbrl(body):
+    """Parse a CorpXbrlGen document into {"scrip", "date", "title", "pdf"}.
+
+    Returns None when `body` is not an XBRL instance. The first occurrence of each field
+    wins, and scanning stops once all four have been seen.
+    """
+    if not body or "<xbrli:xbrl" not in body:
+        return None
+    doc = {}
+    for m in _FIELDS_RE.finditer(body):
+        if m.group("tag"):
+            key = _FIELD_KEYS[m.group("tag")]
+            value = m.group("value")
+        else:
+            key, value = "date", m.group("date")
+        if key not in doc:
+            doc[key] = value.strip()
+            if len(doc) == 4:
+                break
+    return {
+        "scrip": doc.get("scrip", ""),
+        "date": doc.get("date", ""),
+        "title": doc.get("title", "").replace("\n", " "),
+        "pdf": doc.get("pdf", ""),
+    }
+
+
+class XbrlCache:
+    """TTL + LRU cache of parsed XBRL documents.
+
+    Entries are keyed by scrip code and remember the SHA-1 of the body they were parsed
+    from. Parsed documents are also memoized by that hash, so an unchanged body fetched
+    for another scrip, or after expiry, is not parsed again. `ttl_seconds <= 0` disables
+    caching of lookups.
+    """
+
+    def __init__(self, ttl_seconds=300, max_entries=512, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.clock = clock
+        self._by_scrip = OrderedDict()
+        self._by_hash = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._by_scrip)
+
+    def get(self, scrip):
+        """Return (True, doc) for a fresh cached lookup of `scrip`, else (False, None)."""
+        key = str(scrip)
+        with self._lock:
+            entry = self._by_scrip.get(key)
+            if entry is None or self.ttl_seconds <= 0 or self.clock() - entry[0] > self.ttl_seconds:
+                self.misses += 1
+                return False, None
+            self._by_scrip.move_to_end(key)
+            self.hits += 1
+            return True, entry[2]
+
+    def put(self, scrip, body):
+        """Parse `body` (reusing an earlier parse of identical content) and cache it for `scrip`."""
+        digest = hashlib.sha1((body or "").encode("utf-8")).hexdigest()
+        with self._lock:
+            if digest in self._by_hash:
+                self._by_hash.move_to_end(digest)
+                doc = self._by_hash[digest]
+            else:
+                doc = parse_xbrl(body)
+                self._by_hash[digest] = doc
+                if len(self._by_hash) > self.max_entries:
+                    self._by_hash.popitem(last=False)
+            self._by_scrip[str(scrip)] = (self.clock(), digest, doc)
+            self._by_scrip.move_to_end(str(scrip))
+            if len(self._by_scrip) > self.max_entries:
+                self._by_scrip.popitem(last=False)
+        return doc
+
+    def clear(self):
+        with self._lock:
+            self._by_scrip.clear()
+            self._by_hash.clear()